@@ -16,12 +16,11 @@ from pathlib import Path
 from processors.edge_processor import EdgeProcessor
 from processors.mqtt_client import MQTTClient
 from processors.device_monitor import DeviceMonitor
-from models.people_counter import PeopleCounter
-from models.behavior_analyzer import BehaviorAnalyzer
-from models.emergency_detector import EmergencyDetector
+from processors.frame_capture import FrameCapture
 from utils.config import Config
 from utils.logging import setup_logging
 from utils.helpers import ensure_directories
+from utils.metrics import MetricsRegistry, MetricsServer
 
 class DHSILEDEdgeApp:
     def __init__(self, config_path="config/grid_config.yaml"):
@@ -43,9 +42,12 @@ class DHSILEDEdgeApp:
         
         # Initialize components
         self.camera = None
+        self.frame_capture = None
         self.mqtt_client = None
         self.device_monitor = None
         self.edge_processor = None
+        self.metrics_registry = None
+        self.metrics_server = None
         
         # Control flags
         self.running = False
@@ -56,15 +58,17 @@ class DHSILEDEdgeApp:
         self.last_fps_update = time.time()
         self.current_fps = 0
         
+        # Wall time (s) of each startup step, logged and published after initialize()
+        self.startup_timings = {}
+        
     async def initialize(self):
         """Initialize all system components"""
+        startup_start = time.perf_counter()
+        self.startup_timings = {}
+        
         try:
-            # Initialize camera
-            await self.setup_camera()
-            
-            # Initialize MQTT client
+            # Construct components (cheap); connecting and loading happen below
             self.mqtt_client = MQTTClient(self.config, self.logger)
-            await self.mqtt_client.connect()
             
             # Setup command handler
             self.mqtt_client.set_message_handler(self.handle_mqtt_command)
@@ -79,52 +83,133 @@ class DHSILEDEdgeApp:
                 logger=self.logger,
                 mqtt_client=self.mqtt_client
             )
-            await self.edge_processor.initialize()
             
-            self.logger.info("All components initialized successfully")
+            # Prometheus endpoint; values are read from component state at scrape time
+            self.metrics_registry = MetricsRegistry()
+            for component in (self, self.device_monitor, self.edge_processor, self.mqtt_client):
+                self.metrics_registry.add_collector(component.collect_metrics)
+            await self.start_metrics_server()
+            
+            # Camera, MQTT and models are independent, so they start concurrently
+            await asyncio.gather(
+                self._timed_startup('camera', self.setup_camera()),
+                self._timed_startup('mqtt', self.mqtt_client.connect()),
+                self._timed_startup('models', self.edge_processor.initialize())
+            )
+            
+            self.startup_timings['total'] = round(time.perf_counter() - startup_start, 3)
+            self.logger.info(
+                "All components initialized successfully in "
+                f"{self.startup_timings['total']:.2f}s ({self._format_startup_timings()})"
+            )
             
         except Exception as e:
             self.logger.error(f"Initialization failed: {e}")
             raise
     
+    async def _timed_startup(self, name: str, step):
+        """Await a startup step and record its wall time in startup_timings"""
+        start_time = time.perf_counter()
+        await step
+        self.startup_timings[name] = round(time.perf_counter() - start_time, 3)
+    
+    def _format_startup_timings(self) -> str:
+        """One-line startup breakdown, e.g. 'camera 0.41s, mqtt 0.12s, ...'"""
+        steps = {**self.startup_timings, **self.edge_processor.model_load_times}
+        steps.pop('total', None)
+        return ', '.join(f"{name} {seconds:.2f}s" for name, seconds in steps.items())
+    
+    async def publish_startup_report(self, timeout: float = 30.0):
+        """Publish the startup timing breakdown once the broker connection is up"""
+        deadline = time.time() + timeout
+        while not self.mqtt_client.connected and time.time() < deadline:
+            await asyncio.sleep(0.1)
+        
+        await self.mqtt_client.publish(
+            f"dhsiled/grids/{self.grid_id}/startup",
+            json.dumps({
+                'grid_id': self.grid_id,
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'startup_seconds': self.startup_timings,
+                'model_load_seconds': self.edge_processor.model_load_times
+            }),
+            retain=True
+        )
+    
+    async def start_metrics_server(self):
+        """Serve /metrics for the edge-processors scrape job (monitoring.metrics)"""
+        self.metrics_server = MetricsServer.from_config(self.config, self.metrics_registry, self.logger)
+        if self.metrics_server is None:
+            return
+        
+        try:
+            await self.metrics_server.start()
+        except OSError as e:
+            # Metrics are not essential to crowd monitoring
+            self.logger.warning(f"Metrics endpoint unavailable: {e}")
+            self.metrics_server = None
+    
+    def collect_metrics(self, registry):
+        """Set camera and application metrics"""
+        registry.gauge('camera_fps', 'Frames read from the camera per second').set(self.current_fps)
+        registry.gauge('edge_processing_enabled', 'Whether frame processing is enabled').set(
+            1 if self.processing_enabled else 0
+        )
+        startup_seconds = registry.gauge('edge_startup_seconds', 'Wall time of each startup step in seconds')
+        for step, seconds in self.startup_timings.items():
+            startup_seconds.set(seconds, step=step)
+    
     async def setup_camera(self):
-        """Initialize camera with optimal settings"""
+        """Initialize camera with optimal settings (device calls run on a worker thread)"""
         try:
-            # Try different camera indices
-            for camera_index in [0, 1, 2]:
-                self.camera = cv2.VideoCapture(camera_index)
-                if self.camera.isOpened():
-                    break
-            else:
-                raise RuntimeError("No camera found")
+            await asyncio.to_thread(self._open_camera)
             
-            # Configure camera settings
-            camera_config = self.config.get('camera', {})
-            width = camera_config.get('width', 1920)
-            height = camera_config.get('height', 1080)
-            fps = camera_config.get('fps', 30)
-            
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-            self.camera.set(cv2.CAP_PROP_FPS, fps)
-            self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce latency
-            
-            # Verify settings
-            actual_width = self.camera.get(cv2.CAP_PROP_FRAME_WIDTH)
-            actual_height = self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT)
-            actual_fps = self.camera.get(cv2.CAP_PROP_FPS)
-            
-            self.logger.info(f"Camera initialized: {actual_width}x{actual_height} @ {actual_fps}fps")
-            
-            # Test frame capture
-            ret, frame = self.camera.read()
-            if not ret or frame is None:
-                raise RuntimeError("Failed to capture test frame")
-                
+            # Decode frames on a dedicated thread so reads never block the event loop
+            self.frame_capture = FrameCapture(
+                self.camera,
+                self.logger,
+                num_slots=self.config.get('camera.buffer_slots', 4)
+            )
+        
         except Exception as e:
             self.logger.error(f"Camera setup failed: {e}")
             raise
     
+    def _open_camera(self):
+        """Open and configure the camera, trying the configured index first (blocking)"""
+        camera_config = self.config.get('camera', {})
+        device_index = camera_config.get('device_index', 0)
+        
+        for camera_index in [device_index] + [i for i in (0, 1, 2) if i != device_index]:
+            self.camera = cv2.VideoCapture(camera_index)
+            if self.camera.isOpened():
+                break
+            self.camera.release()
+        else:
+            raise RuntimeError("No camera found")
+        
+        # Configure camera settings
+        width = camera_config.get('width', 1920)
+        height = camera_config.get('height', 1080)
+        fps = camera_config.get('fps', 30)
+        
+        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.camera.set(cv2.CAP_PROP_FPS, fps)
+        self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce latency
+        
+        # Verify settings
+        actual_width = self.camera.get(cv2.CAP_PROP_FRAME_WIDTH)
+        actual_height = self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        actual_fps = self.camera.get(cv2.CAP_PROP_FPS)
+        
+        self.logger.info(f"Camera {camera_index} initialized: {actual_width}x{actual_height} @ {actual_fps}fps")
+        
+        # Test frame capture
+        ret, frame = self.camera.read()
+        if not ret or frame is None:
+            raise RuntimeError("Failed to capture test frame")
+    
     async def handle_mqtt_command(self, topic, payload):
         """Handle incoming MQTT commands"""
         try:
@@ -150,6 +235,12 @@ class DHSILEDEdgeApp:
                     json.dumps(health_data)
                 )
                 
+            elif command == 'latency_histograms':
+                await self.mqtt_client.publish(
+                    f"dhsiled/grids/{self.grid_id}/latency",
+                    json.dumps(self.edge_processor.get_latency_histograms())
+                )
+                
             elif command == 'update_config':
                 config_updates = command_data.get('config', {})
                 self.config.update(config_updates)
@@ -171,39 +262,50 @@ class DHSILEDEdgeApp:
     async def process_video_stream(self):
         """Main video processing loop"""
         self.logger.info("Starting video processing loop")
-        frame_buffer = []
-        buffer_size = 16  # For temporal analysis
+        
+        # Poll interval while waiting for the next camera frame
+        camera_fps = self.config.get('camera.fps', 30)
+        poll_interval = 1.0 / (camera_fps * 4)
+        last_frame_time = time.time()
+        
+        self.frame_capture.start()
         
         try:
             while self.running:
-                # Capture frame
-                ret, frame = self.camera.read()
-                if not ret or frame is None:
-                    self.logger.warning("Failed to capture frame, retrying...")
-                    await asyncio.sleep(0.1)
+                # Take the newest captured frame without blocking
+                captured = self.frame_capture.read_latest()
+                if captured is None:
+                    if time.time() - last_frame_time > 5.0:
+                        self.logger.warning("No new camera frames for 5s, waiting for capture thread...")
+                        last_frame_time = time.time()
+                    await asyncio.sleep(poll_interval)
                     continue
                 
+                last_frame_time = time.time()
+                
                 # Update FPS counter
                 self.update_fps_counter()
                 
                 if self.processing_enabled:
-                    # Add frame to buffer for temporal analysis
-                    frame_buffer.append(frame.copy())
-                    if len(frame_buffer) > buffer_size:
-                        frame_buffer.pop(0)
+                    # Copy frame into the temporal window and free the capture slot
+                    frame_window = self.edge_processor.frame_window
+                    frame = frame_window.push(captured.frame)
+                    self.frame_capture.release()
                     
                     # Process current frame
                     try:
                         grid_status = await self.edge_processor.process_frame(
                             frame, 
-                            frame_buffer if len(frame_buffer) == buffer_size else None
+                            frame_window.get_sequence() if frame_window.is_full() else None
                         )
                         
                         # Add system metrics to status
                         grid_status.update({
                             'fps': round(self.current_fps, 2),
                             'processing_enabled': self.processing_enabled,
-                            'frame_timestamp': datetime.now(timezone.utc).isoformat()
+                            'frame_timestamp': datetime.fromtimestamp(captured.timestamp, timezone.utc).isoformat(),
+                            'frame_latency_ms': round((time.time() - captured.timestamp) * 1000, 2),
+                            'capture': self.frame_capture.get_statistics()
                         })
                         
                         # Publish status via MQTT
@@ -215,12 +317,17 @@ class DHSILEDEdgeApp:
                     except Exception as e:
                         self.logger.error(f"Frame processing error: {e}")
                 
-                # Control processing rate (target: 30 FPS)
-                await asyncio.sleep(0.033)
+                # Hand the slot back to the capture ring
+                self.frame_capture.release()
+                
+                # Yield to MQTT and health tasks between frames
+                await asyncio.sleep(0)
                 
         except Exception as e:
             self.logger.error(f"Video processing loop error: {e}")
             raise
+        finally:
+            self.frame_capture.stop()
     
     async def monitor_device_health(self):
         """Monitor device health in background"""
@@ -259,7 +366,8 @@ class DHSILEDEdgeApp:
             tasks = [
                 asyncio.create_task(self.process_video_stream()),
                 asyncio.create_task(self.monitor_device_health()),
-                asyncio.create_task(self.mqtt_client.run())
+                asyncio.create_task(self.mqtt_client.run()),
+                asyncio.create_task(self.publish_startup_report())
             ]
             
             self.logger.info("DHSILED Edge Processor started successfully")
@@ -281,12 +389,18 @@ class DHSILEDEdgeApp:
         self.running = False
         
         # Cleanup resources
+        if self.frame_capture:
+            self.frame_capture.stop()
+        
         if self.camera:
             self.camera.release()
         
         if self.mqtt_client:
             await self.mqtt_client.disconnect()
         
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        
         if self.edge_processor:
             await self.edge_processor.cleanup()
         
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Pluggable inference backends for the edge models
+
+Each model class runs its network through an InferenceBackend, so the
+engine can be chosen per model from config without touching model code:
+
+models:
+  backends:
+    people_counter:
+      engine: onnxruntime        # auto, ultralytics, keras, onnxruntime, opencv
+      path: models/yolov8n.onnx
+      threads: 4
+
+With engine 'auto' the engine follows the model file extension.
+"""
+
+import os
+from abc import ABC, abstractmethod
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+ENGINES = ('ultralytics', 'keras', 'onnxruntime', 'opencv')
+
+# Default engine per model file extension
+EXTENSION_ENGINES = {
+    '.pt': 'ultralytics',
+    '.h5': 'keras',
+    '.keras': 'keras',
+    '.onnx': 'onnxruntime'
+}
+
+
+def engine_available(engine: str) -> bool:
+    """Check whether the packages an engine needs are installed"""
+    modules = {
+        'ultralytics': 'ultralytics',
+        'keras': 'tensorflow',
+        'onnxruntime': 'onnxruntime',
+        'opencv': 'cv2'
+    }
+    return find_spec(modules[engine]) is not None
+
+
+def resolve_engine(engine: Optional[str], model_path: str) -> str:
+    """Resolve 'auto' (or no engine) to a concrete engine for model_path"""
+    engine = (engine or 'auto').lower()
+    
+    if engine != 'auto':
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown inference engine: {engine}")
+        return engine
+    
+    engine = EXTENSION_ENGINES.get(Path(model_path).suffix.lower(), 'keras')
+    
+    # ONNX models still run without onnxruntime through OpenCV DNN
+    if engine == 'onnxruntime' and not engine_available('onnxruntime'):
+        engine = 'opencv'
+    
+    return engine
+
+
+class InferenceBackend(ABC):
+    """Runs one network; subclasses wrap a specific engine"""
+    
+    engine = None
+    
+    # Batch size the model was exported with (None when the batch is dynamic)
+    fixed_batch = None
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+    
+    @abstractmethod
+    def predict(self, inputs: np.ndarray, **kwargs) -> Any:
+        """Run inference on a batch (blocking)"""
+    
+    def describe(self) -> Dict:
+        """Engine and model information for status reporting"""
+        return {'engine': self.engine, 'path': self.path}
+
+
+class KerasBackend(InferenceBackend):
+    """Keras model (.h5/.keras, or an in-memory model)"""
+    
+    engine = 'keras'
+    
+    def __init__(self, model=None, path: Optional[str] = None, direct_call: bool = False):
+        super().__init__(path)
+        
+        if model is None:
+            from tensorflow import keras
+            model = keras.models.load_model(path, compile=False)
+        
+        self.model = model
+        
+        # model(x) skips predict()'s per-call setup, which dominates small batches
+        self.direct_call = direct_call
+    
+    def predict(self, inputs: np.ndarray, **kwargs) -> np.ndarray:
+        if self.direct_call:
+            return np.asarray(self.model(inputs, training=False))
+        return self.model.predict(inputs, verbose=0)
+
+
+class UltralyticsBackend(InferenceBackend):
+    """Ultralytics YOLO model; predict() returns ultralytics Results"""
+    
+    engine = 'ultralytics'
+    
+    def __init__(self, path: str, device: str = 'cpu'):
+        super().__init__(path)
+        
+        from ultralytics import YOLO
+        self.model = YOLO(path)
+        
+        if device == 'cuda':
+            self.model.to('cuda')
+    
+    def predict(self, inputs: np.ndarray, **kwargs):
+        return self.model.predict(inputs, **kwargs)
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX model on ONNX Runtime's CPU execution provider"""
+    
+    engine = 'onnxruntime'
+    
+    def __init__(self, path: str, threads: Optional[int] = None):
+        super().__init__(path)
+        
+        import onnxruntime as ort
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        
+        self.session = ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.input_shape = self.session.get_inputs()[0].shape
+        if isinstance(self.input_shape[0], int):
+            self.fixed_batch = self.input_shape[0]
+    
+    def predict(self, inputs: np.ndarray, **kwargs) -> np.ndarray:
+        return self.session.run(None, {self.input_name: np.ascontiguousarray(inputs, dtype=np.float32)})[0]
+    
+    def describe(self) -> Dict:
+        return {**super().describe(), 'input_shape': [str(dim) for dim in self.input_shape]}
+
+
+class OpenCVDNNBackend(InferenceBackend):
+    """ONNX model on OpenCV's DNN module (no extra dependencies)"""
+    
+    engine = 'opencv'
+    
+    def __init__(self, path: str, threads: Optional[int] = None):
+        super().__init__(path)
+        
+        import cv2
+        
+        if threads:
+            cv2.setNumThreads(threads)
+        
+        self.net = cv2.dnn.readNet(path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+    
+    def predict(self, inputs: np.ndarray, **kwargs) -> np.ndarray:
+        self.net.setInput(np.ascontiguousarray(inputs, dtype=np.float32))
+        return self.net.forward()
+
+
+def create_backend(engine: str, path: str, threads: Optional[int] = None, device: str = 'cpu',
+                   **kwargs) -> InferenceBackend:
+    """Create a backend for a model file"""
+    if not os.path.exists(path) and engine != 'ultralytics':
+        raise FileNotFoundError(f"Model file not found: {path}")
+    
+    if engine == 'ultralytics':
+        return UltralyticsBackend(path, device=device)
+    if engine == 'keras':
+        return KerasBackend(path=path, **kwargs)
+    if engine == 'onnxruntime':
+        return OnnxRuntimeBackend(path, threads=threads)
+    if engine == 'opencv':
+        return OpenCVDNNBackend(path, threads=threads)
+    
+    raise ValueError(f"Unknown inference engine: {engine}")
\ No newline at end of file
@@ -10,76 +10,196 @@ import time
 from typing import List, Dict, Optional, Tuple
 from collections import deque
 import json
+import sys
 
-try:
-    import tensorflow as tf
-    from tensorflow import keras
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
+from models.backends import KerasBackend, create_backend, engine_available, resolve_engine
+from utils.inference_executor import InferenceBusyError
+from utils.latency_histogram import LatencyHistogram
+
+# TensorFlow is imported on first use: it costs seconds and hundreds of MB
+# on a Pi, and is not needed when the model runs on another engine
+TF_AVAILABLE = engine_available('keras')
+if not TF_AVAILABLE:
     print("Warning: TensorFlow not available, using mock implementation")
 
+# Output classes of the behavior models and heads, in output order
+BEHAVIOR_CLASSES = [
+    'normal',
+    'panic',
+    'running',
+    'fighting',
+    'falling',
+    'unusual_gathering',
+    'crowd_surge',
+    'evacuation'
+]
+
 class BehaviorAnalyzer:
-    def __init__(self, model_path: str = "models/behavior_lstm.h5", sequence_length: int = 16):
-        self.model_path = model_path
+    def __init__(self, model_path: str = "models/behavior_lstm.h5", sequence_length: int = 16,
+                 executor=None, temporal_stride: int = 1, frame_rate: float = 30.0,
+                 smoothing_seconds: Optional[float] = None, backend_config: Optional[Dict] = None,
+                 analysis_interval: int = 1, smoothing_predictions: int = 4, warmup_runs: int = 1,
+                 shared_backbone=None, latency_config: Optional[Dict] = None):
+        # Inference engine selection (models.backends.behavior_analyzer)
+        self.backend_config = backend_config or {}
+        self.model_path = self.backend_config.get('path', model_path)
         self.sequence_length = sequence_length
         self.model = None
+        self.backend = None
+        
+        # Sampling: the window holds every temporal_stride-th captured frame
+        self.temporal_stride = max(1, temporal_stride)
+        self.sequence_span = sequence_length * self.temporal_stride / max(1.0, frame_rate)
+        
+        # Optional InferenceExecutor that runs predict() off the event loop
+        self.executor = executor
+        self.warmup_runs = max(0, warmup_runs)
         
         # Input parameters
         self.input_shape = (sequence_length, 224, 224, 3)  # Time, Height, Width, Channels
         self.target_size = (224, 224)
         
         # Behavior classes
-        self.behavior_classes = [
-            'normal',
-            'panic',
-            'running',
-            'fighting',
-            'falling',
-            'unusual_gathering',
-            'crowd_surge',
-            'evacuation'
-        ]
-        
-        # Frame preprocessing
-        self.frame_buffer = deque(maxlen=sequence_length)
-        
-        # Temporal smoothing
-        self.prediction_history = deque(maxlen=5)
+        self.behavior_classes = list(BEHAVIOR_CLASSES)
+        
+        # Frame preprocessing: ring of already resized and normalized frames.
+        # Frame id k lives in slot k % sequence_length, so each frame of a
+        # sliding window is preprocessed once instead of once per window
+        self.frame_buffer = np.empty(self.input_shape, dtype=np.float32)
+        self.frame_buffer_ids = [None] * sequence_length
+        self.next_buffer_id = 0
+        
+        # Reused model input and resize scratch (avoids per-call allocation)
+        self.input_tensor = np.empty((1, *self.input_shape), dtype=np.float32)
+        self.resize_buffer = np.empty((*self.target_size[::-1], 3), dtype=np.uint8)
+        
+        # Preprocessing cache statistics
+        self.frames_preprocessed = 0
+        self.frames_reused = 0
+        
+        # Split model: per-frame CNN encoder and temporal (LSTM) head, with
+        # the encoder's embeddings cached by frame id like frame_buffer
+        self.frame_encoder = None
+        self.temporal_head = None
+        self.embedding_buffer = None
+        self.embedding_ids = [None] * sequence_length
+        self.frames_encoded = 0
+        self.embeddings_reused = 0
+        
+        # Optional SharedBackbone (models.shared_backbone): its backbone is the
+        # frame encoder and its behavior head the temporal head, and the newest
+        # frame's features are shared with the emergency detector
+        self.shared_backbone = shared_backbone
+        self.use_shared_backbone = False
+        
+        # Temporal smoothing: exponential decay over prediction age. Unless a
+        # fixed time constant is configured, it spans smoothing_predictions
+        # analysis periods; the period starts from the window hop and follows
+        # the measured gap between predictions (adaptive scheduling, motion gating)
+        self.fixed_smoothing_seconds = smoothing_seconds
+        self.smoothing_predictions = max(1, smoothing_predictions)
+        self.nominal_prediction_period = max(1, analysis_interval) * self.temporal_stride / max(1.0, frame_rate)
+        self.prediction_period = self.nominal_prediction_period
+        
+        # Gaps beyond this many nominal periods are pauses (motion gate, processing
+        # disabled, busy queue), not a slower analysis rate
+        self.max_gap_periods = 8
+        self.prediction_history = deque(maxlen=max(32, 3 * self.smoothing_predictions + 2))
         self.confidence_threshold = 0.6
         
         # Performance tracking
-        self.processing_times = []
+        self.latency = LatencyHistogram.from_config(latency_config)
+    
+    @property
+    def smoothing_seconds(self) -> float:
+        """Time constant of the prediction smoothing"""
+        if self.fixed_smoothing_seconds:
+            return self.fixed_smoothing_seconds
+        return self.smoothing_predictions * self.prediction_period
         
     async def load_model(self):
-        """Load the behavior analysis model"""
+        """Load the behavior analysis model (file loading runs on a worker thread)"""
         try:
-            if TF_AVAILABLE:
-                # Check if model file exists
-                import os
-                if os.path.exists(self.model_path):
-                    self.model = keras.models.load_model(self.model_path)
-                    print(f"Loaded behavior analysis model from {self.model_path}")
-                else:
-                    # Create a simple mock model
-                    self.model = self._create_mock_model()
-                    print(f"Created mock behavior analysis model (file not found: {self.model_path})")
-                
-                # Optimize for inference
-                if hasattr(self.model, 'compile'):
-                    self.model.compile(optimizer='adam', loss='categorical_crossentropy')
-                
-                # Warm up model
-                await self._warmup_model()
-                
-            else:
-                # Use mock model
-                self.model = MockBehaviorModel(self.behavior_classes)
-                print("Using mock behavior analysis model (TensorFlow not available)")
+            if self.shared_backbone is not None and await self.shared_backbone.load_model():
+                self._use_shared_backbone()
+                return
+            
+            await asyncio.to_thread(self._load_backend)
+            
+            # Warm up model
+            await self._warmup_model()
                 
         except Exception as e:
             print(f"Error loading behavior model: {e}")
             self.model = MockBehaviorModel(self.behavior_classes)
+            self.backend = None
+            self.frame_encoder = None
+            self.temporal_head = None
+    
+    def _use_shared_backbone(self):
+        """Serve the split model from the shared backbone (already warmed up)"""
+        self.model = self.shared_backbone
+        self.backend = None
+        self.frame_encoder = self.shared_backbone.backbone
+        self.temporal_head = self.shared_backbone.behavior_head
+        self.embedding_buffer = None
+        self.use_shared_backbone = True
+        print("Behavior analysis served by the shared backbone")
+    
+    def _load_backend(self):
+        """Load the model on its inference engine (blocking)"""
+        engine = resolve_engine(self.backend_config.get('engine'), self.model_path)
+        
+        if engine != 'keras':
+            self._load_exported_model(engine)
+            
+        elif TF_AVAILABLE:
+            from tensorflow import keras
+            
+            # Check if model file exists; inference only, so no compile step
+            import os
+            if os.path.exists(self.model_path):
+                self.model = keras.models.load_model(self.model_path, compile=False)
+                print(f"Loaded behavior analysis model from {self.model_path}")
+            else:
+                # Create a simple mock model
+                self.model = self._create_mock_model()
+                print(f"Created mock behavior analysis model (file not found: {self.model_path})")
+            
+            if hasattr(self.model, 'predict'):
+                self.backend = KerasBackend(self.model, self.model_path)
+                
+                # Serve as per-frame encoder + temporal head when possible
+                self._split_model()
+            
+        else:
+            # Use mock model
+            self.model = MockBehaviorModel(self.behavior_classes)
+            print("Using mock behavior analysis model (TensorFlow not available)")
+    
+    def _load_exported_model(self, engine: str):
+        """
+        Load an exported model on a CPU-optimized engine
+        
+        With encoder_path and head_path in the backend config (written by
+        tools/export_models.py for split models) the streaming encoder/head
+        pair is used; otherwise the full sequence model at model_path.
+        """
+        threads = self.backend_config.get('threads')
+        encoder_path = self.backend_config.get('encoder_path')
+        head_path = self.backend_config.get('head_path')
+        
+        if encoder_path and head_path:
+            self.frame_encoder = create_backend(resolve_engine(engine, encoder_path), encoder_path, threads=threads)
+            self.temporal_head = create_backend(resolve_engine(engine, head_path), head_path, threads=threads)
+            print(f"Loaded behavior frame encoder and temporal head from {encoder_path}, {head_path} ({engine})")
+        
+        import os
+        if os.path.exists(self.model_path) or self.temporal_head is None:
+            self.backend = create_backend(engine, self.model_path, threads=threads)
+            print(f"Loaded behavior analysis model from {self.model_path} ({engine})")
+        
+        self.model = self.backend or self.temporal_head
     
     def _create_mock_model(self):
         """Create a simple mock CNN-LSTM model"""
@@ -87,6 +207,8 @@ class BehaviorAnalyzer:
             return MockBehaviorModel(self.behavior_classes)
         
         try:
+            from tensorflow import keras
+            
             # Simple CNN-LSTM architecture
             model = keras.Sequential([
                 # Convolutional layers for spatial features
@@ -115,65 +237,249 @@ class BehaviorAnalyzer:
                 keras.layers.Dense(len(self.behavior_classes), activation='softmax')
             ])
             
-            model.compile(
-                optimizer='adam',
-                loss='categorical_crossentropy',
-                metrics=['accuracy']
-            )
-            
             return model
             
         except Exception as e:
             print(f"Error creating mock model: {e}")
             return MockBehaviorModel(self.behavior_classes)
     
+    def _split_model(self):
+        """
+        Split a TimeDistributed CNN + temporal model into two models
+        
+        The leading TimeDistributed layers become a per-frame encoder (their
+        wrapped layers, sharing weights) and the remaining layers a head over
+        (T, D) embeddings. The split is checked against the full model and
+        the full model is kept on any mismatch.
+        """
+        try:
+            from tensorflow import keras
+            
+            layers = [layer for layer in self.model.layers
+                      if not isinstance(layer, keras.layers.InputLayer)]
+            
+            split = 0
+            while split < len(layers) and isinstance(layers[split], keras.layers.TimeDistributed):
+                split += 1
+            
+            if split == 0 or split == len(layers):
+                print("Behavior model has no TimeDistributed encoder prefix, serving full model")
+                return
+            
+            # Per-frame encoder from the wrapped layers
+            frame_input = keras.Input(shape=self.input_shape[1:])
+            x = frame_input
+            for layer in layers[:split]:
+                x = layer.layer(x)
+            
+            if len(x.shape) != 2:
+                print("Behavior encoder output is not a flat embedding, serving full model")
+                return
+            
+            encoder = keras.Model(frame_input, x, name='behavior_frame_encoder')
+            
+            # Temporal head over a sequence of embeddings
+            embedding_input = keras.Input(shape=(None, int(x.shape[-1])))
+            y = embedding_input
+            for layer in layers[split:]:
+                y = layer(y)
+            head = keras.Model(embedding_input, y, name='behavior_temporal_head')
+            
+            # Verify the split reproduces the full model
+            check = np.random.rand(1, *self.input_shape).astype(np.float32)
+            expected = self.model.predict(check, verbose=0)
+            embeddings = encoder.predict(check[0], verbose=0)
+            actual = head.predict(embeddings[np.newaxis], verbose=0)
+            
+            if not np.allclose(expected, actual, atol=1e-4):
+                print("Split behavior model does not match the full model, serving full model")
+                return
+            
+            self.frame_encoder = KerasBackend(encoder, direct_call=True)
+            self.temporal_head = KerasBackend(head)
+            self.embedding_buffer = np.empty((self.sequence_length, int(x.shape[-1])), dtype=np.float32)
+            print(f"Behavior model split into frame encoder ({split} layers) and temporal head "
+                  f"({len(layers) - split} layers)")
+            
+        except Exception as e:
+            print(f"Behavior model split failed, serving full model: {e}")
+            self.frame_encoder = None
+            self.temporal_head = None
+    
     async def _warmup_model(self):
         """Warm up the model with dummy data"""
         try:
-            if TF_AVAILABLE and hasattr(self.model, 'predict'):
+            if self.backend is not None or self.temporal_head is not None:
                 dummy_sequence = np.random.randint(0, 255, self.input_shape, dtype=np.uint8)
                 dummy_sequence = np.expand_dims(dummy_sequence, axis=0)  # Add batch dimension
                 dummy_sequence = dummy_sequence.astype(np.float32) / 255.0
                 
-                # Run a few prediction passes
-                for _ in range(3):
-                    _ = self.model.predict(dummy_sequence, verbose=0)
-                    await asyncio.sleep(0.1)
+                # Build the graph and fill engine caches before the first frame
+                for _ in range(self.warmup_runs):
+                    if self.temporal_head is not None:
+                        embeddings = await self._predict(dummy_sequence[0], backend=self.frame_encoder)
+                        _ = await self._predict(embeddings[np.newaxis], backend=self.temporal_head)
+                    else:
+                        _ = await self._predict(dummy_sequence)
                 
                 print("Behavior model warmup completed")
             
         except Exception as e:
             print(f"Behavior model warmup failed: {e}")
     
-    def preprocess_sequence(self, frame_sequence: List[np.ndarray]) -> np.ndarray:
-        """Preprocess frame sequence for model input"""
-        processed_frames = []
+    async def _predict(self, inputs: np.ndarray, backend=None):
+        """Run the inference backend (or a split part's) through the inference executor when one is attached"""
+        backend = backend or self.backend
+        if self.executor is not None:
+            return await self.executor.run('behavior_analyzer', backend.predict, inputs)
+        return backend.predict(inputs)
+    
+    def _preprocess_into(self, frame: np.ndarray, out: np.ndarray, pyramid=None):
+        """Resize and normalize one frame into out"""
+        if pyramid is not None and frame is pyramid.frame:
+            # Shared 224x224 level of the newest frame
+            np.copyto(out, pyramid.normalized(self.target_size))
+            return
+        
+        # Resize frame into scratch buffer
+        cv2.resize(frame, self.target_size, dst=self.resize_buffer, interpolation=cv2.INTER_LINEAR)
+        
+        # Normalize pixel values into the output slot
+        np.multiply(self.resize_buffer, 1.0 / 255.0, out=out, casting='unsafe')
+    
+    def _buffer_frame(self, frame_id: int, frame: np.ndarray, pyramid=None) -> int:
+        """Preprocess a frame into the ring unless it is already there; returns its slot"""
+        slot = frame_id % self.sequence_length
         
-        for frame in frame_sequence:
-            # Resize frame
-            resized = cv2.resize(frame, self.target_size, interpolation=cv2.INTER_LINEAR)
+        if self.frame_buffer_ids[slot] == frame_id:
+            self.frames_reused += 1
+        else:
+            self._preprocess_into(frame, self.frame_buffer[slot], pyramid)
+            self.frame_buffer_ids[slot] = frame_id
+            self.frames_preprocessed += 1
+        
+        return slot
+    
+    def preprocess_sequence(self, frame_sequence: List[np.ndarray], frame_ids: Optional[List[int]] = None,
+                            pyramid=None) -> np.ndarray:
+        """
+        Preprocess frame sequence for model input
+        
+        With frame_ids (consecutive integers, oldest first, e.g. from
+        TemporalFrameWindow.get_sequence_ids) frames already seen in earlier
+        windows are taken from the preprocessed ring, so a sliding window
+        costs one resize per new frame. Without ids every frame is resized.
+        When the pyramid of the newest frame is given, its shared 224x224
+        level is reused.
+        
+        Output goes to a preallocated (1, T, H, W, C) tensor that is reused
+        by the next call, so callers must not keep it across frames. With a
+        split model the output is the (1, T, D) embedding sequence instead.
+        """
+        frames = list(frame_sequence)[-self.sequence_length:]
+        count = len(frames)
+        
+        if frame_ids is not None:
+            frame_ids = list(frame_ids)[-count:]
+            if len(frame_ids) != count or frame_ids[-1] - frame_ids[0] != count - 1:
+                frame_ids = None
+        
+        if self.temporal_head is not None:
+            return self._encode_sequence(frames, frame_ids, pyramid)
+        
+        if frame_ids is None:
+            for i, frame in enumerate(frames):
+                self._preprocess_into(frame, self.input_tensor[0, i], pyramid)
+                self.frames_preprocessed += 1
+        else:
+            slots = [self._buffer_frame(frame_id, frame, pyramid) for frame_id, frame in zip(frame_ids, frames)]
+            self.next_buffer_id = max(self.next_buffer_id, frame_ids[-1] + 1)
             
-            # Normalize pixel values
-            normalized = resized.astype(np.float32) / 255.0
+            # Assemble the model input in chronological order
+            np.take(self.frame_buffer, slots, axis=0, out=self.input_tensor[0, :count])
+        
+        if count < self.sequence_length:
+            return self.input_tensor[:, :count]
+        
+        return self.input_tensor
+    
+    def _encode_sequence(self, frames: List[np.ndarray], frame_ids: Optional[List[int]],
+                         pyramid=None) -> np.ndarray:
+        """
+        Embedding sequence for the temporal head (blocking, run off the event loop)
+        
+        Frames whose id is already in the embedding ring are not encoded
+        again; the rest are preprocessed and encoded in one batch. On the
+        shared backbone the newest frame's features come from its pyramid,
+        where the emergency detector may already have computed them.
+        """
+        count = len(frames)
+        cacheable = frame_ids is not None
+        if not cacheable:
+            # No ids: encode every frame and leave nothing cached
+            self.embedding_ids = [None] * self.sequence_length
+            frame_ids = list(range(count))
+        
+        slots = [frame_id % self.sequence_length for frame_id in frame_ids]
+        missing = [i for i, (frame_id, slot) in enumerate(zip(frame_ids, slots))
+                   if self.embedding_ids[slot] != frame_id]
+        
+        if missing:
+            newest = None
+            if self.use_shared_backbone and pyramid is not None and frames[missing[-1]] is pyramid.frame:
+                newest = missing.pop()
+            
+            embeddings = []
+            if missing:
+                # Preprocess new frames into the (otherwise unused) pixel input tensor
+                batch = self.input_tensor[0, :len(missing)]
+                for j, i in enumerate(missing):
+                    self._preprocess_into(frames[i], batch[j], pyramid)
+                
+                if self.use_shared_backbone:
+                    embeddings = list(self.shared_backbone.encode_batch(batch))
+                else:
+                    embeddings = list(self.frame_encoder.predict(batch))
+            
+            if newest is not None:
+                embeddings.append(self.shared_backbone.encode(frames[newest], pyramid))
+                missing.append(newest)
             
-            processed_frames.append(normalized)
+            if self.embedding_buffer is None:
+                # Exported encoders: embedding size is known after the first pass
+                self.embedding_buffer = np.empty((self.sequence_length, len(embeddings[0])), dtype=np.float32)
+            
+            for j, i in enumerate(missing):
+                self.embedding_buffer[slots[i]] = embeddings[j]
+                self.embedding_ids[slots[i]] = frame_ids[i]
+        
+        self.frames_encoded += len(missing)
+        self.embeddings_reused += count - len(missing)
+        self.frames_preprocessed += len(missing)
         
-        # Convert to numpy array
-        sequence = np.array(processed_frames)
+        sequence = self.embedding_buffer[slots][np.newaxis]
         
-        # Add batch dimension
-        sequence = np.expand_dims(sequence, axis=0)
+        if not cacheable:
+            self.embedding_ids = [None] * self.sequence_length
         
         return sequence
     
     async def analyze_sequence(self, frame_sequence: np.ndarray) -> Dict[str, float]:
-        """Analyze behavior from frame sequence"""
+        """Analyze behavior from a preprocessed frame sequence or, with a split model, an embedding sequence"""
         start_time = time.time()
         
         try:
-            if TF_AVAILABLE and hasattr(self.model, 'predict'):
+            if self.temporal_head is not None and frame_sequence.ndim == 3:
+                # Temporal head over cached per-frame embeddings
+                predictions = await self._predict(frame_sequence, backend=self.temporal_head)
+                
+                behavior_scores = {}
+                for i, behavior in enumerate(self.behavior_classes):
+                    behavior_scores[behavior] = float(predictions[0][i])
+                
+            elif self.backend is not None:
                 # Run model inference
-                predictions = self.model.predict(frame_sequence, verbose=0)
+                predictions = await self._predict(frame_sequence)
                 
                 # Convert predictions to behavior scores
                 behavior_scores = {}
@@ -189,12 +495,12 @@ class BehaviorAnalyzer:
             
             # Record performance
             processing_time = time.time() - start_time
-            self.processing_times.append(processing_time)
-            if len(self.processing_times) > 100:
-                self.processing_times.pop(0)
+            self.latency.record(processing_time)
             
             return smoothed_scores
             
+        except InferenceBusyError:
+            raise
         except Exception as e:
             print(f"Behavior analysis failed: {e}")
             # Return default normal behavior
@@ -202,19 +508,44 @@ class BehaviorAnalyzer:
                    for behavior in self.behavior_classes}
     
     def _apply_temporal_smoothing(self, current_predictions: Dict[str, float]) -> Dict[str, float]:
-        """Apply temporal smoothing to reduce noise in predictions"""
+        """
+        Apply temporal smoothing to reduce noise in predictions
+        
+        Weights decay exponentially with the age of each prediction. The
+        time constant is a fixed number of measured analysis periods, so the
+        same number of recent predictions contributes whatever the effective
+        analysis rate (window hop, temporal stride, adaptive scheduling).
+        """
+        now = time.time()
+        
+        if self.prediction_history:
+            gap = now - self.prediction_history[-1][0]
+            
+            # After a pause the earlier predictions no longer describe the scene
+            if gap > 3 * self.smoothing_seconds:
+                self.prediction_history.clear()
+            
+            # Track the effective analysis period (moving average of capped prediction gaps)
+            if gap > 0:
+                gap = min(gap, self.max_gap_periods * self.nominal_prediction_period)
+                self.prediction_period = 0.8 * self.prediction_period + 0.2 * gap
+        
         # Add current predictions to history
-        self.prediction_history.append(current_predictions.copy())
+        self.prediction_history.append((now, current_predictions.copy()))
+        
+        # Forget predictions older than three time constants (weight < 5%)
+        while now - self.prediction_history[0][0] > 3 * self.smoothing_seconds:
+            self.prediction_history.popleft()
         
         # Calculate weighted average (more weight to recent predictions)
-        weights = np.array([0.1, 0.2, 0.3, 0.4])[:len(self.prediction_history)]
+        ages = np.array([now - timestamp for timestamp, _ in self.prediction_history])
+        weights = np.exp(-ages / self.smoothing_seconds)
         weights = weights / weights.sum()
         
         smoothed_predictions = {}
         for behavior in self.behavior_classes:
-            scores = [pred[behavior] for pred in self.prediction_history]
-            smoothed_score = np.average(scores, weights=weights[:len(scores)])
-            smoothed_predictions[behavior] = float(smoothed_score)
+            scores = [pred[behavior] for _, pred in self.prediction_history]
+            smoothed_predictions[behavior] = float(np.dot(weights, scores))
         
         return smoothed_predictions
     
@@ -279,45 +610,70 @@ class BehaviorAnalyzer:
     
     def get_behavior_statistics(self) -> Dict:
         """Get behavior analysis statistics"""
-        if not self.processing_times:
+        if not self.latency.count:
             return {
-                'avg_processing_time': 0,
+                'latency': self.latency.summary(),
                 'model_loaded': self.model is not None,
                 'sequence_length': self.sequence_length
             }
         
+        backend = self.backend or self.temporal_head
+        
         return {
-            'avg_processing_time': np.mean(self.processing_times),
-            'max_processing_time': np.max(self.processing_times),
-            'min_processing_time': np.min(self.processing_times),
+            'latency': self.latency.summary(),
             'model_loaded': self.model is not None,
             'sequence_length': self.sequence_length,
-            'samples_processed': len(self.processing_times)
+            'temporal_stride': self.temporal_stride,
+            'sequence_span_seconds': round(self.sequence_span, 3),
+            'prediction_period_seconds': round(self.prediction_period, 3),
+            'smoothing_seconds': round(self.smoothing_seconds, 3),
+            'samples_processed': self.latency.count,
+            'frames_preprocessed': self.frames_preprocessed,
+            'frames_reused': self.frames_reused,
+            'backend': backend.describe() if backend else {'engine': 'mock'},
+            'split_model': self.temporal_head is not None,
+            'frames_encoded': self.frames_encoded,
+            'embeddings_reused': self.embeddings_reused
         }
     
-    def add_frame_to_buffer(self, frame: np.ndarray):
-        """Add frame to the analysis buffer"""
-        self.frame_buffer.append(frame.copy())
+    def add_frame_to_buffer(self, frame: np.ndarray, pyramid=None):
+        """Preprocess a frame once into the analysis buffer"""
+        self._buffer_frame(self.next_buffer_id, frame, pyramid)
+        self.next_buffer_id += 1
+    
+    def _buffered_ids(self) -> List[int]:
+        """Ids of the consecutive frames in the buffer, oldest first"""
+        ids = []
+        for frame_id in range(self.next_buffer_id - 1, self.next_buffer_id - 1 - self.sequence_length, -1):
+            if frame_id < 0 or self.frame_buffer_ids[frame_id % self.sequence_length] != frame_id:
+                break
+            ids.append(frame_id)
+        return ids[::-1]
     
     def has_enough_frames(self) -> bool:
         """Check if buffer has enough frames for analysis"""
-        return len(self.frame_buffer) >= self.sequence_length
+        return len(self._buffered_ids()) >= self.sequence_length
     
-    def get_frame_sequence(self) -> List[np.ndarray]:
-        """Get current frame sequence from buffer"""
-        return list(self.frame_buffer)
+    def get_frame_sequence(self) -> np.ndarray:
+        """Get the buffered frames as a preprocessed (1, T, H, W, C) model input"""
+        slots = [frame_id % self.sequence_length for frame_id in self._buffered_ids()]
+        np.take(self.frame_buffer, slots, axis=0, out=self.input_tensor[0, :len(slots)])
+        return self.input_tensor[:, :len(slots)]
     
     async def cleanup(self):
         """Clean up model resources"""
         try:
-            if self.model and TF_AVAILABLE:
+            if self.model and 'tensorflow' in sys.modules:
                 # Clear model from memory
                 del self.model
                 
-                # Clear TensorFlow session if available
-                if hasattr(tf.keras, 'clear_session'):
-                    tf.keras.backend.clear_session()
+                # Clear the TensorFlow session (only once TensorFlow was imported)
+                from tensorflow import keras
+                keras.backend.clear_session()
             
+            self.backend = None
+            self.frame_encoder = None
+            self.temporal_head = None
             print("Behavior analyzer cleanup completed")
             
         except Exception as e:
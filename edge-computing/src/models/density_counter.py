@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Density-map crowd counting (CSRNet-style regression) for very dense grids
+"""
+
+import cv2
+import numpy as np
+import asyncio
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from models.backends import create_backend, resolve_engine
+
+
+class DensityMapCounter:
+    """
+    Counts people by regressing a density map and integrating it.
+    
+    The network maps a downscaled frame to a map whose sum is the number of
+    people, so the cost is one forward pass regardless of crowd size and no
+    per-person boxes or NMS are involved. The map is reduced to a coarse
+    grid of per-cell counts for the status message.
+    """
+    
+    def __init__(self, model_path: str = "models/csrnet_lite.onnx", executor=None,
+                 backend_config: Optional[Dict] = None, input_size: Tuple[int, int] = (640, 360),
+                 grid_size: Tuple[int, int] = (6, 8)):
+        # Inference engine selection (models.density_counting.backend)
+        self.backend_config = backend_config or {}
+        self.model_path = self.backend_config.get('path', model_path)
+        self.model = None
+        self.backend = None
+        
+        # Optional InferenceExecutor that runs predict() off the event loop
+        self.executor = executor
+        
+        # Network input (width, height) and output grid (rows, columns)
+        self.input_size = tuple(input_size)
+        self.grid_size = tuple(grid_size)
+        
+        # ImageNet normalization of the CSRNet front end (RGB)
+        self.mean = np.array([0.485, 0.456, 0.406], dtype=np.float32).reshape(1, 3, 1, 1)
+        self.std = np.array([0.229, 0.224, 0.225], dtype=np.float32).reshape(1, 3, 1, 1)
+        
+        # Performance tracking
+        self.estimate_count = 0
+        self.last_count = None
+    
+    async def load_model(self):
+        """Load the density regression model"""
+        try:
+            if not Path(self.model_path).exists():
+                self.model = MockDensityModel(self.input_size)
+                print(f"Using mock density model (file not found: {self.model_path})")
+                return
+            
+            engine = resolve_engine(self.backend_config.get('engine'), self.model_path)
+            self.backend = await asyncio.to_thread(
+                create_backend, engine, self.model_path, threads=self.backend_config.get('threads')
+            )
+            self.model = self.backend
+            print(f"Density model loaded from {self.model_path} ({engine})")
+            
+            # Warm up the model
+            await self._predict(self.preprocess_frame(np.zeros((self.input_size[1], self.input_size[0], 3), np.uint8)))
+        
+        except Exception as e:
+            print(f"Error loading density model: {e}")
+            self.model = MockDensityModel(self.input_size)
+            self.backend = None
+    
+    async def _predict(self, inputs: np.ndarray):
+        """Run the inference backend through the inference executor when one is attached"""
+        if self.executor is not None:
+            return await self.executor.run('people_counter', self.backend.predict, inputs)
+        return self.backend.predict(inputs)
+    
+    def preprocess_frame(self, frame: np.ndarray, pyramid=None) -> np.ndarray:
+        """Downscaled, normalized NCHW RGB input"""
+        if pyramid is not None:
+            resized = pyramid.resize(self.input_size, cv2.INTER_AREA)
+        else:
+            resized = cv2.resize(frame, self.input_size, interpolation=cv2.INTER_AREA)
+        
+        blob = cv2.dnn.blobFromImage(resized, scalefactor=1.0 / 255.0, swapRB=True)
+        return (blob - self.mean) / self.std
+    
+    async def estimate(self, frame: np.ndarray, pyramid=None) -> Dict:
+        """Count people in a frame; returns the count and the coarse density grid"""
+        if self.backend is None:
+            density_map = await self.model.estimate_density(frame)
+        else:
+            output = await self._predict(self.preprocess_frame(frame, pyramid))
+            density_map = np.squeeze(np.asarray(output, dtype=np.float32))  # NCHW or NHWC, one channel
+        
+        density_map = np.maximum(density_map, 0)
+        
+        self.estimate_count += 1
+        self.last_count = float(density_map.sum())
+        
+        return {
+            'count': int(round(self.last_count)),
+            'estimated_count': round(self.last_count, 1),
+            **self.density_grid(density_map)
+        }
+    
+    def density_grid(self, density_map: np.ndarray) -> Dict:
+        """Sum a density map into grid cells (people per cell, rows by columns)"""
+        h, w = density_map.shape[:2]
+        rows, cols = self.grid_size
+        ys = np.linspace(0, h, rows + 1).astype(np.int32)
+        xs = np.linspace(0, w, cols + 1).astype(np.int32)
+        
+        # Integral image sampled at cell corners gives per-cell sums
+        integral = cv2.integral(density_map.astype(np.float32), sdepth=cv2.CV_64F)[np.ix_(ys, xs)]
+        cells = integral[1:, 1:] - integral[:-1, 1:] - integral[1:, :-1] + integral[:-1, :-1]
+        
+        return {'grid': [rows, cols], 'cells': np.round(cells, 1).tolist()}
+    
+    def get_statistics(self) -> Dict:
+        """Density counting statistics"""
+        return {
+            'engine': self.backend.describe() if self.backend else {'engine': 'mock'},
+            'estimates': self.estimate_count,
+            'last_count': round(self.last_count, 1) if self.last_count is not None else None
+        }
+
+
+class MockDensityModel:
+    """Mock density model for testing and development"""
+    
+    def __init__(self, input_size: Tuple[int, int]):
+        # Output map at 1/8 of the input, like CSRNet
+        self.map_size = (max(1, input_size[0] // 8), max(1, input_size[1] // 8))
+    
+    async def estimate_density(self, frame: np.ndarray) -> np.ndarray:
+        """Mock density map: a blurred scatter of a random dense crowd"""
+        await asyncio.sleep(0.03)  # Simulate processing time
+        
+        w, h = self.map_size
+        density_map = np.zeros((h, w), dtype=np.float32)
+        
+        num_people = np.random.randint(150, 320)
+        xs = np.random.randint(0, w, num_people)
+        ys = np.random.randint(h // 3, h, num_people)  # Stands fill the lower part of the view
+        np.add.at(density_map, (ys, xs), 1.0)
+        
+        return cv2.GaussianBlur(density_map, (0, 0), 1.5, borderType=cv2.BORDER_REFLECT)
\ No newline at end of file
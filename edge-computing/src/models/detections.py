@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Structured NumPy detection arrays for the people counter
+
+Detections stay in one structured array from model output through
+filtering, NMS, coordinate mapping and tracking. Python tuples/dicts are
+only built at the serialization boundary (to_tuples, to_locations).
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+DETECTION_DTYPE = np.dtype([
+    ('xyxy', np.float32, (4,)),       # x1, y1, x2, y2
+    ('conf', np.float32),
+    ('area', np.float32),
+    ('aspect', np.float32),           # height / width
+    ('track_id', np.int64),           # -1 when untracked
+    ('velocity', np.float32, (2,))    # pixels per second
+])
+
+
+def make_detections(xyxy: np.ndarray, conf: np.ndarray, track_ids: Optional[np.ndarray] = None,
+                    velocities: Optional[np.ndarray] = None) -> np.ndarray:
+    """Build a detection array from (N, 4) xyxy boxes and (N,) confidences"""
+    xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+    detections = np.zeros(len(xyxy), dtype=DETECTION_DTYPE)
+    
+    detections['xyxy'] = xyxy
+    detections['conf'] = conf
+    detections['track_id'] = -1 if track_ids is None else track_ids
+    if velocities is not None:
+        detections['velocity'] = velocities
+    
+    _update_geometry(detections)
+    return detections
+
+
+def from_xywh(boxes: np.ndarray, conf: np.ndarray) -> np.ndarray:
+    """Build a detection array from (N, 4) x, y, w, h boxes"""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    xyxy = boxes.copy()
+    xyxy[:, 2:] += boxes[:, :2]
+    return make_detections(xyxy, conf)
+
+
+def from_tuples(detections: Sequence[Tuple]) -> np.ndarray:
+    """Build a detection array from (x, y, w, h, conf) tuples"""
+    values = np.asarray(detections, dtype=np.float32).reshape(-1, 5)
+    return from_xywh(values[:, :4], values[:, 4])
+
+
+def empty() -> np.ndarray:
+    """Empty detection array"""
+    return np.zeros(0, dtype=DETECTION_DTYPE)
+
+
+def _update_geometry(detections: np.ndarray):
+    """Recompute area and aspect ratio from the boxes (in place)"""
+    widths = detections['xyxy'][:, 2] - detections['xyxy'][:, 0]
+    heights = detections['xyxy'][:, 3] - detections['xyxy'][:, 1]
+    
+    detections['area'] = widths * heights
+    detections['aspect'] = np.divide(heights, widths, out=np.zeros_like(heights), where=widths > 0)
+
+
+def xywh(detections: np.ndarray) -> np.ndarray:
+    """(N, 4) x, y, w, h boxes of a detection array"""
+    boxes = detections['xyxy'].copy()
+    boxes[:, 2:] -= boxes[:, :2]
+    return boxes
+
+
+def nms(detections: np.ndarray, iou_threshold: float, score_threshold: float = 0.0) -> np.ndarray:
+    """Non-maximum suppression; returns the kept detections"""
+    if len(detections) <= 1:
+        return detections
+    
+    # float64 boxes map directly to cv::Rect2d without a per-box conversion
+    indices = cv2.dnn.NMSBoxes(xywh(detections).astype(np.float64), detections['conf'], score_threshold, iou_threshold)
+    return detections[np.asarray(indices, dtype=np.int64).reshape(-1)]
+
+
+def unletterbox(detections: np.ndarray, scale: float, pad: Tuple[int, int],
+                frame_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+    """Map boxes from letterboxed model input to original frame coordinates"""
+    detections = detections.copy()
+    pad_x, pad_y = pad
+    
+    boxes = detections['xyxy']
+    boxes -= np.array([pad_x, pad_y, pad_x, pad_y], dtype=np.float32)
+    boxes /= scale
+    
+    if frame_size is not None:
+        width, height = frame_size
+        np.clip(boxes, 0, [width, height, width, height], out=boxes)
+    else:
+        np.maximum(boxes, 0, out=boxes)
+    
+    _update_geometry(detections)
+    return detections
+
+
+def to_tuples(detections: np.ndarray) -> List[Tuple[float, float, float, float, float]]:
+    """(x, y, w, h, conf) tuples (serialization boundary)"""
+    values = np.column_stack([xywh(detections), detections['conf']]).tolist()
+    return [tuple(row) for row in values]
+
+
+def to_locations(detections: np.ndarray) -> List[Dict]:
+    """people_locations entries for the status message (serialization boundary)"""
+    boxes = xywh(detections).astype(np.int64)
+    centers = (detections['xyxy'][:, :2] + detections['xyxy'][:, 2:]) / 2
+    
+    locations = [
+        {'bbox': bbox, 'confidence': conf, 'center': center}
+        for bbox, conf, center in zip(
+            boxes.tolist(), detections['conf'].astype(float).tolist(), centers.astype(np.int64).tolist()
+        )
+    ]
+    
+    # Persistent id and velocity when tracking is enabled
+    if len(detections) and (detections['track_id'] >= 0).all():
+        for location, track_id, velocity in zip(
+            locations, detections['track_id'].tolist(), np.round(detections['velocity'].astype(float), 1).tolist()
+        ):
+            location['track_id'] = track_id
+            location['velocity'] = velocity
+    
+    return locations
\ No newline at end of file
@@ -9,35 +9,60 @@ import asyncio
 import time
 from typing import Dict, List, Optional, Tuple
 import json
+import sys
 
-try:
-    import tensorflow as tf
-    from tensorflow import keras
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
+from models.backends import KerasBackend, create_backend, engine_available, resolve_engine
+from utils.inference_executor import InferenceBusyError
+from utils.latency_histogram import LatencyHistogram
+from utils.result_cache import PerceptualHashCache
+from utils.roi import load_roi
+
+# Checked without importing TensorFlow; Keras is imported where a model is built
+TF_AVAILABLE = engine_available('keras')
+if not TF_AVAILABLE:
     print("Warning: TensorFlow not available, using mock implementation")
 
+# Output classes of the emergency models and heads, in output order
+EMERGENCY_CLASSES = [
+    'normal',
+    'fire',
+    'smoke',
+    'accident',
+    'medical_emergency',
+    'structural_damage',
+    'flood',
+    'explosion'
+]
+
 class EmergencyDetector:
-    def __init__(self, model_path: str = "models/emergency_cnn.h5"):
-        self.model_path = model_path
+    def __init__(self, model_path: str = "models/emergency_cnn.h5", executor=None,
+                 backend_config: Optional[Dict] = None, roi: Optional[List] = None,
+                 warmup_runs: int = 1, shared_backbone=None, cache_config: Optional[Dict] = None,
+                 latency_config: Optional[Dict] = None):
+        # Inference engine selection (models.backends.emergency_detector)
+        self.backend_config = backend_config or {}
+        self.model_path = self.backend_config.get('path', model_path)
         self.model = None
+        self.backend = None
+        
+        # Optional InferenceExecutor that runs predict() off the event loop
+        self.executor = executor
+        self.warmup_runs = max(0, warmup_runs)
+        
+        # Optional SharedBackbone: the emergency head runs on the backbone
+        # features of the frame, computed once for this detector and behavior
+        self.shared_backbone = shared_backbone
+        self.use_shared_backbone = False
+        
+        # Model scores of near-duplicate inputs (models.result_cache); colour analysis runs every frame
+        self.result_cache = PerceptualHashCache.from_config(cache_config)
         
         # Input parameters
         self.input_size = (224, 224)
         self.input_shape = (224, 224, 3)
         
         # Emergency classes
-        self.emergency_classes = [
-            'normal',
-            'fire',
-            'smoke',
-            'accident',
-            'medical_emergency',
-            'structural_damage',
-            'flood',
-            'explosion'
-        ]
+        self.emergency_classes = list(EMERGENCY_CLASSES)
         
         # Detection thresholds
         self.detection_thresholds = {
@@ -54,8 +79,22 @@ class EmergencyDetector:
         self.use_color_analysis = True
         self.use_motion_analysis = True
         
+        # Color analysis: HSV ranges, working resolution and localization grid
+        self.fire_color_ranges = [
+            (np.array([0, 50, 50]), np.array([10, 255, 255])),   # Red
+            (np.array([15, 50, 50]), np.array([35, 255, 255]))   # Orange-yellow
+        ]
+        self.smoke_color_range = (np.array([0, 0, 50]), np.array([180, 30, 200]))  # Gray to white-ish
+        self.color_analysis_width = 320
+        self.color_grid = (4, 4)  # Rows, columns
+        self.tile_alert_ratios = {'fire': 0.1, 'smoke': 0.2}
+        
+        # Grid ROI polygons (grid.roi); frames arrive cropped to their bounding box
+        self.roi = load_roi(roi)
+        self.last_color_analysis = None
+        
         # Performance tracking
-        self.processing_times = []
+        self.latency = LatencyHistogram.from_config(latency_config)
         self.detection_history = []
         
         # Alert cooldown to prevent spam
@@ -63,34 +102,55 @@ class EmergencyDetector:
         self.alert_cooldown_seconds = 30
         
     async def load_model(self):
-        """Load the emergency detection model"""
+        """Load the emergency detection model (file loading runs on a worker thread)"""
         try:
-            if TF_AVAILABLE:
-                # Check if model file exists
-                import os
-                if os.path.exists(self.model_path):
-                    self.model = keras.models.load_model(self.model_path)
-                    print(f"Loaded emergency detection model from {self.model_path}")
-                else:
-                    # Create a simple CNN model
-                    self.model = self._create_emergency_model()
-                    print(f"Created mock emergency detection model (file not found: {self.model_path})")
-                
-                # Optimize for inference
-                if hasattr(self.model, 'compile'):
-                    self.model.compile(optimizer='adam', loss='categorical_crossentropy')
-                
-                # Warm up model
-                await self._warmup_model()
-                
-            else:
-                # Use mock model
-                self.model = MockEmergencyModel(self.emergency_classes)
-                print("Using mock emergency detection model (TensorFlow not available)")
+            if self.shared_backbone is not None and await self.shared_backbone.load_model():
+                self.model = self.shared_backbone
+                self.backend = None
+                self.use_shared_backbone = True
+                print("Emergency detection served by the shared backbone")
+                return
+            
+            await asyncio.to_thread(self._load_backend)
+            
+            # Warm up model
+            await self._warmup_model()
                 
         except Exception as e:
             print(f"Error loading emergency model: {e}")
             self.model = MockEmergencyModel(self.emergency_classes)
+            self.backend = None
+    
+    def _load_backend(self):
+        """Load the model on its inference engine (blocking)"""
+        engine = resolve_engine(self.backend_config.get('engine'), self.model_path)
+        
+        if engine != 'keras':
+            # Exported model on a CPU-optimized engine
+            self.backend = create_backend(engine, self.model_path, threads=self.backend_config.get('threads'))
+            self.model = self.backend
+            print(f"Loaded emergency detection model from {self.model_path} ({engine})")
+            
+        elif TF_AVAILABLE:
+            from tensorflow import keras
+            
+            # Check if model file exists; inference only, so no compile step
+            import os
+            if os.path.exists(self.model_path):
+                self.model = keras.models.load_model(self.model_path, compile=False)
+                print(f"Loaded emergency detection model from {self.model_path}")
+            else:
+                # Create a simple CNN model
+                self.model = self._create_emergency_model()
+                print(f"Created mock emergency detection model (file not found: {self.model_path})")
+            
+            if hasattr(self.model, 'predict'):
+                self.backend = KerasBackend(self.model, self.model_path)
+            
+        else:
+            # Use mock model
+            self.model = MockEmergencyModel(self.emergency_classes)
+            print("Using mock emergency detection model (TensorFlow not available)")
     
     def _create_emergency_model(self):
         """Create a CNN model for emergency detection"""
@@ -98,6 +158,8 @@ class EmergencyDetector:
             return MockEmergencyModel(self.emergency_classes)
         
         try:
+            from tensorflow import keras
+            
             # CNN architecture optimized for emergency detection
             model = keras.Sequential([
                 # First conv block
@@ -131,12 +193,6 @@ class EmergencyDetector:
                 keras.layers.Dense(len(self.emergency_classes), activation='softmax')
             ])
             
-            model.compile(
-                optimizer=keras.optimizers.Adam(learning_rate=0.001),
-                loss='categorical_crossentropy',
-                metrics=['accuracy']
-            )
-            
             return model
             
         except Exception as e:
@@ -146,56 +202,74 @@ class EmergencyDetector:
     async def _warmup_model(self):
         """Warm up the model with dummy data"""
         try:
-            if TF_AVAILABLE and hasattr(self.model, 'predict'):
+            if self.backend is not None:
                 dummy_frame = np.random.randint(0, 255, (1, *self.input_shape), dtype=np.uint8)
                 dummy_frame = dummy_frame.astype(np.float32) / 255.0
                 
-                # Run a few prediction passes
-                for _ in range(3):
-                    _ = self.model.predict(dummy_frame, verbose=0)
-                    await asyncio.sleep(0.1)
+                # Build the graph and fill engine caches before the first frame
+                for _ in range(self.warmup_runs):
+                    _ = await self._predict(dummy_frame)
                 
                 print("Emergency model warmup completed")
             
         except Exception as e:
             print(f"Emergency model warmup failed: {e}")
     
-    def preprocess_frame(self, frame: np.ndarray) -> np.ndarray:
+    async def _predict(self, inputs: np.ndarray):
+        """Run the inference backend through the inference executor when one is attached"""
+        if self.executor is not None:
+            return await self.executor.run('emergency_detector', self.backend.predict, inputs)
+        return self.backend.predict(inputs)
+    
+    async def _predict_shared(self, frame: np.ndarray, pyramid=None):
+        """Run the shared backbone's emergency head through the inference executor when one is attached"""
+        if self.executor is not None:
+            return await self.executor.run('emergency_detector', self.shared_backbone.classify_emergency, frame, pyramid)
+        return self.shared_backbone.classify_emergency(frame, pyramid)
+    
+    def preprocess_frame(self, frame: np.ndarray, pyramid=None) -> np.ndarray:
         """Preprocess frame for emergency detection"""
-        # Resize frame
-        resized = cv2.resize(frame, self.input_size, interpolation=cv2.INTER_LINEAR)
-        
-        # Normalize pixel values
-        normalized = resized.astype(np.float32) / 255.0
+        if pyramid is not None:
+            # Resized and normalized once per frame, shared with other models
+            normalized = pyramid.normalized(self.input_size)
+        else:
+            # Resize frame
+            resized = cv2.resize(frame, self.input_size, interpolation=cv2.INTER_LINEAR)
+            
+            # Normalize pixel values
+            normalized = resized.astype(np.float32) / 255.0
         
         # Add batch dimension
         preprocessed = np.expand_dims(normalized, axis=0)
         
         return preprocessed
     
-    async def detect_emergencies(self, frame: np.ndarray) -> Dict[str, float]:
-        """Detect emergency situations in the frame"""
+    def precompute(self, frame: np.ndarray, pyramid):
+        """Fill the pyramid levels used by detect_emergencies (blocking, run off the event loop)"""
+        if pyramid is None:
+            return
+        
+        self.preprocess_frame(frame, pyramid)
+        if self.use_color_analysis:
+            pyramid.hsv(self._color_analysis_size(frame))
+    
+    async def detect_emergencies(self, frame: np.ndarray, pyramid=None) -> Dict[str, float]:
+        """Detect emergency situations in the raw frame"""
         start_time = time.time()
         
         try:
-            # Preprocess frame
-            processed_frame = self.preprocess_frame(frame)
-            
-            if TF_AVAILABLE and hasattr(self.model, 'predict'):
-                # Run model inference
-                predictions = self.model.predict(processed_frame, verbose=0)
-                
-                # Convert predictions to emergency scores
-                emergency_scores = {}
-                for i, emergency in enumerate(self.emergency_classes):
-                    emergency_scores[emergency] = float(predictions[0][i])
-                
+            if self.result_cache is None:
+                emergency_scores = await self._model_scores(frame, pyramid)
             else:
-                # Use mock predictions
-                emergency_scores = await self.model.detect_emergencies(processed_frame)
+                # Near-duplicate inputs reuse the model scores of a recent frame
+                key = self.result_cache.key(self.preprocess_frame(frame, pyramid)[0])
+                emergency_scores = self.result_cache.lookup(key)
+                if emergency_scores is None:
+                    emergency_scores = await self._model_scores(frame, pyramid)
+                    self.result_cache.store(key, emergency_scores)
             
             # Apply additional analysis
-            enhanced_scores = await self._enhance_detection(frame, emergency_scores)
+            enhanced_scores = await self._enhance_detection(frame, emergency_scores, pyramid)
             
             # Record detection in history
             self.detection_history.append({
@@ -209,31 +283,63 @@ class EmergencyDetector:
             
             # Record performance
             processing_time = time.time() - start_time
-            self.processing_times.append(processing_time)
-            if len(self.processing_times) > 100:
-                self.processing_times.pop(0)
+            self.latency.record(processing_time)
             
             return enhanced_scores
             
+        except InferenceBusyError:
+            raise
         except Exception as e:
             print(f"Emergency detection failed: {e}")
             # Return default normal status
             return {emergency: (1.0 if emergency == 'normal' else 0.0) 
                    for emergency in self.emergency_classes}
     
-    async def _enhance_detection(self, frame: np.ndarray, base_scores: Dict[str, float]) -> Dict[str, float]:
+    async def _model_scores(self, frame: np.ndarray, pyramid=None) -> Dict[str, float]:
+        """Per-class scores of the emergency model (or shared-backbone head) for the frame"""
+        if self.use_shared_backbone:
+            # Emergency head on the frame's shared backbone features
+            predictions = await self._predict_shared(frame, pyramid)
+            
+            emergency_scores = {}
+            for i, emergency in enumerate(self.emergency_classes):
+                emergency_scores[emergency] = float(predictions[0][i])
+            
+        elif self.backend is not None:
+            # Preprocess frame and run model inference
+            predictions = await self._predict(self.preprocess_frame(frame, pyramid))
+            
+            # Convert predictions to emergency scores
+            emergency_scores = {}
+            for i, emergency in enumerate(self.emergency_classes):
+                emergency_scores[emergency] = float(predictions[0][i])
+            
+        else:
+            # Use mock predictions
+            emergency_scores = await self.model.detect_emergencies(self.preprocess_frame(frame, pyramid))
+        
+        return emergency_scores
+    
+    async def _enhance_detection(self, frame: np.ndarray, base_scores: Dict[str, float],
+                                 pyramid=None) -> Dict[str, float]:
         """Enhance detection with additional analysis"""
         enhanced_scores = base_scores.copy()
+        self.last_color_analysis = None
         
         try:
-            # Color-based fire/smoke detection
+            # Color-based fire/smoke detection on a downscaled frame
             if self.use_color_analysis:
-                fire_color_score = self._analyze_fire_colors(frame)
-                smoke_color_score = self._analyze_smoke_colors(frame)
+                size = self._color_analysis_size(frame)
+                if pyramid is not None:
+                    hsv = pyramid.hsv(size)
+                else:
+                    hsv = cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR), cv2.COLOR_BGR2HSV)
+                
+                self.last_color_analysis = self.analyze_colors(hsv)
                 
                 # Boost fire/smoke scores based on color analysis
-                enhanced_scores['fire'] = min(1.0, enhanced_scores['fire'] + fire_color_score * 0.3)
-                enhanced_scores['smoke'] = min(1.0, enhanced_scores['smoke'] + smoke_color_score * 0.3)
+                enhanced_scores['fire'] = min(1.0, enhanced_scores['fire'] + self.last_color_analysis['fire_score'] * 0.3)
+                enhanced_scores['smoke'] = min(1.0, enhanced_scores['smoke'] + self.last_color_analysis['smoke_score'] * 0.3)
             
             # Motion-based analysis (simplified)
             if self.use_motion_analysis and len(self.detection_history) > 0:
@@ -250,55 +356,90 @@ class EmergencyDetector:
         
         return enhanced_scores
     
-    def _analyze_fire_colors(self, frame: np.ndarray) -> float:
-        """Analyze frame for fire-like colors"""
-        try:
-            # Convert to HSV for better color analysis
-            hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-            
-            # Define fire color ranges (red, orange, yellow)
-            fire_lower1 = np.array([0, 50, 50])    # Red lower
-            fire_upper1 = np.array([10, 255, 255]) # Red upper
-            fire_lower2 = np.array([15, 50, 50])   # Orange-yellow lower  
-            fire_upper2 = np.array([35, 255, 255]) # Orange-yellow upper
-            
-            # Create masks
-            mask1 = cv2.inRange(hsv, fire_lower1, fire_upper1)
-            mask2 = cv2.inRange(hsv, fire_lower2, fire_upper2)
-            fire_mask = cv2.bitwise_or(mask1, mask2)
-            
-            # Calculate fire color percentage
-            fire_pixels = np.sum(fire_mask > 0)
-            total_pixels = frame.shape[0] * frame.shape[1]
-            fire_ratio = fire_pixels / total_pixels
-            
-            return min(1.0, fire_ratio * 10)  # Scale up sensitivity
-            
-        except Exception as e:
-            return 0.0
+    def _color_analysis_size(self, frame: np.ndarray) -> Tuple[int, int]:
+        """Reduced (width, height) used for color analysis, keeping aspect ratio"""
+        h, w = frame.shape[:2]
+        width = min(w, self.color_analysis_width)
+        return width, max(1, int(round(h * width / w)))
     
-    def _analyze_smoke_colors(self, frame: np.ndarray) -> float:
-        """Analyze frame for smoke-like colors"""
-        try:
-            # Convert to HSV
-            hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-            
-            # Define smoke color ranges (gray, white, light gray)
-            smoke_lower = np.array([0, 0, 50])     # Light gray
-            smoke_upper = np.array([180, 30, 200]) # White-ish
-            
-            # Create mask
-            smoke_mask = cv2.inRange(hsv, smoke_lower, smoke_upper)
-            
-            # Calculate smoke color percentage
-            smoke_pixels = np.sum(smoke_mask > 0)
-            total_pixels = frame.shape[0] * frame.shape[1]
-            smoke_ratio = smoke_pixels / total_pixels
-            
-            return min(1.0, smoke_ratio * 5)  # Scale sensitivity
-            
-        except Exception as e:
-            return 0.0
+    def analyze_colors(self, hsv: np.ndarray) -> Dict:
+        """
+        Fire and smoke color analysis on one (downscaled) HSV frame
+        
+        Both masks come from the same conversion. Per-tile ratios are read
+        from integral images of the masks, so the grid costs a few lookups
+        instead of a pass per tile. With a grid ROI, only pixels inside the
+        ROI polygons are counted.
+        """
+        # Fire colors (red, orange, yellow) and smoke colors (gray, white)
+        (fire_lower1, fire_upper1), (fire_lower2, fire_upper2) = self.fire_color_ranges
+        fire_mask = cv2.bitwise_or(
+            cv2.inRange(hsv, fire_lower1, fire_upper1),
+            cv2.inRange(hsv, fire_lower2, fire_upper2)
+        )
+        smoke_mask = cv2.inRange(hsv, *self.smoke_color_range)
+        
+        # Tile boundaries in pixels
+        h, w = hsv.shape[:2]
+        rows, cols = self.color_grid
+        ys = np.linspace(0, h, rows + 1).astype(np.int32)
+        xs = np.linspace(0, w, cols + 1).astype(np.int32)
+        
+        # Tile edges normalized to the camera frame
+        y_edges, x_edges = ys / h, xs / w
+        
+        if self.roi is not None:
+            roi_mask = self.roi.crop_mask((w, h))
+            fire_mask = cv2.bitwise_and(fire_mask, roi_mask)
+            smoke_mask = cv2.bitwise_and(smoke_mask, roi_mask)
+            
+            # Tile areas count ROI pixels only
+            integral = cv2.integral(roi_mask, sdepth=cv2.CV_32S)[np.ix_(ys, xs)]
+            tile_areas = (integral[1:, 1:] - integral[:-1, 1:] - integral[1:, :-1] + integral[:-1, :-1]) / 255
+            frame_area = max(integral[-1, -1] / 255, 1)
+            
+            x0, y0, x1, y1 = self.roi.bounds
+            y_edges, x_edges = y0 + y_edges * (y1 - y0), x0 + x_edges * (x1 - x0)
+        else:
+            tile_areas = np.outer(np.diff(ys), np.diff(xs))
+            frame_area = h * w
+        tile_areas = np.maximum(tile_areas, 1)
+        
+        analysis = {'grid': [rows, cols]}
+        
+        for name, mask, scale, tile_threshold in (
+                ('fire', fire_mask, 10, self.tile_alert_ratios['fire']),
+                ('smoke', smoke_mask, 5, self.tile_alert_ratios['smoke'])):
+            # Integral image sampled at tile corners gives per-tile pixel counts
+            integral = cv2.integral(mask, sdepth=cv2.CV_32S)[np.ix_(ys, xs)]
+            tile_counts = integral[1:, 1:] - integral[:-1, 1:] - integral[1:, :-1] + integral[:-1, :-1]
+            tile_ratios = tile_counts / (255.0 * tile_areas)
+            ratio = integral[-1, -1] / (255.0 * frame_area)
+            
+            analysis[f'{name}_ratio'] = round(float(ratio), 4)
+            analysis[f'{name}_score'] = min(1.0, float(ratio) * scale)  # Scale up sensitivity
+            analysis[f'{name}_tiles'] = np.round(tile_ratios, 3).tolist()
+            analysis[f'{name}_regions'] = self._localize_tiles(tile_ratios, y_edges, x_edges, tile_threshold)
+        
+        return analysis
+    
+    def _localize_tiles(self, tile_ratios: np.ndarray, y_edges: np.ndarray, x_edges: np.ndarray,
+                        threshold: float) -> List[Dict]:
+        """Grid tiles whose color ratio exceeds threshold, strongest first"""
+        regions = []
+        
+        for row, col in zip(*np.nonzero(tile_ratios >= threshold)):
+            regions.append({
+                'row': int(row),
+                'col': int(col),
+                'ratio': round(float(tile_ratios[row, col]), 3),
+                # Normalized [x1, y1, x2, y2] in frame coordinates
+                'bbox': [round(float(x_edges[col]), 3), round(float(y_edges[row]), 3),
+                         round(float(x_edges[col + 1]), 3), round(float(y_edges[row + 1]), 3)]
+            })
+        
+        regions.sort(key=lambda region: region['ratio'], reverse=True)
+        return regions
     
     def _analyze_motion_patterns(self) -> float:
         """Analyze motion patterns for emergency indicators"""
@@ -405,9 +546,9 @@ class EmergencyDetector:
     
     def get_detection_statistics(self) -> Dict:
         """Get emergency detection statistics"""
-        if not self.processing_times:
+        if not self.latency.count:
             return {
-                'avg_processing_time': 0,
+                'latency': self.latency.summary(),
                 'model_loaded': self.model is not None,
                 'detection_classes': len(self.emergency_classes)
             }
@@ -423,12 +564,11 @@ class EmergencyDetector:
                 emergency_rates[emergency] = high_conf_detections / max(1, len(recent_detections))
         
         return {
-            'avg_processing_time': np.mean(self.processing_times),
-            'max_processing_time': np.max(self.processing_times),
-            'min_processing_time': np.min(self.processing_times),
+            'latency': self.latency.summary(),
             'model_loaded': self.model is not None,
             'detection_classes': len(self.emergency_classes),
-            'samples_processed': len(self.processing_times),
+            'samples_processed': self.latency.count,
+            'backend': self.backend.describe() if self.backend else {'engine': 'mock'},
             'emergency_detection_rates': emergency_rates,
             'detection_history_length': len(self.detection_history)
         }
@@ -436,14 +576,15 @@ class EmergencyDetector:
     async def cleanup(self):
         """Clean up model resources"""
         try:
-            if self.model and TF_AVAILABLE:
+            if self.model and 'tensorflow' in sys.modules:
                 # Clear model from memory
                 del self.model
                 
-                # Clear TensorFlow session if available
-                if hasattr(tf.keras, 'clear_session'):
-                    tf.keras.backend.clear_session()
+                # Clear the TensorFlow session (only once TensorFlow was imported)
+                from tensorflow import keras
+                keras.backend.clear_session()
             
+            self.backend = None
             print("Emergency detector cleanup completed")
             
         except Exception as e:
@@ -7,77 +7,163 @@ import cv2
 import numpy as np
 import asyncio
 import time
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 from pathlib import Path
-import torch
 
-try:
-    from ultralytics import YOLO
-    YOLO_AVAILABLE = True
-except ImportError:
-    YOLO_AVAILABLE = False
+from models.backends import UltralyticsBackend, create_backend, engine_available, resolve_engine
+from models.density_counter import DensityMapCounter
+from models.detections import empty, from_tuples, make_detections, nms, unletterbox
+from models.person_tracker import PersonTracker
+from utils.inference_executor import InferenceBusyError
+from utils.result_cache import PerceptualHashCache
+
+# ultralytics (and torch with it) is imported only when the ultralytics engine loads
+YOLO_AVAILABLE = engine_available('ultralytics')
+if not YOLO_AVAILABLE:
     print("Warning: ultralytics not available, using mock implementation")
 
 class PeopleCounter:
-    def __init__(self, model_path: str = "models/yolov8n.pt", confidence_threshold: float = 0.5):
-        self.model_path = model_path
+    def __init__(self, model_path: str = "models/yolov8n.pt", confidence_threshold: float = 0.5,
+                 executor=None, backend_config: Optional[Dict] = None,
+                 tracking_config: Optional[Dict] = None, tiling_config: Optional[Dict] = None,
+                 density_config: Optional[Dict] = None, warmup_runs: int = 1,
+                 cache_config: Optional[Dict] = None):
+        # Inference engine selection (models.backends.people_counter)
+        self.backend_config = backend_config or {}
+        self.model_path = self.backend_config.get('path', model_path)
         self.confidence_threshold = confidence_threshold
         self.model = None
-        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.backend = None
+        
+        # Optional InferenceExecutor that runs predict() off the event loop
+        self.executor = executor
+        self.device = 'cpu'  # Set when the ultralytics engine loads
         self.input_size = (640, 640)
         
         # Performance optimization
+        self.warmup_runs = max(0, warmup_runs)
         self.warmup_completed = False
         
+        # Detections of near-duplicate letterboxed inputs (models.result_cache)
+        self.result_cache = PerceptualHashCache.from_config(cache_config)
+        
         # Crowd-specific parameters
         self.crowd_classes = [0]  # Person class in COCO dataset
         self.nms_threshold = 0.4
         
+        # Person box limits in model input pixels
+        self.min_box_size = (20, 40)  # Width, height
+        self.min_box_area = 800
+        self.aspect_range = (0.3, 4.0)  # Height / width
+        
         # Tracking for crowd density estimation
         self.detection_history = []
         self.max_history_length = 10
         
+        # Person tracking between detector runs (models.tracking)
+        tracking_config = tracking_config or {}
+        self.tracker = None
+        if tracking_config.get('enabled', False):
+            self.tracker = PersonTracker(
+                iou_threshold=tracking_config.get('iou_threshold', 0.3),
+                max_age=tracking_config.get('max_age', 2),
+                min_hits=tracking_config.get('min_hits', 1),
+                confidence_decay=tracking_config.get('confidence_decay', 0.9)
+            )
+        self.detection_interval = max(1, tracking_config.get('detection_interval', 1))
+        self.min_track_confidence = tracking_config.get('min_track_confidence', 0.4)
+        self.frames_since_detection = None
+        
+        # Full-resolution tiles over dense regions (models.tiling)
+        tiling_config = tiling_config or {}
+        self.tiling_enabled = tiling_config.get('enabled', False)
+        self.tile_size = tiling_config.get('tile_size', 640)
+        self.tile_overlap = tiling_config.get('overlap', 0.2)
+        self.max_tiles = tiling_config.get('max_tiles', 4)
+        self.min_tile_people = tiling_config.get('min_tile_people', 8)
+        self.tile_edge_margin = 4  # Pixels; boxes this close to a cut belong to the neighbour tile
+        
+        # Density-map counting above switch_count people (models.density_counting)
+        density_config = density_config or {}
+        self.density_counter = None
+        if density_config.get('enabled', False):
+            self.density_counter = DensityMapCounter(
+                model_path=density_config.get('model', 'models/csrnet_lite.onnx'),
+                executor=executor,
+                backend_config=density_config.get('backend'),
+                input_size=density_config.get('input_size', (640, 360)),
+                grid_size=density_config.get('grid', (6, 8))
+            )
+        self.density_switch_count = density_config.get('switch_count', 200)
+        self.density_release_count = density_config.get('release_count', int(self.density_switch_count * 0.8))
+        self.counting_mode = 'detection'
+        self.mode_switches = 0
+        
+        # Detector load statistics
+        self.detector_runs = 0
+        self.tracked_frames = 0
+        self.tiled_runs = 0
+        self.tiles_processed = 0
+        self.region_runs = 0
+        
     async def load_model(self):
-        """Load and initialize the YOLO model"""
+        """Load and initialize the YOLO model (file loading runs on a worker thread)"""
         try:
-            if YOLO_AVAILABLE:
-                # Check if model file exists
-                if not Path(self.model_path).exists():
-                    print(f"Model file not found at {self.model_path}, downloading YOLOv8n...")
-                    self.model_path = "yolov8n.pt"  # This will auto-download
-                
-                # Load YOLO model
-                self.model = YOLO(self.model_path)
-                
-                # Move to appropriate device
-                if self.device == 'cuda':
-                    self.model.to('cuda')
-                
-                print(f"YOLOv8 model loaded on {self.device}")
-                
-                # Warm up the model
-                await self.warmup_model()
-                
-            else:
-                # Mock model for development/testing
-                self.model = MockYOLOModel()
-                print("Using mock YOLO model (ultralytics not available)")
+            await asyncio.to_thread(self._load_backend)
+            
+            # Warm up the model
+            await self.warmup_model()
                 
         except Exception as e:
             print(f"Error loading model: {e}")
             # Fall back to mock model
             self.model = MockYOLOModel()
+            self.backend = None
+        
+        if self.density_counter is not None:
+            await self.density_counter.load_model()
+    
+    def _load_backend(self):
+        """Load the detector on its inference engine (blocking)"""
+        engine = resolve_engine(self.backend_config.get('engine'), self.model_path)
+        
+        if engine != 'ultralytics':
+            # Exported YOLO model on a CPU-optimized engine (raw output decoded here)
+            self.backend = create_backend(engine, self.model_path, threads=self.backend_config.get('threads'))
+            self.model = self.backend
+            print(f"YOLOv8 model loaded from {self.model_path} ({engine})")
+            
+        elif YOLO_AVAILABLE:
+            import torch
+            self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+            
+            # Check if model file exists
+            if not Path(self.model_path).exists():
+                print(f"Model file not found at {self.model_path}, downloading YOLOv8n...")
+                self.model_path = "yolov8n.pt"  # This will auto-download
+            
+            # Load YOLO model, moved to the appropriate device
+            self.backend = UltralyticsBackend(self.model_path, device=self.device)
+            self.model = self.backend.model
+            
+            print(f"YOLOv8 model loaded on {self.device}")
+            
+        else:
+            # Mock model for development/testing
+            self.model = MockYOLOModel()
+            print("Using mock YOLO model (ultralytics not available)")
     
     async def warmup_model(self):
         """Warm up the model with dummy data"""
         try:
             dummy_frame = np.random.randint(0, 255, (640, 640, 3), dtype=np.uint8)
             
-            # Run a few inference passes
-            for _ in range(3):
-                if YOLO_AVAILABLE and hasattr(self.model, 'predict'):
-                    _ = self.model.predict(dummy_frame, verbose=False)
-                await asyncio.sleep(0.1)
+            # Build the graph and fill engine caches before the first frame
+            for _ in range(self.warmup_runs):
+                if self.backend is not None and self.backend.engine == 'ultralytics':
+                    _ = await self._predict(dummy_frame, verbose=False)
+                elif self.backend is not None:
+                    _ = await self._predict(self.make_input_blob(dummy_frame))
             
             self.warmup_completed = True
             print("Model warmup completed")
@@ -86,8 +172,26 @@ class PeopleCounter:
             print(f"Model warmup failed: {e}")
             self.warmup_completed = True  # Continue anyway
     
-    def preprocess_frame(self, frame: np.ndarray) -> np.ndarray:
+    async def _run(self, function, *args, **kwargs):
+        """Run blocking work through the inference executor when one is attached"""
+        if self.executor is not None:
+            return await self.executor.run('people_counter', function, *args, **kwargs)
+        return function(*args, **kwargs)
+    
+    async def _predict(self, inputs: np.ndarray, **kwargs):
+        """Run the inference backend off the event loop"""
+        return await self._run(self.backend.predict, inputs, **kwargs)
+    
+    def preprocess_frame(self, frame: np.ndarray, pyramid=None) -> np.ndarray:
         """Preprocess frame for YOLO inference"""
+        return self.letterbox_frame(frame, pyramid)[0]
+    
+    def letterbox_frame(self, frame: np.ndarray, pyramid=None) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+        """Letterbox frame to the model input; returns (padded, scale, (pad_x, pad_y))"""
+        # Reuse the letterbox from the shared per-frame pyramid
+        if pyramid is not None:
+            return pyramid.letterbox(self.input_size[::-1])
+        
         # Resize frame to model input size while maintaining aspect ratio
         h, w = frame.shape[:2]
         target_h, target_w = self.input_size
@@ -109,129 +213,407 @@ class PeopleCounter:
         # Place resized image in center
         padded[pad_y:pad_y+new_h, pad_x:pad_x+new_w] = resized
         
-        return padded
+        return padded, scale, (pad_x, pad_y)
     
-    async def detect_people(self, frame: np.ndarray) -> List[Tuple[float, float, float, float, float]]:
-        """Detect people in the frame and return bounding boxes"""
+    def make_input_blob(self, frame: np.ndarray) -> np.ndarray:
+        """Letterboxed BGR frame to the NCHW float RGB input of exported YOLO models"""
+        return cv2.dnn.blobFromImage(frame, scalefactor=1.0 / 255.0, swapRB=True)
+    
+    async def detect_people(self, frame: np.ndarray, letterbox: Optional[Tuple[float, Tuple[int, int]]] = None,
+                            frame_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        Detect people in the (letterboxed) frame
+        
+        Returns a structured detection array (models.detections). With the
+        letterbox (scale, pad) of the frame, boxes are mapped back to the
+        original frame of frame_size=(width, height). With the result cache,
+        a near-duplicate of a recent input reuses its detections.
+        """
         try:
-            if YOLO_AVAILABLE and hasattr(self.model, 'predict'):
-                # Run YOLO inference
-                results = self.model.predict(
-                    frame, 
-                    conf=self.confidence_threshold,
-                    iou=self.nms_threshold,
-                    classes=self.crowd_classes,
-                    verbose=False
-                )
-                
-                detections = []
-                
-                if results and len(results) > 0:
-                    result = results[0]
-                    
-                    if hasattr(result, 'boxes') and result.boxes is not None:
-                        boxes = result.boxes
-                        
-                        # Convert to numpy if tensor
-                        if hasattr(boxes.xyxy, 'cpu'):
-                            xyxy = boxes.xyxy.cpu().numpy()
-                            conf = boxes.conf.cpu().numpy()
-                        else:
-                            xyxy = boxes.xyxy
-                            conf = boxes.conf
-                        
-                        # Process each detection
-                        for i, box in enumerate(xyxy):
-                            x1, y1, x2, y2 = box
-                            confidence = conf[i]
-                            
-                            # Convert to x, y, w, h format
-                            x, y = x1, y1
-                            w, h = x2 - x1, y2 - y1
-                            
-                            # Filter small detections (likely false positives)
-                            if w > 20 and h > 40:  # Minimum person size
-                                detections.append((x, y, w, h, confidence))
-                
-                # Apply crowd-specific post-processing
-                filtered_detections = self.filter_crowd_detections(detections)
-                
-                # Update detection history for tracking
-                self.update_detection_history(filtered_detections)
-                
-                return filtered_detections
-                
-            else:
-                # Use mock detection
-                return await self.model.detect_people(frame)
+            detections = await self._detect_input_cached(frame)
+            detections = self._to_frame(detections, letterbox, frame_size)
+            return self._finish_detection(detections)
                 
+        except InferenceBusyError:
+            raise
         except Exception as e:
             print(f"Detection error: {e}")
-            return []
+            return empty()
     
-    def filter_crowd_detections(self, detections: List[Tuple]) -> List[Tuple]:
-        """Apply crowd-specific filtering to detections"""
-        if not detections:
-            return detections
+    async def _detect_input_cached(self, frame: np.ndarray) -> np.ndarray:
+        """_detect_input through the perceptual-hash result cache when enabled"""
+        if self.result_cache is None:
+            return await self._detect_input(frame)
+        
+        key = self.result_cache.key(frame)
+        detections = self.result_cache.lookup(key)
+        if detections is None:
+            detections = await self._detect_input(frame)
+            self.result_cache.store(key, detections)
+        
+        return detections.copy()
+    
+    async def _detect_input(self, frame: np.ndarray) -> np.ndarray:
+        """Crowd-filtered detections on one letterboxed model input, in input pixels"""
+        if self.backend is None:
+            # Use mock detection
+            return from_tuples(await self.model.detect_people(frame))
+        
+        if self.backend.engine == 'ultralytics':
+            detections = await self._detect_ultralytics(frame)
+        else:
+            # Raw network output from an exported model
+            output = await self._predict(self.make_input_blob(frame))
+            detections = self.decode_yolo_output(output)
         
-        filtered = []
+        # Apply crowd-specific post-processing
+        return self.filter_crowd_detections(detections)
+    
+    async def detect_people_in_region(self, frame: np.ndarray, region: Tuple[int, int, int, int]) -> np.ndarray:
+        """
+        Re-detect people only inside a changed region of the frame
+        
+        The region (x, y, w, h in frame pixels) is letterboxed on its own,
+        so it is also seen at a higher resolution than in the full frame.
+        Previous detections centred outside the region are carried over.
+        Returns detections in frame coordinates.
+        """
+        try:
+            x, y, w, h = region
+            processed, scale, pad = self.letterbox_frame(frame[y:y + h, x:x + w])
+            fresh = unletterbox(await self._detect_input(processed), scale, pad, (w, h))
+            fresh['xyxy'] += np.array([x, y, x, y], dtype=np.float32)
+            
+            previous = self.detection_history[-1]['detections'] if self.detection_history else empty()
+            centers = (previous['xyxy'][:, :2] + previous['xyxy'][:, 2:]) / 2
+            outside = (
+                (centers[:, 0] < x) | (centers[:, 0] >= x + w) |
+                (centers[:, 1] < y) | (centers[:, 1] >= y + h)
+            )
+            
+            detections = np.concatenate([previous[outside], fresh])
+            
+            self.region_runs += 1
+            return self._finish_detection(detections)
+            
+        except InferenceBusyError:
+            raise
+        except Exception as e:
+            print(f"Region detection error: {e}")
+            return empty()
+    
+    def _finish_detection(self, detections: np.ndarray) -> np.ndarray:
+        """Hand fresh frame-coordinate detections to the tracker and history"""
+        self.detector_runs += 1
+        if self.tracker is not None:
+            # Tracks take over the detections (smoothed boxes, persistent ids)
+            detections = self.tracker.update(detections)
+            self.frames_since_detection = 0
+        
+        # Update detection history for tracking
+        self.update_detection_history(detections)
+        self.update_counting_mode(len(detections))
+        
+        return detections
+    
+    def density_mode(self) -> bool:
+        """Whether frames are currently counted with the density map"""
+        return self.counting_mode == 'density'
+    
+    async def count_density(self, frame: np.ndarray, pyramid=None) -> Dict:
+        """Count a dense crowd from the density map; returns the count and density grid"""
+        result = await self.density_counter.estimate(frame, pyramid)
+        
+        # No boxes in density mode, so no tiles are planned from this entry
+        self.update_detection_history(empty(), result['count'])
+        self.update_counting_mode(result['count'])
+        return result
+    
+    def update_counting_mode(self, count: int):
+        """Switch between box detection and density counting with hysteresis"""
+        if self.density_counter is None:
+            return
+        
+        if self.counting_mode == 'detection' and count >= self.density_switch_count:
+            self.counting_mode = 'density'
+            self.mode_switches += 1
+            print(f"{count} people detected, switching to density-map counting")
+        
+        elif self.counting_mode == 'density' and count < self.density_release_count:
+            self.counting_mode = 'detection'
+            self.mode_switches += 1
+            print(f"Density count {count}, switching back to detection")
+            
+            # Tracks were not updated while counting by density
+            self.frames_since_detection = None
+            if self.tracker is not None:
+                self.tracker.reset()
+    
+    async def detect_people_tiled(self, frame: np.ndarray, pyramid=None) -> np.ndarray:
+        """
+        Detect people on the letterboxed frame plus full-resolution tiles
+        
+        Tiles are cut only over regions that were dense in the previous
+        detections (plan_tiles), so people too small for the letterbox are
+        still found there while the extra cost stays bounded by max_tiles.
+        The letterbox and all tiles go through the model as one batch and
+        the results are merged with cross-tile NMS. Returns detections in
+        frame coordinates.
+        """
+        if self.backend is None:
+            processed, scale, pad = self.letterbox_frame(frame, pyramid)
+            return await self.detect_people(processed, (scale, pad), (frame.shape[1], frame.shape[0]))
         
-        for detection in detections:
-            x, y, w, h, conf = detection
+        try:
+            height, width = frame.shape[:2]
+            origins = self.plan_tiles((width, height))
+            
+            processed, scale, pad = self.letterbox_frame(frame, pyramid)
+            images = [processed] + [self._cut_tile(frame, x, y) for x, y in origins]
+            
+            results = await self._detect_batch(images)
+            
+            # Letterbox pass covers the whole frame
+            merged = [unletterbox(self._crowd_filter(results[0]), scale, pad, (width, height))]
+            for (x, y), detections in zip(origins, results[1:]):
+                merged.append(self._tile_to_frame(self._crowd_filter(detections), x, y, (width, height)))
             
-            # Size-based filtering for crowd scenarios
-            area = w * h
-            aspect_ratio = h / w if w > 0 else 0
+            # Cross-tile NMS removes people seen by the letterbox and a tile, or by two overlapping tiles
+            detections = self.apply_crowd_nms(np.concatenate(merged))
             
-            # Typical person aspect ratio and minimum size
-            if (0.3 <= aspect_ratio <= 4.0 and  # Person-like aspect ratio
-                area >= 800 and                  # Minimum area
-                conf >= self.confidence_threshold):
-                filtered.append(detection)
+            self.tiled_runs += 1 if len(origins) else 0
+            self.tiles_processed += len(origins)
+            
+            return self._finish_detection(detections)
+            
+        except InferenceBusyError:
+            raise
+        except Exception as e:
+            print(f"Tiled detection error: {e}")
+            return empty()
+    
+    def plan_tiles(self, frame_size: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Origins of the full-resolution tiles over the densest previous regions"""
+        width, height = frame_size
+        size = self.tile_size
         
-        # Apply Non-Maximum Suppression for overlapping detections
-        filtered = self.apply_crowd_nms(filtered)
+        # Nothing to gain when the whole frame fits in one tile
+        if not self.detection_history or (width <= size and height <= size):
+            return []
         
-        return filtered
+        previous = self.detection_history[-1]['detections']
+        if len(previous) < self.min_tile_people:
+            return []
+        
+        # Overlapping tile grid; the last row/column is flush with the frame edge.
+        # On a side shorter than a tile (e.g. a wide ROI strip) one tile spans it
+        stride = max(1, int(size * (1 - self.tile_overlap)))
+        x_span, y_span = max(0, width - size), max(0, height - size)
+        xs = np.unique(np.append(np.arange(0, x_span, stride), x_span))
+        ys = np.unique(np.append(np.arange(0, y_span, stride), y_span))
+        grid = np.array(np.meshgrid(xs, ys)).reshape(2, -1).T  # (T, 2) x, y
+        
+        # People per tile from the previous detection centres
+        centers = (previous['xyxy'][:, :2] + previous['xyxy'][:, 2:]) / 2
+        inside = (
+            (centers[np.newaxis, :, 0] >= grid[:, 0:1]) & (centers[np.newaxis, :, 0] < grid[:, 0:1] + size) &
+            (centers[np.newaxis, :, 1] >= grid[:, 1:2]) & (centers[np.newaxis, :, 1] < grid[:, 1:2] + size)
+        )
+        counts = inside.sum(axis=1)
+        
+        order = np.argsort(-counts, kind='stable')
+        selected = order[counts[order] >= self.min_tile_people][:self.max_tiles]
+        
+        return [(int(x), int(y)) for x, y in grid[selected]]
     
-    def apply_crowd_nms(self, detections: List[Tuple], overlap_threshold: float = 0.3) -> List[Tuple]:
-        """Apply Non-Maximum Suppression optimized for crowd scenarios"""
-        if len(detections) <= 1:
+    def _cut_tile(self, frame: np.ndarray, x: int, y: int) -> np.ndarray:
+        """Full-resolution tile at (x, y), padded right/bottom to tile_size where the frame is shorter"""
+        tile = frame[y:y + self.tile_size, x:x + self.tile_size]
+        h, w = tile.shape[:2]
+        if h == self.tile_size and w == self.tile_size:
+            return tile
+        
+        # Same padding as the letterbox, so the batch keeps one input size
+        padded = np.full((self.tile_size, self.tile_size, 3), 114, dtype=np.uint8)
+        padded[:h, :w] = tile
+        return padded
+    
+    async def _detect_batch(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        """Run the model once on a batch of images; detections per image in its own pixels"""
+        if self.backend.engine == 'ultralytics':
+            results = await self._predict(
+                images,
+                conf=self.confidence_threshold,
+                iou=self.nms_threshold,
+                classes=self.crowd_classes,
+                verbose=False
+            )
+            return [self._ultralytics_detections(result) for result in results]
+        
+        output = await self._run(self._predict_blob_batch, images)
+        return [self.decode_yolo_output(output[i:i + 1]) for i in range(len(images))]
+    
+    def _predict_blob_batch(self, images: List[np.ndarray]) -> np.ndarray:
+        """Stack images into one NCHW blob and run it (per image on fixed-batch models)"""
+        blob = cv2.dnn.blobFromImages(images, scalefactor=1.0 / 255.0, swapRB=True)
+        
+        if self.backend.fixed_batch == 1 and len(blob) > 1:
+            return np.concatenate([self.backend.predict(blob[i:i + 1]) for i in range(len(blob))])
+        return self.backend.predict(blob)
+    
+    def _tile_to_frame(self, detections: np.ndarray, x: int, y: int, frame_size: Tuple[int, int]) -> np.ndarray:
+        """Shift tile detections to frame coordinates, dropping boxes cut by an inner tile edge"""
+        width, height = frame_size
+        boxes = detections['xyxy']
+        margin = self.tile_edge_margin
+        
+        # A box touching a cut is a partial person; the letterbox or a neighbour tile sees all of it
+        cut = np.zeros(len(detections), dtype=bool)
+        if x > 0:
+            cut |= boxes[:, 0] <= margin
+        if y > 0:
+            cut |= boxes[:, 1] <= margin
+        if x + self.tile_size < width:
+            cut |= boxes[:, 2] >= self.tile_size - margin
+        if y + self.tile_size < height:
+            cut |= boxes[:, 3] >= self.tile_size - margin
+        
+        detections = detections[~cut]
+        detections['xyxy'] += np.array([x, y, x, y], dtype=np.float32)
+        return detections
+    
+    def _to_frame(self, detections: np.ndarray, letterbox: Optional[Tuple[float, Tuple[int, int]]],
+                  frame_size: Optional[Tuple[int, int]]) -> np.ndarray:
+        """Map detections from model input to original frame coordinates"""
+        if letterbox is None:
             return detections
         
-        # Convert to format suitable for NMS
-        boxes = []
-        scores = []
+        scale, pad = letterbox
+        return unletterbox(detections, scale, pad, frame_size)
+    
+    def detection_due(self) -> bool:
+        """Check whether this frame needs the detector or can use tracked boxes"""
+        if self.tracker is None or self.frames_since_detection is None:
+            return True
+        
+        if self.frames_since_detection + 1 >= self.detection_interval:
+            return True
         
-        for x, y, w, h, conf in detections:
-            boxes.append([x, y, x + w, y + h])
-            scores.append(conf)
+        # Re-detect early once the tracks are no longer trustworthy
+        confidence = self.tracker.mean_confidence()
+        return confidence is not None and confidence < self.min_track_confidence
+    
+    def propagate_tracks(self) -> np.ndarray:
+        """Tracked boxes for a frame where detection is skipped"""
+        detections = self.tracker.propagate()
         
-        boxes = np.array(boxes, dtype=np.float32)
-        scores = np.array(scores, dtype=np.float32)
+        self.frames_since_detection += 1
+        self.tracked_frames += 1
+        self.update_detection_history(detections)
+        self.update_counting_mode(len(detections))
         
-        # Apply OpenCV's NMS
-        indices = cv2.dnn.NMSBoxes(
-            boxes.tolist(),
-            scores.tolist(),
-            self.confidence_threshold,
-            overlap_threshold
+        return detections
+    
+    async def _detect_ultralytics(self, frame: np.ndarray) -> np.ndarray:
+        """Run YOLO inference through ultralytics and convert its Results"""
+        results = await self._predict(
+            frame, 
+            conf=self.confidence_threshold,
+            iou=self.nms_threshold,
+            classes=self.crowd_classes,
+            verbose=False
         )
         
-        # Filter detections based on NMS results
-        filtered_detections = []
-        if len(indices) > 0:
-            indices = indices.flatten()
-            for i in indices:
-                filtered_detections.append(detections[i])
+        if not results:
+            return empty()
+        
+        return self._ultralytics_detections(results[0])
+    
+    def _ultralytics_detections(self, result) -> np.ndarray:
+        """Convert one ultralytics Results object to a detection array"""
+        if result.boxes is None:
+            return empty()
+        
+        boxes = result.boxes
+        
+        # Convert to numpy if tensor
+        if hasattr(boxes.xyxy, 'cpu'):
+            xyxy = boxes.xyxy.cpu().numpy()
+            conf = boxes.conf.cpu().numpy()
+        else:
+            xyxy = np.asarray(boxes.xyxy)
+            conf = np.asarray(boxes.conf)
+        
+        return self._filter_min_size(make_detections(xyxy, conf))
+    
+    def _filter_min_size(self, detections: np.ndarray) -> np.ndarray:
+        """Drop detections below the minimum person size (likely false positives)"""
+        boxes = detections['xyxy']
+        min_w, min_h = self.min_box_size
+        return detections[((boxes[:, 2] - boxes[:, 0]) > min_w) & ((boxes[:, 3] - boxes[:, 1]) > min_h)]
+    
+    def decode_yolo_output(self, output: np.ndarray) -> np.ndarray:
+        """
+        Decode raw YOLOv8 output into person detections
+        
+        The output is (1, 4 + num_classes, num_anchors) with boxes as
+        center x, center y, width, height in input (letterbox) pixels.
+        Heads reduced to the crowd classes (tools/quantize_models.py) have
+        one score row per crowd class.
+        """
+        predictions = output[0]
+        if predictions.shape[0] > predictions.shape[1]:
+            predictions = predictions.T  # (4 + num_classes, num_anchors)
+        
+        # Only the crowd class rows are read; the full output is never transposed
+        num_classes = predictions.shape[0] - 4
+        if num_classes == len(self.crowd_classes):
+            rows = [4 + i for i in range(num_classes)]
+        else:
+            rows = [4 + c for c in self.crowd_classes if c < num_classes] or [4]
+        scores = predictions[rows].max(axis=0)
+        
+        keep = np.flatnonzero(scores >= self.confidence_threshold)
+        boxes = predictions[:4, keep].T
+        scores = scores[keep]
+        
+        # Center format to corners
+        xyxy = np.empty_like(boxes)
+        xyxy[:, :2] = boxes[:, :2] - boxes[:, 2:4] / 2
+        xyxy[:, 2:] = boxes[:, :2] + boxes[:, 2:4] / 2
+        
+        detections = nms(make_detections(xyxy, scores), self.nms_threshold, self.confidence_threshold)
+        return self._filter_min_size(detections)
+    
+    def filter_crowd_detections(self, detections: np.ndarray) -> np.ndarray:
+        """Apply crowd-specific filtering to detections"""
+        # Apply Non-Maximum Suppression for overlapping detections
+        return self.apply_crowd_nms(self._crowd_filter(detections))
+    
+    def _crowd_filter(self, detections: np.ndarray) -> np.ndarray:
+        """Keep person-shaped detections (sizes in the pixels of the model input)"""
+        if not len(detections):
+            return detections
         
-        return filtered_detections
+        # Person-like aspect ratio, minimum area and confidence
+        min_aspect, max_aspect = self.aspect_range
+        mask = (
+            (detections['aspect'] >= min_aspect) &
+            (detections['aspect'] <= max_aspect) &
+            (detections['area'] >= self.min_box_area) &
+            (detections['conf'] >= self.confidence_threshold)
+        )
+        return detections[mask]
+    
+    def apply_crowd_nms(self, detections: np.ndarray, overlap_threshold: float = 0.3) -> np.ndarray:
+        """Apply Non-Maximum Suppression optimized for crowd scenarios"""
+        return nms(detections, overlap_threshold, self.confidence_threshold)
     
-    def update_detection_history(self, detections: List[Tuple]):
+    def update_detection_history(self, detections: np.ndarray, count: Optional[int] = None):
         """Update detection history for temporal consistency"""
         self.detection_history.append({
             'timestamp': time.time(),
-            'count': len(detections),
+            'count': len(detections) if count is None else count,
             'detections': detections
         })
         
@@ -266,19 +648,38 @@ class PeopleCounter:
             'current_count': current_count,
             'average_count': round(average_count, 1),
             'trend': trend,
-            'history_length': len(counts)
+            'history_length': len(counts),
+            'backend': self.backend.describe() if self.backend else {'engine': 'mock'},
+            'tracking': {
+                'enabled': self.tracker is not None,
+                'active_tracks': len(self.tracker.active_tracks()) if self.tracker else 0,
+                'detector_runs': self.detector_runs,
+                'region_runs': self.region_runs,
+                'tracked_frames': self.tracked_frames
+            },
+            'counting_mode': self.counting_mode,
+            'density_counting': {
+                'enabled': self.density_counter is not None,
+                'mode_switches': self.mode_switches,
+                **(self.density_counter.get_statistics() if self.density_counter else {})
+            },
+            'tiling': {
+                'enabled': self.tiling_enabled,
+                'tiled_runs': self.tiled_runs,
+                'tiles_processed': self.tiles_processed
+            }
         }
     
-    def estimate_crowd_density(self, detections: List[Tuple], frame_shape: Tuple[int, int]) -> Dict:
+    def estimate_crowd_density(self, detections: np.ndarray, frame_shape: Tuple[int, int]) -> Dict:
         """Estimate crowd density from detections"""
-        if not detections:
+        if not len(detections):
             return {'density': 0, 'level': 'empty'}
         
         frame_area = frame_shape[0] * frame_shape[1]
         person_count = len(detections)
         
         # Calculate average person area
-        total_person_area = sum(w * h for x, y, w, h, conf in detections)
+        total_person_area = float(detections['area'].sum())
         avg_person_area = total_person_area / person_count if person_count > 0 else 0
         
         # Estimate crowd density
@@ -311,8 +712,9 @@ class PeopleCounter:
             if self.model and hasattr(self.model, 'cpu'):
                 self.model.cpu()
             
-            # Clear CUDA cache if available
-            if torch.cuda.is_available():
+            # Clear CUDA cache if the model ran on the GPU
+            if self.device == 'cuda':
+                import torch
                 torch.cuda.empty_cache()
                 
             print("People counter cleanup completed")
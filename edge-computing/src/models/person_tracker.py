@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Lightweight multi-person tracker (SORT-style IoU association + Kalman filter)
+"""
+
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from models.detections import make_detections, xywh
+
+try:
+    from scipy.optimize import linear_sum_assignment
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of (N, 4) and (M, 4) x, y, w, h boxes"""
+    ax1, ay1 = boxes_a[:, 0:1], boxes_a[:, 1:2]
+    ax2, ay2 = ax1 + boxes_a[:, 2:3], ay1 + boxes_a[:, 3:4]
+    bx1, by1 = boxes_b[:, 0], boxes_b[:, 1]
+    bx2, by2 = bx1 + boxes_b[:, 2], by1 + boxes_b[:, 3]
+    
+    inter_w = np.clip(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0, None)
+    inter_h = np.clip(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0, None)
+    inter = inter_w * inter_h
+    
+    union = boxes_a[:, 2:3] * boxes_a[:, 3:4] + boxes_b[:, 2] * boxes_b[:, 3] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def match_boxes(iou: np.ndarray, threshold: float) -> List[Tuple[int, int]]:
+    """Assign rows to columns maximizing IoU; pairs below threshold are dropped"""
+    if iou.size == 0:
+        return []
+    
+    if SCIPY_AVAILABLE:
+        rows, cols = linear_sum_assignment(-iou)
+        pairs = zip(rows, cols)
+    else:
+        # Greedy fallback: best remaining pair first
+        pairs = []
+        used_rows, used_cols = set(), set()
+        for flat in np.argsort(-iou, axis=None):
+            row, col = divmod(int(flat), iou.shape[1])
+            if iou[row, col] < threshold:
+                break
+            if row not in used_rows and col not in used_cols:
+                pairs.append((row, col))
+                used_rows.add(row)
+                used_cols.add(col)
+    
+    return [(int(row), int(col)) for row, col in pairs if iou[row, col] >= threshold]
+
+
+class PersonTracker:
+    """
+    Tracks people between detector runs.
+    
+    Each track is a constant-velocity Kalman filter over the box centre
+    with a random-walk size: state (cx, cy, w, h, vx, vy), velocities in
+    pixels per second. All tracks are stored in stacked arrays so predict
+    and update are a few vectorized operations regardless of crowd size.
+    
+    Detections are associated to predicted tracks by IoU. Between
+    detections, boxes are propagated by the motion model and each track's
+    confidence decays, which tells the caller when to run the detector again.
+    """
+    
+    def __init__(self, iou_threshold: float = 0.3, max_age: int = 2, min_hits: int = 1,
+                 confidence_decay: float = 0.9, default_dt: float = 1.0 / 30):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age  # Detector runs a track may go unmatched
+        self.min_hits = min_hits  # Matches before a track is reported
+        self.confidence_decay = confidence_decay  # Per propagated frame
+        self.default_dt = default_dt
+        
+        # Noise (pixels, pixels per second)
+        self.position_noise = 10.0
+        self.velocity_noise = 60.0
+        self.measurement_noise = 4.0
+        
+        self.reset()
+    
+    def reset(self):
+        """Drop all tracks"""
+        self.states = np.zeros((0, 6), dtype=np.float64)
+        self.covariances = np.zeros((0, 6, 6), dtype=np.float64)
+        self.track_ids = np.zeros(0, dtype=np.int64)
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.misses = np.zeros(0, dtype=np.int64)
+        self.confidences = np.zeros(0, dtype=np.float64)
+        
+        self.next_track_id = 1
+        self.last_time = None
+    
+    def __len__(self) -> int:
+        return len(self.track_ids)
+    
+    def _elapsed(self, timestamp: Optional[float]) -> float:
+        """Seconds since the previous predict/update"""
+        now = time.perf_counter() if timestamp is None else timestamp
+        dt = self.default_dt if self.last_time is None else max(now - self.last_time, 1e-3)
+        self.last_time = now
+        return dt
+    
+    def _predict(self, dt: float):
+        """Advance all tracks by dt seconds"""
+        if not len(self):
+            return
+        
+        transition = np.eye(6)
+        transition[0, 4] = transition[1, 5] = dt
+        
+        noise = np.diag([
+            self.position_noise, self.position_noise, self.position_noise, self.position_noise,
+            self.velocity_noise, self.velocity_noise
+        ]) ** 2 * dt
+        
+        self.states = self.states @ transition.T
+        self.covariances = transition @ self.covariances @ transition.T + noise
+        
+        # Keep boxes non-degenerate
+        self.states[:, 2:4] = np.maximum(self.states[:, 2:4], 1.0)
+    
+    def _correct(self, rows: np.ndarray, measurements: np.ndarray):
+        """Kalman update of the given tracks with (cx, cy, w, h) measurements"""
+        observation = np.eye(4, 6)
+        
+        covariances = self.covariances[rows]
+        innovation = measurements - self.states[rows] @ observation.T
+        innovation_cov = observation @ covariances @ observation.T + np.eye(4) * self.measurement_noise ** 2
+        
+        gain = covariances @ observation.T @ np.linalg.inv(innovation_cov)
+        
+        self.states[rows] += np.einsum('nij,nj->ni', gain, innovation)
+        self.covariances[rows] = (np.eye(6) - gain @ observation) @ covariances
+    
+    def _boxes(self) -> np.ndarray:
+        """Current track boxes as (N, 4) x, y, w, h"""
+        boxes = self.states[:, :4].copy()
+        boxes[:, :2] -= boxes[:, 2:4] / 2
+        return boxes
+    
+    def update(self, detections: np.ndarray, timestamp: Optional[float] = None) -> np.ndarray:
+        """Associate a fresh detection array with the tracks; returns the reported tracks"""
+        self._predict(self._elapsed(timestamp))
+        
+        boxes = xywh(detections).astype(np.float64)
+        scores = detections['conf'].astype(np.float64)
+        
+        pairs = match_boxes(iou_matrix(self._boxes(), boxes), self.iou_threshold) if len(self) else []
+        
+        matched_tracks = np.array([t for t, _ in pairs], dtype=np.int64)
+        matched_dets = np.array([d for _, d in pairs], dtype=np.int64)
+        
+        # Matched tracks take the detection
+        self.misses += 1
+        if len(pairs):
+            centers = boxes[matched_dets].copy()
+            centers[:, :2] += centers[:, 2:4] / 2
+            self._correct(matched_tracks, centers)
+            
+            self.hits[matched_tracks] += 1
+            self.misses[matched_tracks] = 0
+            self.confidences[matched_tracks] = scores[matched_dets]
+        
+        # Unmatched detections start new tracks
+        new = np.setdiff1d(np.arange(len(boxes)), matched_dets)
+        if len(new):
+            states = np.zeros((len(new), 6))
+            states[:, :4] = boxes[new]
+            states[:, :2] += boxes[new, 2:4] / 2
+            
+            covariance = np.diag([self.measurement_noise] * 4 + [self.velocity_noise * 10] * 2) ** 2
+            
+            self.states = np.vstack([self.states, states])
+            self.covariances = np.concatenate([self.covariances, np.repeat(covariance[np.newaxis], len(new), axis=0)])
+            self.track_ids = np.concatenate([self.track_ids, np.arange(self.next_track_id, self.next_track_id + len(new))])
+            self.hits = np.concatenate([self.hits, np.ones(len(new), dtype=np.int64)])
+            self.misses = np.concatenate([self.misses, np.zeros(len(new), dtype=np.int64)])
+            self.confidences = np.concatenate([self.confidences, scores[new]])
+            self.next_track_id += len(new)
+        
+        # Forget tracks unmatched for too many detector runs
+        keep = self.misses <= self.max_age
+        if not keep.all():
+            self.states = self.states[keep]
+            self.covariances = self.covariances[keep]
+            self.track_ids = self.track_ids[keep]
+            self.hits = self.hits[keep]
+            self.misses = self.misses[keep]
+            self.confidences = self.confidences[keep]
+        
+        return self.active_tracks()
+    
+    def propagate(self, timestamp: Optional[float] = None) -> np.ndarray:
+        """Move tracks forward on a frame without detection"""
+        self._predict(self._elapsed(timestamp))
+        self.confidences *= self.confidence_decay
+        return self.active_tracks()
+    
+    def _active(self) -> np.ndarray:
+        """Tracks matched at the last detector run and seen often enough"""
+        return (self.misses == 0) & (self.hits >= self.min_hits)
+    
+    def mean_confidence(self) -> Optional[float]:
+        """Mean confidence of the reported tracks (None without tracks)"""
+        active = self._active()
+        return float(self.confidences[active].mean()) if active.any() else None
+    
+    def active_tracks(self) -> np.ndarray:
+        """Reported tracks as a detection array with track ids and velocities"""
+        active = self._active()
+        boxes = self._boxes()[active]
+        boxes[:, 2:] += boxes[:, :2]
+        
+        return make_detections(boxes, self.confidences[active], self.track_ids[active], self.states[active, 4:6])
\ No newline at end of file
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Shared per-frame backbone with emergency and behavior heads
+"""
+
+import asyncio
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+from models.backends import KerasBackend, create_backend, engine_available, resolve_engine
+
+
+class SharedBackbone:
+    """
+    One convolutional backbone serving both EmergencyDetector and BehaviorAnalyzer.
+    
+    The backbone maps a 224x224 frame to a feature vector. The emergency
+    head classifies the current frame's features, and the behavior head is
+    a temporal model over the features of the buffered window. Features of
+    the newest frame are cached on its FramePyramid, so the emergency and
+    behavior stages of one frame share a single backbone pass even when
+    they run concurrently.
+    
+    Three model files are used (models.shared_backbone):
+      backbone_path        (N, 224, 224, 3) -> (N, D)
+      emergency_head_path  (N, D) -> (N, emergency classes)
+      behavior_head_path   (1, T, D) -> (1, behavior classes)
+    When they are missing and TensorFlow is installed, an untrained Keras
+    model with this layout is built instead, like the analyzers' mock models.
+    """
+    
+    def __init__(self, num_emergency_classes: int, num_behavior_classes: int,
+                 backend_config: Optional[Dict] = None, warmup_runs: int = 1):
+        self.backend_config = backend_config or {}
+        self.backbone_path = self.backend_config.get('backbone_path', 'models/shared_backbone.h5')
+        self.emergency_head_path = self.backend_config.get('emergency_head_path', 'models/emergency_head.h5')
+        self.behavior_head_path = self.backend_config.get('behavior_head_path', 'models/behavior_head.h5')
+        self.num_emergency_classes = num_emergency_classes
+        self.num_behavior_classes = num_behavior_classes
+        self.warmup_runs = max(0, warmup_runs)
+        
+        self.input_size = (224, 224)
+        
+        # Backends (None until loaded, or when no model could be loaded)
+        self.backbone = None
+        self.emergency_head = None
+        self.behavior_head = None
+        
+        # Both analyzers await the same load
+        self._load_task = None
+        
+        # Statistics (updated from inference threads)
+        self._stats_lock = threading.Lock()
+        self.frames_encoded = 0
+        self.features_shared = 0
+    
+    @property
+    def loaded(self) -> bool:
+        return self.backbone is not None
+    
+    async def load_model(self) -> bool:
+        """Load the backbone and heads once; returns whether they are available"""
+        if self._load_task is None:
+            self._load_task = asyncio.ensure_future(self._load())
+        return await asyncio.shield(self._load_task)
+    
+    async def _load(self) -> bool:
+        try:
+            await asyncio.to_thread(self._load_backends)
+            await asyncio.to_thread(self._warmup)
+            print("Shared backbone ready")
+            return True
+        
+        except Exception as e:
+            print(f"Shared backbone unavailable, analyzers use their own models: {e}")
+            self.backbone = self.emergency_head = self.behavior_head = None
+            return False
+    
+    def _warmup(self):
+        """Build graphs and fill engine caches before the first frame (blocking)"""
+        dummy_frame = np.zeros((1, *self.input_size[::-1], 3), dtype=np.float32)
+        for _ in range(self.warmup_runs):
+            features = self.backbone.predict(dummy_frame)
+            self.emergency_head.predict(features)
+            self.behavior_head.predict(features[np.newaxis])
+    
+    def _load_backends(self):
+        """Load the three model files, or build a Keras model when they are missing (blocking)"""
+        paths = (self.backbone_path, self.emergency_head_path, self.behavior_head_path)
+        threads = self.backend_config.get('threads')
+        
+        if all(Path(path).exists() for path in paths):
+            engine = self.backend_config.get('engine')
+            self.backbone, self.emergency_head, self.behavior_head = [
+                create_backend(resolve_engine(engine, path), path, threads=threads) for path in paths
+            ]
+            print(f"Loaded shared backbone and heads from {', '.join(paths)}")
+        
+        elif engine_available('keras'):
+            backbone, emergency_head, behavior_head = self._build_keras_model()
+            self.backbone = KerasBackend(backbone, direct_call=True)
+            self.emergency_head = KerasBackend(emergency_head, direct_call=True)
+            self.behavior_head = KerasBackend(behavior_head)
+            print(f"Created mock shared backbone (file not found: {self.backbone_path})")
+        
+        else:
+            raise RuntimeError("model files not found and TensorFlow not available")
+    
+    def _build_keras_model(self):
+        """Untrained backbone, emergency head and temporal behavior head"""
+        from tensorflow import keras
+        
+        # Backbone: conv blocks of the emergency CNN, pooled to one vector per frame
+        frame_input = keras.Input(shape=(*self.input_size[::-1], 3))
+        x = frame_input
+        for filters in (32, 64, 128, 256):
+            x = keras.layers.Conv2D(filters, (3, 3), activation='relu')(x)
+            x = keras.layers.BatchNormalization()(x)
+            x = keras.layers.MaxPooling2D(2, 2)(x)
+        x = keras.layers.GlobalAveragePooling2D()(x)
+        backbone = keras.Model(frame_input, x, name='shared_backbone')
+        
+        # Emergency head on one frame's features
+        feature_input = keras.Input(shape=(int(x.shape[-1]),))
+        y = keras.layers.Dense(256, activation='relu')(feature_input)
+        y = keras.layers.Dense(self.num_emergency_classes, activation='softmax')(y)
+        emergency_head = keras.Model(feature_input, y, name='emergency_head')
+        
+        # Behavior head over the window's feature sequence
+        sequence_input = keras.Input(shape=(None, int(x.shape[-1])))
+        z = keras.layers.LSTM(128, return_sequences=True)(sequence_input)
+        z = keras.layers.LSTM(64)(z)
+        z = keras.layers.Dense(64, activation='relu')(z)
+        z = keras.layers.Dense(self.num_behavior_classes, activation='softmax')(z)
+        behavior_head = keras.Model(sequence_input, z, name='behavior_head')
+        
+        return backbone, emergency_head, behavior_head
+    
+    def preprocess(self, frame: np.ndarray, pyramid=None) -> np.ndarray:
+        """Frame resized to the backbone input and normalized to [0, 1]"""
+        if pyramid is not None and frame is pyramid.frame:
+            return pyramid.normalized(self.input_size)
+        return cv2.resize(frame, self.input_size, interpolation=cv2.INTER_LINEAR).astype(np.float32) / 255.0
+    
+    def encode(self, frame: np.ndarray, pyramid=None) -> np.ndarray:
+        """
+        Backbone features (D,) of one frame (blocking, run off the event loop)
+        
+        With the frame's pyramid the features are computed once per frame
+        and shared by every caller.
+        """
+        if pyramid is None or frame is not pyramid.frame:
+            return self._encode(self.preprocess(frame))[0]
+        
+        computed = False
+        
+        def _compute():
+            nonlocal computed
+            computed = True
+            return self._encode(pyramid.normalized(self.input_size))[0]
+        
+        features = pyramid.get_or_compute(('backbone_features', self.input_size), _compute)
+        if not computed:
+            with self._stats_lock:
+                self.features_shared += 1
+        return features
+    
+    def encode_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Backbone features (N, D) of preprocessed frames (blocking)"""
+        return self._encode(batch)
+    
+    def _encode(self, batch: np.ndarray) -> np.ndarray:
+        if batch.ndim == 3:
+            batch = batch[np.newaxis]
+        features = np.asarray(self.backbone.predict(batch), dtype=np.float32)
+        
+        with self._stats_lock:
+            self.frames_encoded += len(batch)
+        return features
+    
+    def classify_emergency(self, frame: np.ndarray, pyramid=None) -> np.ndarray:
+        """Emergency class probabilities (1, C) of one frame (blocking)"""
+        features = self.encode(frame, pyramid)
+        return self.emergency_head.predict(features[np.newaxis])
+    
+    def classify_behavior(self, feature_sequence: np.ndarray) -> np.ndarray:
+        """Behavior class probabilities (1, C) of a (1, T, D) feature sequence (blocking)"""
+        return self.behavior_head.predict(feature_sequence)
+    
+    def get_statistics(self) -> Dict:
+        """Backbone statistics"""
+        return {
+            'loaded': self.loaded,
+            'engine': self.backbone.describe() if self.backbone else None,
+            'frames_encoded': self.frames_encoded,
+            'features_shared': self.features_shared
+        }
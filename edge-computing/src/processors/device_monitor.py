@@ -463,6 +463,19 @@ class DeviceMonitor:
         if len(self.health_history) > self.max_history_length:
             self.health_history.pop(0)
     
+    def collect_metrics(self, registry):
+        """Set device gauges from the last health check (scrapes take no new measurement)"""
+        if not self.health_history:
+            return
+        
+        latest = self.health_history[-1]
+        registry.gauge('edge_cpu_usage_percent', 'CPU usage in percent').set(latest['cpu_usage'])
+        registry.gauge('edge_memory_usage_percent', 'Memory usage in percent').set(latest['memory_usage'])
+        registry.gauge('edge_cpu_temperature_celsius', 'CPU temperature in degrees Celsius').set(
+            latest['cpu_temperature']
+        )
+        registry.gauge('edge_health_score', 'Device health score (0-100)').set(latest['health_score'])
+    
     def get_health_trends(self, hours: int = 24) -> Dict:
         """Get health trends for specified hours"""
         try:
@@ -8,13 +8,24 @@ import numpy as np
 import json
 import time
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import asyncio
+import os
 
 from models.people_counter import PeopleCounter
-from models.behavior_analyzer import BehaviorAnalyzer
-from models.emergency_detector import EmergencyDetector
+from models.behavior_analyzer import BEHAVIOR_CLASSES, BehaviorAnalyzer
+from models.emergency_detector import EMERGENCY_CLASSES, EmergencyDetector
+from models.shared_backbone import SharedBackbone
+from models.detections import to_locations
+from processors.frame_pyramid import FramePyramid
+from processors.frame_scheduler import AdaptiveFrameScheduler
+from processors.frame_window import TemporalFrameWindow
+from processors.model_workers import ModelWorkerPool
+from processors.motion_gate import MotionGate
 from utils.helpers import save_frame, calculate_density, generate_alert_id
+from utils.inference_executor import InferenceExecutor, InferenceBusyError
+from utils.latency_histogram import LatencyHistogram
+from utils.roi import load_roi
 
 class EdgeProcessor:
     def __init__(self, grid_id: str, config, logger, mqtt_client):
@@ -36,40 +47,174 @@ class EdgeProcessor:
         self.people_counter = None
         self.behavior_analyzer = None
         self.emergency_detector = None
+        self.shared_backbone = None
+        self.sequence_length = config.get('models.sequence_length', 16)
+        
+        # Behavior window sampling: every Nth frame joins the sequence, so a
+        # window spans sequence_length * stride frames. The window hop is the
+        # behavior_analysis_interval of the scheduler
+        self.behavior_stride = max(1, int(config.get('processing.behavior_temporal_stride', 1)))
+        self.last_behavior_frame_id = None
+        
+        # 'thread' runs models in this process, 'process' hosts each model in
+        # its own worker process fed through the shared-memory frame window
+        self.execution_mode = config.get('processing.execution_mode', 'thread')
+        self.model_workers = None
+        
+        # Grid region of interest (grid.roi): models only see the ROI crop
+        self.roi = load_roi(config.get('grid.roi'))
+        
+        # Recent frames for temporal analysis (filled by the capture loop),
+        # stored cropped to the ROI
+        self.frame_window = TemporalFrameWindow(
+            self.sequence_length,
+            shared=self.execution_mode == 'process',
+            stride=self.behavior_stride,
+            roi=self.roi
+        )
+        
+        # Worker threads for blocking model calls
+        self.inference_executor = InferenceExecutor(
+            logger,
+            max_workers=config.get('performance.inference_workers', 1),
+            queue_depth=config.get('performance.inference_queue_depth', 2)
+        )
         
         # Processing state
         self.last_people_count = 0
         self.alert_cooldown = {}
         self.frame_history = []
         
-        # Performance tracking
-        self.processing_times = {
-            'people_counting': [],
+        # Per-model cadence and results carried forward on skipped frames
+        self.scheduler = AdaptiveFrameScheduler(config, logger)
+        
+        # Reuses results on static frames (processing.motion_gate)
+        self.motion_gate = MotionGate(config, logger)
+        self.last_results = {
+            'people_counting': (0, [], None),
             'behavior_analysis': [],
-            'emergency_detection': []
+            'emergency_detection': self.create_idle_emergency_status(
+                'not_run' if self.scheduler.enabled['emergency_detection'] else 'disabled'
+            )
+        }
+        
+        # Performance tracking: per-stage latency histograms (performance.latency_histogram)
+        histogram_config = config.get('performance.latency_histogram', {})
+        self.latency = {
+            stage: LatencyHistogram.from_config(histogram_config)
+            for stage in ('people_counting', 'behavior_analysis', 'emergency_detection')
         }
+        self.last_stage_times = {stage: 0.0 for stage in self.latency}
+        
+        # Wall time (s) to load and warm up each model, for the startup report
+        self.model_load_times = {}
+        
+    def _backend_config(self, model_name: str) -> Dict:
+        """Inference backend config for a model, using its INT8 files when quantization is enabled"""
+        backend_config = dict(self.config.get(f'models.backends.{model_name}', {}) or {})
         
+        if self.config.get('performance.use_quantization', False):
+            # Written next to the float32 models by tools/quantize_models.py
+            for key in ('path', 'encoder_path', 'head_path'):
+                path = backend_config.get(key)
+                if not path or not path.endswith('.onnx'):
+                    continue
+                
+                quantized = path[:-len('.onnx')] + '_int8.onnx'
+                if os.path.exists(quantized):
+                    backend_config[key] = quantized
+                else:
+                    self.logger.warning(f"No INT8 model at {quantized}, using {path}")
+        
+        return backend_config
+    
+    def _density_config(self) -> Dict:
+        """Density-map counting config; switches over at the critical threshold unless set"""
+        density_config = dict(self.config.get('models.density_counting', {}) or {})
+        density_config.setdefault('switch_count', self.density_thresholds['critical'])
+        return density_config
+    
     async def initialize(self):
         """Initialize all ML models"""
         try:
             self.logger.info("Loading ML models...")
             
+            model_kwargs = {
+                'people_counter': {
+                    'model_path': self.config.get('models.people_counter', 'models/yolov8n.pt'),
+                    'confidence_threshold': self.config.get('models.confidence_threshold', 0.5),
+                    'backend_config': self._backend_config('people_counter'),
+                    'tracking_config': self.config.get('models.tracking', {}),
+                    'tiling_config': self.config.get('models.tiling', {}),
+                    'density_config': self._density_config(),
+                    'cache_config': self.config.get('models.result_cache', {})
+                },
+                'behavior_analyzer': {
+                    'model_path': self.config.get('models.behavior_analyzer', 'models/behavior_lstm.h5'),
+                    'sequence_length': self.sequence_length,
+                    'temporal_stride': self.behavior_stride,
+                    'frame_rate': self.config.get('processing.target_fps') or self.config.get('camera.fps', 30),
+                    'smoothing_seconds': self.config.get('processing.behavior_smoothing_seconds'),
+                    'analysis_interval': self.scheduler.base_intervals['behavior_analysis'],
+                    'smoothing_predictions': self.config.get('processing.behavior_smoothing_predictions', 4),
+                    'backend_config': self._backend_config('behavior_analyzer'),
+                    'latency_config': self.config.get('performance.latency_histogram', {})
+                },
+                'emergency_detector': {
+                    'model_path': self.config.get('models.emergency_detector', 'models/emergency_cnn.h5'),
+                    'backend_config': self._backend_config('emergency_detector'),
+                    'roi': self.config.get('grid.roi'),
+                    'cache_config': self.config.get('models.result_cache', {}),
+                    'latency_config': self.config.get('performance.latency_histogram', {})
+                }
+            }
+            
+            warmup_runs = self.config.get('performance.warmup_runs', 1)
+            for kwargs in model_kwargs.values():
+                kwargs['warmup_runs'] = warmup_runs
+            
+            if self.execution_mode == 'process':
+                if self.config.get('models.shared_backbone.enabled', False):
+                    self.logger.warning("models.shared_backbone needs execution_mode 'thread'; "
+                                        "worker processes load separate models")
+                
+                self.model_workers = ModelWorkerPool(
+                    model_kwargs, self.frame_window, self.inference_executor, self.logger,
+                    request_timeout=self.config.get('performance.worker_request_timeout', 10.0)
+                )
+                await self._timed_load('model_workers', self.model_workers.start())
+                self.logger.info("All ML models loaded in worker processes")
+                return
+            
+            # One backbone pass per frame feeds both the behavior and emergency heads
+            shared_config = self.config.get('models.shared_backbone', {}) or {}
+            if shared_config.get('enabled', False):
+                self.shared_backbone = SharedBackbone(
+                    len(EMERGENCY_CLASSES), len(BEHAVIOR_CLASSES),
+                    backend_config=shared_config, warmup_runs=warmup_runs
+                )
+            
             self.people_counter = PeopleCounter(
-                model_path=self.config.get('models.people_counter', 'models/yolov8n.pt'),
-                confidence_threshold=self.config.get('models.confidence_threshold', 0.5)
+                **model_kwargs['people_counter'],
+                executor=self.inference_executor
             )
-            await self.people_counter.load_model()
-            
             self.behavior_analyzer = BehaviorAnalyzer(
-                model_path=self.config.get('models.behavior_analyzer', 'models/behavior_lstm.h5'),
-                sequence_length=self.config.get('models.sequence_length', 16)
+                **model_kwargs['behavior_analyzer'],
+                executor=self.inference_executor,
+                shared_backbone=self.shared_backbone
             )
-            await self.behavior_analyzer.load_model()
-            
             self.emergency_detector = EmergencyDetector(
-                model_path=self.config.get('models.emergency_detector', 'models/emergency_cnn.h5')
+                **model_kwargs['emergency_detector'],
+                executor=self.inference_executor,
+                shared_backbone=self.shared_backbone
+            )
+            
+            # Models load and warm up concurrently; file loading runs on worker threads
+            await asyncio.gather(
+                self._timed_load('people_counter', self.people_counter.load_model()),
+                self._timed_load('behavior_analyzer', self.behavior_analyzer.load_model()),
+                self._timed_load('emergency_detector', self.emergency_detector.load_model())
             )
-            await self.emergency_detector.load_model()
             
             self.logger.info("All ML models loaded successfully")
             
@@ -77,30 +222,104 @@ class EdgeProcessor:
             self.logger.error(f"Model initialization failed: {e}")
             raise
     
+    async def _timed_load(self, name: str, load):
+        """Await a model load and record its wall time in model_load_times"""
+        start_time = time.perf_counter()
+        await load
+        self.model_load_times[name] = round(time.perf_counter() - start_time, 3)
+        self.logger.info(f"{name} ready in {self.model_load_times[name]:.2f}s")
+    
     async def process_frame(self, frame: np.ndarray, frame_sequence: Optional[List[np.ndarray]] = None) -> Dict:
         """Process a single frame and return grid status"""
         start_time = time.time()
         
         try:
-            # 1. People counting
-            people_count, people_locations = await self.count_people(frame)
-            
-            # 2. Behavior analysis (if we have enough frames)
-            behavior_alerts = []
-            if frame_sequence and len(frame_sequence) >= 16:
-                behavior_alerts = await self.analyze_behavior(frame_sequence)
-            
-            # 3. Emergency detection
-            emergency_status = await self.detect_emergencies(frame)
+            # Decide which models run on this frame
+            plan = self.scheduler.plan_frame()
+            frame_skipped = plan is None
+            if frame_skipped:
+                plan = {stage: False for stage in AdaptiveFrameScheduler.STAGES}
+            
+            # Behavior analysis also needs a full frame sequence
+            if plan['behavior_analysis'] and not (
+                    frame_sequence and len(frame_sequence) >= self.sequence_length):
+                plan['behavior_analysis'] = False
+            
+            # With a temporal stride the window only changes every few frames
+            if plan['behavior_analysis'] and self.frame_window.next_frame_id == self.last_behavior_frame_id:
+                plan['behavior_analysis'] = False
+            
+            # Frames from the capture loop arrive through the window, already cropped to the ROI
+            if frame is not self.frame_window.latest():
+                if self.model_workers:
+                    # Worker processes read frames from the shared window by slot
+                    frame = self.frame_window.push(frame)
+                elif self.roi is not None:
+                    frame = self.roi.apply(frame)
+            
+            # Resized / colour-converted versions of the frame, shared by all models
+            pyramid = FramePyramid(frame) if not self.model_workers else None
+            
+            # Static frames reuse earlier results; localized motion narrows person detection
+            people_region = None
+            if self.motion_gate.enabled and not frame_skipped:
+                self.motion_gate.update(pyramid or FramePyramid(frame))
+                
+                for stage in MotionGate.GATED_STAGES:
+                    if plan[stage] and not self.motion_gate.allows(stage):
+                        plan[stage] = False
+                
+                if plan['people_counting']:
+                    people_region = self.motion_gate.people_region(frame.shape[1], frame.shape[0])
+            
+            # 1-3. People counting, behavior analysis and emergency detection are
+            # independent given the frame, so the scheduled stages run concurrently
+            stages = {}
+            if plan['people_counting']:
+                stages['people_counting'] = self.count_people(frame, pyramid, people_region)
+            if plan['behavior_analysis']:
+                stages['behavior_analysis'] = self.analyze_behavior(frame_sequence, pyramid)
+            if plan['emergency_detection']:
+                stages['emergency_detection'] = self.detect_emergencies(frame, pyramid)
+            
+            # A stage whose inference queue was full did not run on this frame: it keeps
+            # its last result without counting as a run or raising alerts again
+            stage_results, busy_stages = {}, []
+            outcomes = await asyncio.gather(*stages.values(), return_exceptions=True)
+            for stage, outcome in zip(stages.keys(), outcomes):
+                if isinstance(outcome, InferenceBusyError):
+                    busy_stages.append(stage)
+                elif isinstance(outcome, BaseException):
+                    raise outcome
+                else:
+                    stage_results[stage] = outcome
+            
+            for stage, result in stage_results.items():
+                self.last_results[stage] = result
+                self.scheduler.mark_run(stage)
+                self.motion_gate.mark_run(stage, full=not (stage == 'people_counting' and people_region))
+            
+            if 'behavior_analysis' in stage_results:
+                self.last_behavior_frame_id = self.frame_window.next_frame_id
+            
+            people_count, people_locations, density_grid = self.last_results['people_counting']
+            behavior_alerts = self.last_results['behavior_analysis']
+            emergency_status = self.last_results['emergency_detection']
+            
+            # Only fresh results may raise alerts
+            fresh_behavior_alerts = stage_results.get('behavior_analysis', [])
+            fresh_emergency_status = stage_results.get(
+                'emergency_detection', self.create_idle_emergency_status('clear')
+            )
             
             # 4. Calculate crowd density
             density_level, density_percentage = self.calculate_crowd_density(people_count)
             
-            # 5. Generate alerts if necessary
-            alerts = await self.generate_alerts(people_count, behavior_alerts, emergency_status)
+            # 5. Generate alerts if necessary (carried-forward results do not re-alert)
+            alerts = await self.generate_alerts(people_count, fresh_behavior_alerts, fresh_emergency_status)
             
             # 6. Save frame if critical event detected
-            if alerts or emergency_status['status'] != 'clear':
+            if alerts or fresh_emergency_status['status'] != 'clear':
                 await self.save_critical_frame(frame)
             
             # 7. Compile grid status
@@ -109,6 +328,9 @@ class EdgeProcessor:
                 'timestamp': datetime.now(timezone.utc).isoformat(),
                 'people_count': people_count,
                 'people_locations': people_locations,
+                'counting_mode': 'density' if density_grid else 'detection',
+                'density_grid': density_grid,
+                'roi': self.roi.describe() if self.roi else None,
                 'crowd_density': {
                     'level': density_level,
                     'percentage': density_percentage,
@@ -121,55 +343,140 @@ class EdgeProcessor:
                 'emergency_detection': emergency_status,
                 'alerts': alerts,
                 'processing_time': time.time() - start_time,
-                'model_performance': self.get_model_performance()
+                'stage_timings_ms': {
+                    stage: round(self.last_stage_times[stage] * 1000, 2) for stage in stage_results
+                },
+                'model_performance': self.get_model_performance(),
+                'inference_queues': self.inference_executor.get_statistics(),
+                'execution_mode': self.execution_mode,
+                'model_workers': self.model_workers.get_statistics() if self.model_workers else None,
+                'shared_backbone': self.shared_backbone.get_statistics() if self.shared_backbone else None,
+                'schedule': {
+                    'frame_skipped': frame_skipped,
+                    'models_run': list(stage_results),
+                    'models_busy': busy_stages,
+                    'motion': self.motion_gate.get_status(),
+                    **self.scheduler.get_status()
+                }
             }
             
             self.last_people_count = people_count
             
+            if not frame_skipped:
+                self.scheduler.record_latency(grid_status['processing_time'])
+            
             return grid_status
             
         except Exception as e:
             self.logger.error(f"Frame processing failed: {e}")
             return self.create_error_status(str(e))
     
-    async def count_people(self, frame: np.ndarray) -> Tuple[int, List[Dict]]:
-        """Count people in the frame using YOLO model"""
-        start_time = time.time()
+    async def _run_people_counter(self, frame: np.ndarray, pyramid: Optional[FramePyramid],
+                                  region: Optional[Tuple[int, int, int, int]] = None) -> Union[np.ndarray, Dict]:
+        """Run people counting in-process or on the worker process; returns detections or a density estimate"""
+        if self.model_workers:
+            return await self.model_workers.run_people_counter(self.frame_window.latest_slot(), region)
+        
+        if self.people_counter.density_mode():
+            # Dense crowd: count from the density map instead of boxes
+            return await self.people_counter.count_density(frame, pyramid)
+        
+        if not self.people_counter.detection_due():
+            # Tracker carries the boxes forward without running the detector
+            return self.people_counter.propagate_tracks()
+        
+        if region is not None:
+            # Only the changed part of the frame is re-detected
+            return await self.people_counter.detect_people_in_region(frame, region)
+        
+        if self.people_counter.tiling_enabled:
+            # Letterbox plus full-resolution tiles over dense regions in one batch
+            return await self.people_counter.detect_people_tiled(frame, pyramid)
+        
+        processed_frame, scale, pad = await self.inference_executor.run(
+            'people_counter', self.people_counter.letterbox_frame, frame, pyramid
+        )
+        
+        # Boxes come back in frame coordinates
+        return await self.people_counter.detect_people(
+            processed_frame, (scale, pad), (frame.shape[1], frame.shape[0])
+        )
+    
+    async def _run_behavior_analyzer(self, frame_sequence: List[np.ndarray],
+                                     pyramid: Optional[FramePyramid]) -> Dict[str, float]:
+        """Run behavior analysis in-process or on the worker process"""
+        if self.model_workers:
+            return await self.model_workers.run_behavior_analyzer(
+                self.frame_window.get_sequence_slots(), self.frame_window.get_sequence_ids()
+            )
+        
+        # Frame ids let the analyzer reuse frames preprocessed for earlier windows
+        frame_ids = None
+        window_sequence = self.frame_window.get_sequence()
+        if window_sequence and frame_sequence[-1] is window_sequence[-1]:
+            frame_ids = self.frame_window.get_sequence_ids()
+        
+        processed_sequence = await self.inference_executor.run(
+            'behavior_analyzer', self.behavior_analyzer.preprocess_sequence, frame_sequence, frame_ids, pyramid
+        )
+        return await self.behavior_analyzer.analyze_sequence(processed_sequence)
+    
+    async def _run_emergency_detector(self, frame: np.ndarray,
+                                      pyramid: Optional[FramePyramid]) -> Tuple[Dict[str, float], Optional[Dict]]:
+        """Run emergency detection in-process or on the worker process; returns (scores, color analysis)"""
+        if self.model_workers:
+            return await self.model_workers.run_emergency_detector(self.frame_window.latest_slot())
+        
+        # The detector takes the raw frame; its pyramid levels are built off the event loop
+        await self.inference_executor.run(
+            'emergency_detector', self.emergency_detector.precompute, frame, pyramid
+        )
+        scores = await self.emergency_detector.detect_emergencies(frame, pyramid)
+        return scores, self.emergency_detector.last_color_analysis
+    
+    async def count_people(self, frame: np.ndarray, pyramid: Optional[FramePyramid] = None,
+                           region: Optional[Tuple[int, int, int, int]] = None) -> Tuple[int, List[Dict], Optional[Dict]]:
+        """Count people in the frame; returns (count, locations, density grid in density-map mode)"""
+        start_time = time.perf_counter()
         
         try:
-            processed_frame = self.people_counter.preprocess_frame(frame)
-            detections = await self.people_counter.detect_people(processed_frame)
-            
-            people_count = len(detections)
-            people_locations = []
-            
-            for detection in detections:
-                x, y, w, h, confidence = detection
-                people_locations.append({
-                    'bbox': [int(x), int(y), int(w), int(h)],
-                    'confidence': float(confidence),
-                    'center': [int(x + w/2), int(y + h/2)]
-                })
+            result = await self._run_people_counter(frame, pyramid, region)
             
-            processing_time = time.time() - start_time
-            self.processing_times['people_counting'].append(processing_time)
+            if isinstance(result, dict):
+                # Density-map mode reports a coarse density grid in place of boxes
+                people_count, people_locations, density_grid = result['count'], [], result
+            else:
+                people_count, people_locations, density_grid = len(result), to_locations(self._to_camera(result)), None
             
-            if len(self.processing_times['people_counting']) > 100:
-                self.processing_times['people_counting'].pop(0)
+            processing_time = time.perf_counter() - start_time
+            self.last_stage_times['people_counting'] = processing_time
+            self.latency['people_counting'].record(processing_time)
             
-            return people_count, people_locations
+            return people_count, people_locations, density_grid
             
+        except InferenceBusyError:
+            self.logger.debug("People counter busy, skipping this frame")
+            raise
         except Exception as e:
             self.logger.error(f"People counting failed: {e}")
-            return 0, []
+            return 0, [], None
+    
+    def _to_camera(self, detections: np.ndarray) -> np.ndarray:
+        """Shift detections from the ROI crop back to camera frame coordinates"""
+        if self.roi is None or self.roi.box is None:
+            return detections
+        
+        detections = detections.copy()
+        detections['xyxy'] = self.roi.to_frame(detections['xyxy'])
+        return detections
     
-    async def analyze_behavior(self, frame_sequence: List[np.ndarray]) -> List[Dict]:
+    async def analyze_behavior(self, frame_sequence: List[np.ndarray],
+                               pyramid: Optional[FramePyramid] = None) -> List[Dict]:
         """Analyze behavior patterns from frame sequence"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
-            processed_sequence = self.behavior_analyzer.preprocess_sequence(frame_sequence)
-            behavior_predictions = await self.behavior_analyzer.analyze_sequence(processed_sequence)
+            behavior_predictions = await self._run_behavior_analyzer(frame_sequence, pyramid)
             
             behavior_alerts = []
             
@@ -184,32 +491,33 @@ class EdgeProcessor:
                     }
                     behavior_alerts.append(alert)
             
-            processing_time = time.time() - start_time
-            self.processing_times['behavior_analysis'].append(processing_time)
-            
-            if len(self.processing_times['behavior_analysis']) > 100:
-                self.processing_times['behavior_analysis'].pop(0)
+            processing_time = time.perf_counter() - start_time
+            self.last_stage_times['behavior_analysis'] = processing_time
+            self.latency['behavior_analysis'].record(processing_time)
             
             return behavior_alerts
             
+        except InferenceBusyError:
+            self.logger.debug("Behavior analyzer busy, skipping this frame")
+            raise
         except Exception as e:
             self.logger.error(f"Behavior analysis failed: {e}")
             return []
     
-    async def detect_emergencies(self, frame: np.ndarray) -> Dict:
+    async def detect_emergencies(self, frame: np.ndarray, pyramid: Optional[FramePyramid] = None) -> Dict:
         """Detect emergency situations in the frame"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
-            processed_frame = self.emergency_detector.preprocess_frame(frame)
-            emergency_predictions = await self.emergency_detector.detect_emergencies(processed_frame)
+            emergency_predictions, color_analysis = await self._run_emergency_detector(frame, pyramid)
             
             emergency_status = {
                 'status': 'clear',
                 'type': None,
                 'confidence': 0.0,
                 'timestamp': datetime.now(timezone.utc).isoformat(),
-                'details': emergency_predictions
+                'details': emergency_predictions,
+                'color_analysis': color_analysis
             }
             
             max_confidence = 0.0
@@ -233,14 +541,15 @@ class EdgeProcessor:
                     'confidence': float(max_confidence)
                 })
             
-            processing_time = time.time() - start_time
-            self.processing_times['emergency_detection'].append(processing_time)
-            
-            if len(self.processing_times['emergency_detection']) > 100:
-                self.processing_times['emergency_detection'].pop(0)
+            processing_time = time.perf_counter() - start_time
+            self.last_stage_times['emergency_detection'] = processing_time
+            self.latency['emergency_detection'].record(processing_time)
             
             return emergency_status
             
+        except InferenceBusyError:
+            self.logger.debug("Emergency detector busy, skipping this frame")
+            raise
         except Exception as e:
             self.logger.error(f"Emergency detection failed: {e}")
             return {
@@ -251,6 +560,17 @@ class EdgeProcessor:
                 'error': str(e)
             }
     
+    def create_idle_emergency_status(self, status: str) -> Dict:
+        """Emergency status used before the detector has run or when it is disabled"""
+        return {
+            'status': status,
+            'type': None,
+            'confidence': 0.0,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'details': {},
+            'color_analysis': None
+        }
+    
     def calculate_crowd_density(self, people_count: int) -> Tuple[str, float]:
         """Calculate crowd density level and percentage"""
         density_per_sqm = people_count / self.grid_area
@@ -363,6 +683,12 @@ class EdgeProcessor:
                     'emergency_type': emergency_status['type'],
                     'confidence': emergency_status['confidence']
                 }
+                
+                # Where in the grid fire/smoke-colored regions were found
+                regions = (emergency_status.get('color_analysis') or {}).get(f"{emergency_status['type']}_regions")
+                if regions:
+                    alert['regions'] = regions
+                    alert['message'] += f" (strongest in grid tile row {regions[0]['row']}, col {regions[0]['col']})"
                 alerts.append(alert)
                 self.set_alert_cooldown(alert_key, 10)
         
@@ -398,27 +724,67 @@ class EdgeProcessor:
             self.logger.error(f"Failed to save critical frame: {e}")
     
     def get_model_performance(self) -> Dict:
-        """Get current model performance metrics"""
+        """Get current model performance metrics (latency summaries per stage)"""
         performance = {}
         
-        for model, times in self.processing_times.items():
-            if times:
-                performance[model] = {
-                    'avg_time_ms': round(np.mean(times) * 1000, 2),
-                    'max_time_ms': round(np.max(times) * 1000, 2),
-                    'min_time_ms': round(np.min(times) * 1000, 2),
-                    'samples': len(times)
-                }
-            else:
-                performance[model] = {
-                    'avg_time_ms': 0,
-                    'max_time_ms': 0,
-                    'min_time_ms': 0,
-                    'samples': 0
-                }
+        for stage, histogram in self.latency.items():
+            performance[stage] = histogram.summary()
+        
+        # Perceptual-hash result cache hits (in-process models only)
+        for stage, model in (('people_counting', self.people_counter),
+                             ('emergency_detection', self.emergency_detector)):
+            cache = getattr(model, 'result_cache', None)
+            performance[stage]['result_cache'] = cache.get_statistics() if cache else None
         
         return performance
     
+    def get_latency_histograms(self) -> Dict:
+        """Full per-stage latency histograms, including the models' own inference timings"""
+        histograms = {stage: histogram.snapshot() for stage, histogram in self.latency.items()}
+        
+        # Inference-only timings of the in-process analyzers
+        for name, model in (('behavior_analyzer', self.behavior_analyzer),
+                            ('emergency_detector', self.emergency_detector)):
+            histogram = getattr(model, 'latency', None)
+            if histogram is not None:
+                histograms[name] = histogram.snapshot()
+        
+        return {
+            'grid_id': self.grid_id,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'histograms': histograms
+        }
+    
+    def collect_metrics(self, registry):
+        """Set crowd, model latency and detection metrics from the last processed frame"""
+        registry.gauge('crowd_people_count', 'People counted in the grid').set(self.last_people_count)
+        
+        # Latency quantiles over the histogram's first window, sum and count since start
+        inference_time = registry.summary(
+            'model_inference_time_seconds', 'Processing time per pipeline stage in seconds'
+        )
+        for stage, histogram in self.latency.items():
+            summary = histogram.summary()
+            for quantile, key in (('0.5', 'p50_ms'), ('0.9', 'p90_ms'), ('0.99', 'p99_ms'), ('0.999', 'p999_ms')):
+                value = summary[key] / 1000 if summary['count'] else float('nan')
+                inference_time.set(value, model=stage, quantile=quantile)
+            inference_time.set(histogram.sum, suffix='_sum', model=stage)
+            inference_time.set(histogram.count, suffix='_count', model=stage)
+        
+        # One series per class so alerts resolve when a detection ends
+        emergency = self.last_results['emergency_detection']
+        emergency_status = registry.gauge('emergency_status', 'Whether an emergency of this type is detected')
+        for emergency_type in EMERGENCY_CLASSES:
+            if emergency_type != 'normal':
+                active = emergency.get('status') == 'emergency' and emergency.get('type') == emergency_type
+                emergency_status.set(1 if active else 0, emergency_type=emergency_type)
+        
+        detected = {alert['behavior'] for alert in self.last_results['behavior_analysis']}
+        behavior_anomaly = registry.gauge('behavior_anomaly_detected', 'Whether this abnormal behavior is detected')
+        for behavior_type in BEHAVIOR_CLASSES:
+            if behavior_type != 'normal':
+                behavior_anomaly.set(1 if behavior_type in detected else 0, behavior_type=behavior_type)
+    
     def create_error_status(self, error_message: str) -> Dict:
         """Create error status when processing fails"""
         return {
@@ -445,6 +811,13 @@ class EdgeProcessor:
             if self.emergency_detector:
                 await self.emergency_detector.cleanup()
             
+            if self.model_workers:
+                await self.model_workers.stop()
+                self.model_workers = None
+            
+            self.inference_executor.shutdown()
+            self.frame_window.close()
+            
             self.logger.info("Edge processor cleanup completed")
             
         except Exception as e:
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Threaded camera capture stage with a latest-frame ring buffer
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class CapturedFrame:
+    """Frame handed from the capture thread to the processing loop"""
+    
+    __slots__ = ('frame', 'timestamp', 'sequence', 'slot')
+    
+    def __init__(self, frame: np.ndarray, timestamp: float, sequence: int, slot: int):
+        self.frame = frame
+        self.timestamp = timestamp
+        self.sequence = sequence
+        self.slot = slot
+
+
+class FrameCapture:
+    """
+    Reads frames from a cv2.VideoCapture on a dedicated thread.
+    
+    Frames are decoded straight into a fixed ring of preallocated slots.
+    The consumer always receives the newest frame; frames it never picked
+    up are dropped (oldest first) instead of queueing behind inference.
+    """
+    
+    def __init__(self, camera, logger, num_slots: int = 4):
+        self.camera = camera
+        self.logger = logger
+        self.num_slots = max(3, num_slots)
+        
+        # Frame slots (allocated on the first successful read)
+        self.slots = None
+        self.slot_timestamps = [0.0] * self.num_slots
+        self.slot_sequences = [0] * self.num_slots
+        
+        # Ready frames not yet delivered, oldest first
+        self.ready = deque()
+        self.held_slot = None
+        self.write_slot = 0
+        self.sequence = 0
+        
+        # Thread control
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        
+        # Statistics
+        self.stats = {
+            'frames_captured': 0,
+            'frames_dropped': 0,
+            'frames_delivered': 0,
+            'read_failures': 0
+        }
+        self.started_at = None
+    
+    def start(self):
+        """Start the capture thread"""
+        if self.running:
+            return
+        
+        self.running = True
+        self.started_at = time.time()
+        self.thread = threading.Thread(target=self._capture_loop, name="frame-capture", daemon=True)
+        self.thread.start()
+        self.logger.info(f"Frame capture started ({self.num_slots} slots)")
+    
+    def stop(self, timeout: float = 2.0):
+        """Stop the capture thread"""
+        self.running = False
+        
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout)
+        
+        self.thread = None
+        self.logger.info("Frame capture stopped")
+    
+    def _allocate_slots(self, shape):
+        """Allocate the frame ring for the given frame shape"""
+        self.slots = np.empty((self.num_slots, *shape), dtype=np.uint8)
+        self.ready.clear()
+        self.held_slot = None
+        self.write_slot = 0
+        self.logger.info(f"Capture ring allocated: {self.num_slots} x {shape}")
+    
+    def _next_write_slot(self) -> int:
+        """Pick the slot for the next frame, never the one held by the consumer"""
+        slot = self.write_slot
+        
+        for _ in range(self.num_slots):
+            if slot != self.held_slot and slot not in self.ready:
+                return slot
+            slot = (slot + 1) % self.num_slots
+        
+        # Every free slot holds an undelivered frame: drop the oldest one
+        slot = self.ready.popleft()
+        self.stats['frames_dropped'] += 1
+        return slot
+    
+    def _capture_loop(self):
+        """Capture thread body"""
+        while self.running:
+            try:
+                with self.lock:
+                    slot = self._next_write_slot() if self.slots is not None else None
+                
+                if slot is None:
+                    ret, frame = self.camera.read()
+                else:
+                    # Decode directly into the preallocated slot
+                    ret, frame = self.camera.read(self.slots[slot])
+                
+                timestamp = time.time()
+                
+                if not ret or frame is None:
+                    self.stats['read_failures'] += 1
+                    time.sleep(0.01)
+                    continue
+                
+                with self.lock:
+                    if slot is None or frame.shape != self.slots.shape[1:]:
+                        # First frame or resolution change
+                        self._allocate_slots(frame.shape)
+                        slot = self._next_write_slot()
+                        np.copyto(self.slots[slot], frame)
+                    elif not np.shares_memory(frame, self.slots[slot]):
+                        # Backend returned its own buffer instead of filling ours
+                        np.copyto(self.slots[slot], frame)
+                    
+                    self.sequence += 1
+                    self.slot_timestamps[slot] = timestamp
+                    self.slot_sequences[slot] = self.sequence
+                    self.ready.append(slot)
+                    self.write_slot = (slot + 1) % self.num_slots
+                    self.stats['frames_captured'] += 1
+            
+            except Exception as e:
+                self.stats['read_failures'] += 1
+                self.logger.error(f"Frame capture error: {e}")
+                time.sleep(0.1)
+    
+    def read_latest(self) -> Optional[CapturedFrame]:
+        """
+        Return the newest captured frame without blocking.
+        
+        The returned frame stays valid until the next call to read_latest()
+        or release(). Returns None if no new frame arrived since the last call.
+        """
+        with self.lock:
+            if not self.ready:
+                return None
+            
+            slot = self.ready.pop()
+            
+            # Anything older than the newest frame will never be delivered
+            self.stats['frames_dropped'] += len(self.ready)
+            self.ready.clear()
+            
+            self.held_slot = slot
+            self.stats['frames_delivered'] += 1
+            
+            return CapturedFrame(
+                self.slots[slot],
+                self.slot_timestamps[slot],
+                self.slot_sequences[slot],
+                slot
+            )
+    
+    def release(self):
+        """Release the slot held by the consumer"""
+        with self.lock:
+            self.held_slot = None
+    
+    def get_statistics(self) -> Dict:
+        """Get capture statistics"""
+        stats = self.stats.copy()
+        elapsed = time.time() - self.started_at if self.started_at else 0
+        
+        if elapsed > 0:
+            stats['capture_fps'] = round(stats['frames_captured'] / elapsed, 2)
+            stats['delivered_fps'] = round(stats['frames_delivered'] / elapsed, 2)
+        else:
+            stats['capture_fps'] = 0.0
+            stats['delivered_fps'] = 0.0
+        
+        # Share of captured frames the processing loop could not keep up with
+        if stats['frames_captured'] > 0:
+            stats['drop_ratio'] = round(stats['frames_dropped'] / stats['frames_captured'], 3)
+        else:
+            stats['drop_ratio'] = 0.0
+        
+        stats['running'] = self.running
+        return stats
\ No newline at end of file
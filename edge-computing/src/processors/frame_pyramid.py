@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Per-frame cache of resized and colour-converted frame versions
+"""
+
+import threading
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class FramePyramid:
+    """
+    Computes each resolution and colour space of one frame at most once.
+    
+    A pyramid is built per frame and passed to every model, so the 640
+    letterbox, the shared 224x224 input and the HSV/grayscale conversions
+    are not recomputed by each consumer. Safe to use from the concurrent
+    model stages: a level being computed by one thread is awaited by others.
+    """
+    
+    def __init__(self, frame: np.ndarray):
+        self.frame = frame
+        self.height, self.width = frame.shape[:2]
+        
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+    
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing it once if missing"""
+        value = self._cache.get(key)
+        if value is not None:
+            return value
+        
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        
+        with key_lock:
+            value = self._cache.get(key)
+            if value is None:
+                value = compute()
+                self._cache[key] = value
+        
+        return value
+    
+    def resize(self, size: Tuple[int, int], interpolation: int = cv2.INTER_LINEAR) -> np.ndarray:
+        """Frame resized to size=(width, height), uint8 BGR"""
+        if size == (self.width, self.height):
+            return self.frame
+        
+        return self.get_or_compute(
+            ('resize', size, interpolation),
+            lambda: cv2.resize(self.frame, size, interpolation=interpolation)
+        )
+    
+    def letterbox(self, size: Tuple[int, int], pad_value: int = 114) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+        """
+        Frame scaled to fit size=(width, height) keeping aspect ratio and padded.
+        
+        Returns (padded_frame, scale, (pad_x, pad_y)) so callers can map
+        coordinates back to the original frame.
+        """
+        return self.get_or_compute(('letterbox', size, pad_value), lambda: self._letterbox(size, pad_value))
+    
+    def _letterbox(self, size: Tuple[int, int], pad_value: int):
+        """Compute a letterboxed frame"""
+        target_w, target_h = size
+        scale = min(target_w / self.width, target_h / self.height)
+        new_w, new_h = int(self.width * scale), int(self.height * scale)
+        
+        resized = self.resize((new_w, new_h))
+        
+        padded = np.full((target_h, target_w, 3), pad_value, dtype=np.uint8)
+        pad_x = (target_w - new_w) // 2
+        pad_y = (target_h - new_h) // 2
+        padded[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = resized
+        
+        return padded, scale, (pad_x, pad_y)
+    
+    def normalized(self, size: Tuple[int, int]) -> np.ndarray:
+        """Frame resized to size and scaled to float32 in [0, 1]"""
+        return self.get_or_compute(
+            ('normalized', size),
+            lambda: self.resize(size).astype(np.float32) * (1.0 / 255.0)
+        )
+    
+    def hsv(self, size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """HSV version of the frame (optionally at a reduced size)"""
+        size = size or (self.width, self.height)
+        return self.get_or_compute(
+            ('hsv', size),
+            lambda: cv2.cvtColor(self.resize(size), cv2.COLOR_BGR2HSV)
+        )
+    
+    def gray(self, size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Grayscale version of the frame (optionally at a reduced size)"""
+        size = size or (self.width, self.height)
+        return self.get_or_compute(
+            ('gray', size),
+            lambda: cv2.cvtColor(self.resize(size), cv2.COLOR_BGR2GRAY)
+        )
\ No newline at end of file
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Adaptive per-model frame scheduler for the edge processing pipeline
+"""
+
+import time
+from typing import Dict, Optional
+
+
+class AdaptiveFrameScheduler:
+    """
+    Decides which models run on each frame.
+    
+    Every model runs at its own cadence (every N processed frames). When the
+    measured per-frame latency exceeds the frame budget, cadences of the
+    least time-critical models are stretched; once there is headroom again
+    they are brought back to their configured values.
+    """
+    
+    # Stage names as used by EdgeProcessor.latency
+    STAGES = ('people_counting', 'behavior_analysis', 'emergency_detection')
+    
+    # Stretch the least time-critical stage first, relax in reverse order
+    ADAPT_ORDER = ('behavior_analysis', 'emergency_detection', 'people_counting')
+    
+    def __init__(self, config, logger):
+        self.logger = logger
+        
+        # Global frame skip (0 = process every frame)
+        self.frame_skip = max(0, int(config.get('processing.frame_skip', 0) or 0))
+        
+        # Per-stage enable flags
+        self.enabled = {
+            stage: bool(config.get(f'processing.enable_{stage}', True))
+            for stage in self.STAGES
+        }
+        
+        # Configured cadences, in processed frames
+        self.base_intervals = {
+            'people_counting': max(1, int(config.get('processing.people_counting_interval', 1))),
+            'behavior_analysis': max(1, int(config.get('processing.behavior_analysis_interval', 16))),
+            'emergency_detection': max(1, int(config.get('processing.emergency_detection_interval', 3)))
+        }
+        self.intervals = self.base_intervals.copy()
+        
+        # Adaptation settings
+        self.adaptive = config.get('processing.adaptive_scheduling', True)
+        max_multiplier = max(1, int(config.get('processing.max_interval_multiplier', 4)))
+        self.max_intervals = {
+            stage: interval * max_multiplier
+            for stage, interval in self.base_intervals.items()
+        }
+        
+        target_fps = config.get('processing.target_fps') or config.get('camera.fps', 30)
+        self.frame_budget = 1.0 / max(1, target_fps)
+        self.overload_ratio = 1.0    # Stretch when latency > budget
+        self.underload_ratio = 0.6   # Relax when latency < 60% of budget
+        self.adapt_every = 30        # Processed frames between adjustments
+        self.ema_alpha = 0.1
+        
+        # Scheduling state
+        self.frame_index = 0
+        self.processed_index = 0
+        self.last_run = {stage: None for stage in self.STAGES}
+        self.latency_ema = None
+        self.frames_since_adapt = 0
+        self.last_adjustment = None
+    
+    def plan_frame(self) -> Optional[Dict[str, bool]]:
+        """
+        Advance to the next frame and return which stages should run.
+        
+        Returns None when the frame is dropped by processing.frame_skip.
+        """
+        self.frame_index += 1
+        
+        if self.frame_skip and (self.frame_index - 1) % (self.frame_skip + 1) != 0:
+            return None
+        
+        self.processed_index += 1
+        plan = {}
+        
+        for stage in self.STAGES:
+            if not self.enabled[stage]:
+                plan[stage] = False
+                continue
+            
+            last = self.last_run[stage]
+            plan[stage] = last is None or self.processed_index - last >= self.intervals[stage]
+        
+        return plan
+    
+    def mark_run(self, stage: str):
+        """Record that a stage produced fresh results on the current frame"""
+        self.last_run[stage] = self.processed_index
+    
+    def record_latency(self, latency: float):
+        """Feed the measured per-frame latency and adapt cadences if needed"""
+        if self.latency_ema is None:
+            self.latency_ema = latency
+        else:
+            self.latency_ema += self.ema_alpha * (latency - self.latency_ema)
+        
+        if not self.adaptive:
+            return
+        
+        self.frames_since_adapt += 1
+        if self.frames_since_adapt < self.adapt_every:
+            return
+        self.frames_since_adapt = 0
+        
+        if self.latency_ema > self.frame_budget * self.overload_ratio:
+            self._stretch()
+        elif self.latency_ema < self.frame_budget * self.underload_ratio:
+            self._relax()
+    
+    def _stretch(self):
+        """Run the least critical stage that still has room less often"""
+        for stage in self.ADAPT_ORDER:
+            if not self.enabled[stage] or self.intervals[stage] >= self.max_intervals[stage]:
+                continue
+            
+            old = self.intervals[stage]
+            self.intervals[stage] = min(old * 2, self.max_intervals[stage])
+            self._log_adjustment(stage, old, 'over')
+            return
+    
+    def _relax(self):
+        """Bring the most critical stretched stage back toward its configured cadence"""
+        for stage in reversed(self.ADAPT_ORDER):
+            if self.intervals[stage] <= self.base_intervals[stage]:
+                continue
+            
+            old = self.intervals[stage]
+            self.intervals[stage] = max(old // 2, self.base_intervals[stage])
+            self._log_adjustment(stage, old, 'under')
+            return
+    
+    def _log_adjustment(self, stage: str, old: int, direction: str):
+        """Log and remember a cadence change"""
+        self.last_adjustment = {
+            'stage': stage,
+            'from': old,
+            'to': self.intervals[stage],
+            'latency_ms': round(self.latency_ema * 1000, 2),
+            'timestamp': time.time()
+        }
+        self.logger.info(
+            f"Frame latency {self.latency_ema * 1000:.1f}ms {direction} budget "
+            f"{self.frame_budget * 1000:.1f}ms: {stage} now every {self.intervals[stage]} frames"
+        )
+    
+    def get_status(self) -> Dict:
+        """Get current scheduling state"""
+        return {
+            'frame_index': self.frame_index,
+            'frame_skip': self.frame_skip,
+            'intervals': self.intervals.copy(),
+            'frames_since_run': {
+                stage: (self.processed_index - last if last is not None else None)
+                for stage, last in self.last_run.items()
+            },
+            'latency_ema_ms': round(self.latency_ema * 1000, 2) if self.latency_ema is not None else 0,
+            'frame_budget_ms': round(self.frame_budget * 1000, 2)
+        }
\ No newline at end of file
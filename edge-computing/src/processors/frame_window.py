@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Preallocated temporal frame window for sequence-based analysis
+"""
+
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class TemporalFrameWindow:
+    """
+    Fixed-size window of the most recent frames.
+    
+    Frames live in one contiguous (N, H, W, 3) uint8 array written with a
+    circular index, so steady-state pushes copy into existing memory and
+    never allocate. Readers get views into the array, not copies.
+    
+    With shared=True the array lives in a multiprocessing shared-memory
+    segment so model worker processes can read frames by slot index.
+    
+    With stride=s only every s-th pushed frame joins the sequence, so the
+    window spans s times as much time for the same size. The other frames
+    go to one extra staging slot, which still makes them available as the
+    latest frame.
+    """
+    
+    def __init__(self, size: int = 16, shared: bool = False, stride: int = 1, roi=None):
+        self.size = size
+        self.shared = shared
+        self.stride = max(1, stride)
+        self.num_slots = size + (1 if self.stride > 1 else 0)
+        
+        # Optional RegionOfInterest: slots hold the ROI crop, zero outside the polygons
+        self.roi = roi
+        
+        # Backing storage (allocated on the first frame)
+        self.buffer = None
+        self.frame_shape = None
+        self.slot_views = []
+        self.shm = None
+        
+        # Circular write index, number of valid sequence frames and the
+        # slot of the most recently pushed frame
+        self.write_index = 0
+        self.count = 0
+        self.latest_index = None
+        self.frames_pushed = 0
+        
+        # Monotonic id of the next pushed frame (never reset, so ids stay
+        # unique across clears and reallocations)
+        self.next_frame_id = 0
+    
+    def _allocate(self, frame_shape: Tuple[int, ...]):
+        """Allocate backing storage for the given frame shape"""
+        shape = (self.num_slots, *frame_shape)
+        
+        # Masked ROI copies never write out-of-ROI pixels, so those must start
+        # zero (new shared-memory segments are zero-filled)
+        if self.shared:
+            self._release_shared_memory()
+            self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+            self.buffer = np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf)
+        else:
+            self.buffer = np.zeros(shape, dtype=np.uint8) if self.roi is not None else np.empty(shape, dtype=np.uint8)
+        
+        self.frame_shape = frame_shape
+        self.slot_views = [self.buffer[i] for i in range(self.num_slots)]
+        self.write_index = 0
+        self.count = 0
+        self.latest_index = None
+    
+    def push(self, frame: np.ndarray) -> np.ndarray:
+        """Copy a frame (its ROI crop, when set) into the window and return a view of its slot"""
+        mask = None
+        if self.roi is not None:
+            frame, mask = self.roi.crop(frame)
+        
+        if self.buffer is None or frame.shape != self.frame_shape:
+            # First frame or resolution change: restart the window
+            self._allocate(frame.shape)
+        
+        slot = self.slot_views[self.write_index]
+        if mask is None:
+            np.copyto(slot, frame)
+        else:
+            cv2.copyTo(frame, mask, slot)
+        self.latest_index = self.write_index
+        
+        # Sampled frames are committed to the sequence; others stay in the
+        # staging slot until the next push overwrites them
+        if self.frames_pushed % self.stride == 0:
+            self.write_index = (self.write_index + 1) % self.num_slots
+            self.count = min(self.count + 1, self.size)
+            self.next_frame_id += 1
+        self.frames_pushed += 1
+        
+        return slot
+    
+    def is_full(self) -> bool:
+        """Check if the window holds a complete sequence"""
+        return self.count == self.size
+    
+    def latest(self) -> Optional[np.ndarray]:
+        """Get a view of the newest frame (sampled into the sequence or not)"""
+        if self.latest_index is None:
+            return None
+        return self.slot_views[self.latest_index]
+    
+    def latest_slot(self) -> int:
+        """Get the slot index of the newest frame"""
+        return self.latest_index
+    
+    def get_sequence_slots(self) -> List[int]:
+        """Get slot indices of the buffered frames in chronological order"""
+        start = self.write_index - self.count
+        return [(start + i) % self.num_slots for i in range(self.count)]
+    
+    def get_sequence_ids(self) -> List[int]:
+        """Get ids of the buffered frames in chronological order (consecutive integers)"""
+        return list(range(self.next_frame_id - self.count, self.next_frame_id))
+    
+    @property
+    def shm_name(self) -> Optional[str]:
+        """Name of the shared-memory segment backing the window"""
+        return self.shm.name if self.shm is not None else None
+    
+    def get_sequence(self) -> Optional[List[np.ndarray]]:
+        """Get views of the buffered frames in chronological order (oldest first)"""
+        if self.count == 0:
+            return None
+        
+        return [self.slot_views[slot] for slot in self.get_sequence_slots()]
+    
+    def clear(self):
+        """Forget buffered frames (storage is kept for reuse)"""
+        self.write_index = 0
+        self.count = 0
+        self.latest_index = None
+    
+    def _release_shared_memory(self):
+        """Drop views and destroy the shared-memory segment"""
+        if self.shm is None:
+            return
+        
+        self.slot_views = []
+        self.buffer = None
+        
+        try:
+            self.shm.close()
+        except BufferError:
+            # A caller still holds a frame view; the mapping goes away with it
+            pass
+        
+        self.shm.unlink()
+        self.shm = None
+    
+    def close(self):
+        """Release backing storage"""
+        self._release_shared_memory()
+        self.buffer = None
+        self.frame_shape = None
+        self.slot_views = []
+        self.clear()
+    
+    def __len__(self) -> int:
+        return self.count
\ No newline at end of file
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Process-hosted model workers fed through shared-memory frames
+
+Each model runs in its own process (and interpreter/GIL). Frames are not
+pickled: workers attach to the shared-memory TemporalFrameWindow and only
+receive slot indices, sending back small result objects.
+"""
+
+import asyncio
+import multiprocessing as mp
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from processors.frame_pyramid import FramePyramid
+
+
+# ============================================================================
+# Worker process side
+# ============================================================================
+
+def _build_model(model_name: str, model_kwargs: Dict):
+    """Create a model instance inside the worker process"""
+    if model_name == 'people_counter':
+        from models.people_counter import PeopleCounter
+        return PeopleCounter(**model_kwargs)
+    
+    if model_name == 'behavior_analyzer':
+        from models.behavior_analyzer import BehaviorAnalyzer
+        return BehaviorAnalyzer(**model_kwargs)
+    
+    if model_name == 'emergency_detector':
+        from models.emergency_detector import EmergencyDetector
+        return EmergencyDetector(**model_kwargs)
+    
+    raise ValueError(f"Unknown model worker: {model_name}")
+
+
+async def _run_people_counter(model, frames: np.ndarray, request: Dict):
+    """Detect, track or density-count people on the newest frame; boxes in frame coordinates"""
+    frame = frames[request['slot']]
+    if model.density_mode():
+        return await model.count_density(frame, FramePyramid(frame))
+    
+    if not model.detection_due():
+        return model.propagate_tracks()
+    
+    if request.get('region') is not None:
+        return await model.detect_people_in_region(frame, request['region'])
+    
+    if model.tiling_enabled:
+        return await model.detect_people_tiled(frame, FramePyramid(frame))
+    
+    processed, scale, pad = model.letterbox_frame(frame, FramePyramid(frame))
+    return await model.detect_people(processed, (scale, pad), (frame.shape[1], frame.shape[0]))
+
+
+async def _run_behavior_analyzer(model, frames: np.ndarray, request: Dict):
+    """Analyze the frame sequence given by slot order"""
+    sequence = [frames[slot] for slot in request['slots']]
+    pyramid = FramePyramid(sequence[-1])
+    processed = model.preprocess_sequence(sequence, request.get('frame_ids'), pyramid)
+    return await model.analyze_sequence(processed)
+
+
+async def _run_emergency_detector(model, frames: np.ndarray, request: Dict):
+    """Detect emergencies on the newest frame, with the color localization"""
+    frame = frames[request['slot']]
+    scores = await model.detect_emergencies(frame, FramePyramid(frame))
+    return scores, model.last_color_analysis
+
+
+WORKER_HANDLERS = {
+    'people_counter': _run_people_counter,
+    'behavior_analyzer': _run_behavior_analyzer,
+    'emergency_detector': _run_emergency_detector
+}
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing segment owned by the parent process"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: spawned workers share the parent's resource tracker,
+        # so the duplicate registration is harmless and the parent unlinks
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(model_name: str, model_kwargs: Dict, conn):
+    """Worker process entry point"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    
+    try:
+        model = _build_model(model_name, model_kwargs)
+        loop.run_until_complete(model.load_model())
+        conn.send(('ready', None))
+    except Exception as e:
+        conn.send(('error', f"Model load failed: {e}"))
+        return
+    
+    handler = WORKER_HANDLERS[model_name]
+    shm = None
+    shm_name = None
+    frames = None
+    
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        
+        if request.get('op') == 'stop':
+            break
+        
+        try:
+            # (Re)attach when the parent reallocated the frame window
+            if request['shm_name'] != shm_name:
+                if shm is not None:
+                    shm.close()
+                shm = _attach_shared_memory(request['shm_name'])
+                shm_name = request['shm_name']
+                frames = np.ndarray(request['shape'], dtype=np.uint8, buffer=shm.buf)
+            
+            started = time.perf_counter()
+            result = loop.run_until_complete(handler(model, frames, request))
+            conn.send(('ok', result, time.perf_counter() - started))
+        
+        except Exception as e:
+            conn.send(('error', str(e)))
+    
+    frames = None
+    if shm is not None:
+        shm.close()
+    
+    loop.run_until_complete(model.cleanup())
+    loop.close()
+
+
+# ============================================================================
+# Parent process side
+# ============================================================================
+
+class ModelWorker:
+    """Handle to one model hosted in a separate process"""
+    
+    def __init__(self, model_name: str, model_kwargs: Dict, logger, startup_timeout: float = 300.0,
+                 request_timeout: float = 10.0):
+        self.model_name = model_name
+        self.model_kwargs = model_kwargs
+        self.logger = logger
+        self.startup_timeout = startup_timeout
+        
+        # A worker that does not answer within this time is considered hung
+        self.request_timeout = request_timeout
+        
+        self.process = None
+        self.conn = None
+        
+        # One request in flight per pipe
+        self.lock = threading.Lock()
+        
+        # Statistics
+        self.stats = {
+            'requests': 0,
+            'errors': 0,
+            'restarts': 0,
+            'timeouts': 0,
+            'last_service_time_ms': 0.0
+        }
+    
+    def start(self):
+        """Spawn the worker process and wait until its model is loaded (blocking)"""
+        ctx = mp.get_context('spawn')
+        parent_conn, child_conn = ctx.Pipe()
+        
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(self.model_name, self.model_kwargs, child_conn),
+            name=f"model-{self.model_name}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        
+        if not self.conn.poll(self.startup_timeout):
+            raise RuntimeError(f"{self.model_name} worker did not start within {self.startup_timeout}s")
+        
+        status = self.conn.recv()
+        if status[0] != 'ready':
+            raise RuntimeError(f"{self.model_name} worker failed: {status[1]}")
+        
+        self.logger.info(f"Model worker {self.model_name} ready (pid {self.process.pid})")
+    
+    def is_alive(self) -> bool:
+        """Check if the worker process is running"""
+        return self.process is not None and self.process.is_alive()
+    
+    def request(self, payload: Dict):
+        """Send a request and wait for its result (blocking)"""
+        with self.lock:
+            if not self.is_alive():
+                self.logger.warning(f"Model worker {self.model_name} not running, restarting")
+                self.stats['restarts'] += 1
+                self.start()
+            
+            self.stats['requests'] += 1
+            self.conn.send(payload)
+            
+            if not self.conn.poll(self.request_timeout):
+                self.stats['errors'] += 1
+                self.stats['timeouts'] += 1
+                self._restart_hung_worker()
+                raise TimeoutError(f"{self.model_name} worker did not answer within {self.request_timeout}s")
+            
+            response = self.conn.recv()
+        
+        if response[0] != 'ok':
+            self.stats['errors'] += 1
+            raise RuntimeError(f"{self.model_name} worker error: {response[1]}")
+        
+        self.stats['last_service_time_ms'] = round(response[2] * 1000, 2)
+        return response[1]
+    
+    def _restart_hung_worker(self):
+        """Kill a worker that stopped answering and start a fresh one (blocking, lock held)"""
+        self.logger.warning(
+            f"Model worker {self.model_name} (pid {self.process.pid}) timed out after "
+            f"{self.request_timeout}s, restarting"
+        )
+        
+        self.process.terminate()
+        self.process.join(5.0)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        
+        self.stats['restarts'] += 1
+        try:
+            self.start()
+        except Exception as e:
+            # The next request retries the start
+            self.logger.error(f"Model worker {self.model_name} restart failed: {e}")
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop the worker process (blocking)"""
+        if self.process is None:
+            return
+        
+        try:
+            with self.lock:
+                if self.is_alive():
+                    self.conn.send({'op': 'stop'})
+            self.process.join(timeout)
+        except Exception:
+            pass
+        
+        if self.process.is_alive():
+            self.process.terminate()
+        
+        self.conn.close()
+        self.process = None
+        self.logger.info(f"Model worker {self.model_name} stopped")
+
+
+class ModelWorkerPool:
+    """
+    Runs PeopleCounter, BehaviorAnalyzer and EmergencyDetector in their own
+    processes and routes requests to them through the inference executor.
+    """
+    
+    def __init__(self, model_kwargs: Dict[str, Dict], frame_window, inference_executor, logger,
+                 request_timeout: float = 10.0):
+        self.frame_window = frame_window
+        self.inference_executor = inference_executor
+        self.logger = logger
+        
+        self.workers = {
+            model_name: ModelWorker(model_name, kwargs, logger, request_timeout=request_timeout)
+            for model_name, kwargs in model_kwargs.items()
+        }
+    
+    async def start(self):
+        """Start all workers; models load in parallel"""
+        await asyncio.gather(*[
+            self.inference_executor.run(model_name, worker.start)
+            for model_name, worker in self.workers.items()
+        ])
+    
+    def _request(self, **fields) -> Dict:
+        """Build a request referencing the shared frame window"""
+        return {
+            'op': 'run',
+            'shm_name': self.frame_window.shm_name,
+            'shape': self.frame_window.buffer.shape,
+            **fields
+        }
+    
+    async def run_people_counter(self, slot: int,
+                                 region: Optional[Tuple[int, int, int, int]] = None) -> Union[np.ndarray, Dict]:
+        """Count people on a window slot (optionally only a changed region); returns detections or a density estimate"""
+        return await self.inference_executor.run(
+            'people_counter', self.workers['people_counter'].request, self._request(slot=slot, region=region)
+        )
+    
+    async def run_behavior_analyzer(self, slots: List[int], frame_ids: Optional[List[int]] = None) -> Dict[str, float]:
+        """Analyze behavior over window slots in chronological order"""
+        return await self.inference_executor.run(
+            'behavior_analyzer', self.workers['behavior_analyzer'].request,
+            self._request(slots=slots, frame_ids=frame_ids)
+        )
+    
+    async def run_emergency_detector(self, slot: int) -> Tuple[Dict[str, float], Optional[Dict]]:
+        """Detect emergencies on a window slot; returns (scores, color analysis)"""
+        return await self.inference_executor.run(
+            'emergency_detector', self.workers['emergency_detector'].request, self._request(slot=slot)
+        )
+    
+    def get_statistics(self) -> Dict:
+        """Get per-worker statistics"""
+        return {
+            model_name: {
+                **worker.stats,
+                'alive': worker.is_alive(),
+                'pid': worker.process.pid if worker.process else None
+            }
+            for model_name, worker in self.workers.items()
+        }
+    
+    async def stop(self):
+        """Stop all workers"""
+        await asyncio.gather(*[
+            asyncio.to_thread(worker.stop) for worker in self.workers.values()
+        ])
\ No newline at end of file
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Motion gate that skips model inference on static camera views
+"""
+
+import time
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Measures frame-to-frame motion on a small grayscale frame.
+    
+    Background subtraction (MOG2) or plain frame differencing produces a
+    changed-pixel mask; its fraction of the frame is the motion score. Below
+    the threshold, behavior and emergency results are reused and people
+    counting is skipped; with localized motion, people are only re-detected
+    inside the changed region. No result is reused for longer than the
+    maximum staleness.
+    """
+    
+    # Stages whose results can be reused on static frames
+    GATED_STAGES = ('people_counting', 'behavior_analysis', 'emergency_detection')
+    
+    def __init__(self, config, logger):
+        self.logger = logger
+        
+        self.enabled = config.get('processing.motion_gate.enabled', False)
+        self.method = config.get('processing.motion_gate.method', 'mog2')  # mog2 or diff
+        self.width = config.get('processing.motion_gate.width', 160)
+        self.threshold = config.get('processing.motion_gate.threshold', 0.002)  # Changed pixel fraction
+        self.max_staleness = config.get('processing.motion_gate.max_staleness_seconds', 5.0)
+        self.region_max_fraction = config.get('processing.motion_gate.region_max_fraction', 0.4)
+        
+        # Detection settings
+        self.diff_threshold = 25  # Gray levels for frame differencing
+        self.region_margin = 0.25  # Region growth on each side, fraction of its size
+        self.min_region_size = 0.15  # Minimum region side, fraction of the frame side
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        
+        self.subtractor = None
+        if self.method == 'mog2':
+            self.subtractor = cv2.createBackgroundSubtractorMOG2(history=300, varThreshold=25, detectShadows=False)
+        self.previous = None
+        
+        # Latest measurement
+        self.score = None
+        self.mask = None
+        self.region = None
+        
+        # Gating state
+        self.last_run = {stage: None for stage in self.GATED_STAGES}
+        self.skipped = {stage: 0 for stage in self.GATED_STAGES}
+        self.region_runs = 0
+    
+    def update(self, pyramid) -> float:
+        """Measure motion on a frame; returns the motion score"""
+        size = (self.width, max(1, int(round(pyramid.height * self.width / pyramid.width))))
+        gray = cv2.GaussianBlur(pyramid.gray(size), (5, 5), 0)
+        
+        if self.subtractor is not None:
+            mask = self.subtractor.apply(gray)
+        elif self.previous is None:
+            mask = np.zeros_like(gray)
+        else:
+            mask = cv2.threshold(cv2.absdiff(gray, self.previous), self.diff_threshold, 255, cv2.THRESH_BINARY)[1]
+        self.previous = gray
+        
+        # Drop single-pixel sensor noise
+        self.mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self.kernel)
+        self.score = cv2.countNonZero(self.mask) / self.mask.size
+        self.region = self._changed_region(pyramid.width, pyramid.height)
+        
+        return self.score
+    
+    def _changed_region(self, frame_w: int, frame_h: int) -> Optional[Tuple[int, int, int, int]]:
+        """Bounding box (x, y, w, h) of the changed pixels in frame coordinates, with a margin"""
+        if not self.score:
+            return None
+        
+        x, y, w, h = cv2.boundingRect(self.mask)
+        scale = frame_w / self.mask.shape[1]
+        
+        # Grow by the margin and to a minimum size so whole people fit
+        w_frame = max(w * scale * (1 + 2 * self.region_margin), frame_w * self.min_region_size)
+        h_frame = max(h * scale * (1 + 2 * self.region_margin), frame_h * self.min_region_size)
+        cx, cy = (x + w / 2) * scale, (y + h / 2) * scale
+        
+        x1, y1 = max(0, int(cx - w_frame / 2)), max(0, int(cy - h_frame / 2))
+        x2, y2 = min(frame_w, int(cx + w_frame / 2)), min(frame_h, int(cy + h_frame / 2))
+        return x1, y1, x2 - x1, y2 - y1
+    
+    def _stale(self, stage: str) -> bool:
+        """Whether a stage's last result is missing or too old to reuse"""
+        last = self.last_run[stage]
+        return last is None or time.monotonic() - last >= self.max_staleness
+    
+    def allows(self, stage: str) -> bool:
+        """Whether a scheduled stage should run on this frame"""
+        if not self.enabled or self.score is None:
+            return True
+        
+        if self.score >= self.threshold or self._stale(stage):
+            return True
+        
+        self.skipped[stage] += 1
+        return False
+    
+    def people_region(self, frame_w: int, frame_h: int) -> Optional[Tuple[int, int, int, int]]:
+        """Region to restrict person detection to, or None for the full frame"""
+        if not self.enabled or self.region is None or self._stale('people_counting'):
+            return None
+        
+        _, _, w, h = self.region
+        if w * h > self.region_max_fraction * frame_w * frame_h:
+            return None
+        
+        return self.region
+    
+    def mark_run(self, stage: str, full: bool = True):
+        """Record fresh results; region-only people counts do not reset staleness"""
+        if full:
+            self.last_run[stage] = time.monotonic()
+        else:
+            self.region_runs += 1
+    
+    def get_status(self) -> Dict:
+        """Current motion state"""
+        return {
+            'enabled': self.enabled,
+            'score': round(self.score, 5) if self.score is not None else None,
+            'region': list(self.region) if self.region else None,
+            'skipped': self.skipped.copy(),
+            'region_runs': self.region_runs
+        }
\ No newline at end of file
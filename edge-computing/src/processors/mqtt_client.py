@@ -289,6 +289,19 @@ class MQTTClient:
         except Exception as e:
             self.logger.error(f"Error during MQTT disconnect: {e}")
     
+    def collect_metrics(self, registry):
+        """Set MQTT gauges and counters from the client state"""
+        registry.gauge('mqtt_messages_queued', 'Messages waiting for the broker connection').set(
+            len(self.message_queue)
+        )
+        registry.gauge('mqtt_connected', 'Whether the broker connection is up').set(1 if self.connected else 0)
+        registry.counter('mqtt_messages_sent_total', 'Messages published since start').set(
+            self.stats['messages_sent']
+        )
+        registry.counter('mqtt_messages_received_total', 'Messages received since start').set(
+            self.stats['messages_received']
+        )
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Get MQTT client statistics"""
         stats = self.stats.copy()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for the edge package
+
+Usage (from edge-computing/src):
+    python -m tools.check_import_budget
+    python -m tools.check_import_budget --module main --budget 1.5
+
+Imports the module in a fresh interpreter and exits non-zero when a heavy
+ML framework (TensorFlow, torch, ultralytics) was pulled in, or when the
+import took longer than --budget seconds. Frameworks must only be imported
+once a backend that needs them loads a model (see models/backends.py).
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict
+
+
+HEAVY_MODULES = ('tensorflow', 'keras', 'torch', 'torchvision', 'ultralytics')
+
+# Runs in the child interpreter; prints the import time and loaded heavy modules
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+heavy = sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{'seconds': round(elapsed, 3), 'heavy_modules': heavy}}))
+"""
+
+
+def measure_import(module: str) -> Dict:
+    """Import module in a fresh interpreter; returns its import time and the heavy modules loaded"""
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    
+    # Module-level prints (e.g. missing framework warnings) precede the report
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='processors.edge_processor', help="Module to import")
+    parser.add_argument('--budget', type=float, default=2.0, help="Maximum import time in seconds")
+    args = parser.parse_args()
+    
+    report = measure_import(args.module)
+    report.update({'module': args.module, 'budget_seconds': args.budget})
+    print(json.dumps(report, indent=2))
+    
+    failed = False
+    if report['heavy_modules']:
+        print(f"FAIL: importing {args.module} loaded {', '.join(report['heavy_modules'])}", file=sys.stderr)
+        failed = True
+    if report['seconds'] > args.budget:
+        print(f"FAIL: importing {args.module} took {report['seconds']:.2f}s (budget {args.budget:.2f}s)",
+              file=sys.stderr)
+        failed = True
+    
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
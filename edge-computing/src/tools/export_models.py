@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Export edge models to ONNX and check the exported model against the original
+
+Usage (from edge-computing/src):
+    python -m tools.export_models people_counter --source models/yolov8n.pt
+    python -m tools.export_models emergency_detector --check-parity --engine opencv
+    python -m tools.export_models behavior_analyzer --frames data/video_buffer
+
+The behavior analyzer is exported as the full sequence model plus the
+split frame encoder / temporal head pair. The printed backend config can
+be pasted under models.backends in grid_config.yaml.
+
+With --check-parity the exported model is run on the selected engine next
+to the original and the tool exits non-zero when outputs diverge.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from models.backends import create_backend, resolve_engine
+from models.detections import to_tuples
+
+
+DEFAULT_SOURCES = {
+    'people_counter': 'models/yolov8n.pt',
+    'behavior_analyzer': 'models/behavior_lstm.h5',
+    'emergency_detector': 'models/emergency_cnn.h5'
+}
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+# ============================================================================
+# Sample frames
+# ============================================================================
+
+def load_sample_frames(source: Optional[str], count: int) -> List[np.ndarray]:
+    """Read up to count BGR frames from a video, image or directory (random frames if none)"""
+    frames = []
+    
+    if source:
+        path = Path(source)
+        files = sorted(path.iterdir()) if path.is_dir() else [path]
+        
+        for file in files:
+            if len(frames) >= count:
+                break
+            
+            if file.suffix.lower() in IMAGE_EXTENSIONS:
+                frame = cv2.imread(str(file))
+                if frame is not None:
+                    frames.append(frame)
+            
+            elif file.suffix.lower() in VIDEO_EXTENSIONS:
+                capture = cv2.VideoCapture(str(file))
+                while len(frames) < count:
+                    ret, frame = capture.read()
+                    if not ret:
+                        break
+                    frames.append(frame)
+                capture.release()
+    
+    if not frames:
+        print("No sample frames found, using random frames")
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, (480, 640, 3), dtype=np.uint8) for _ in range(count)]
+    
+    return frames
+
+
+# ============================================================================
+# Export
+# ============================================================================
+
+def export_keras(model, input_shape, output_path: str, opset: int):
+    """Export a Keras model with a dynamic batch dimension to ONNX"""
+    import tensorflow as tf
+    import tf2onnx
+    
+    # from_function works for both Keras 2 and Keras 3 models
+    spec = [tf.TensorSpec((None, *input_shape), tf.float32, name='input')]
+    function = tf.function(lambda x: model(x, training=False))
+    tf2onnx.convert.from_function(function, input_signature=spec, opset=opset, output_path=output_path)
+    print(f"Exported {output_path}")
+
+
+def load_model(model_name: str, source: str):
+    """Load a model the same way the edge processor does"""
+    if model_name == 'people_counter':
+        from models.people_counter import PeopleCounter
+        model = PeopleCounter(model_path=source, backend_config={'engine': 'ultralytics'})
+    elif model_name == 'behavior_analyzer':
+        from models.behavior_analyzer import BehaviorAnalyzer
+        model = BehaviorAnalyzer(model_path=source, backend_config={'engine': 'keras'})
+    else:
+        from models.emergency_detector import EmergencyDetector
+        model = EmergencyDetector(model_path=source, backend_config={'engine': 'keras'})
+    
+    asyncio.run(model.load_model())
+    
+    if model.backend is None:
+        raise RuntimeError(f"{model_name} did not load a real model from {source}")
+    
+    return model
+
+
+def export_model(model_name: str, model, output: str, opset: int, imgsz: int) -> Dict:
+    """Export a loaded model; returns the backend config for the exported files"""
+    if model_name == 'people_counter':
+        # Dynamic batch lets the tiled mode run the letterbox and its tiles in one call
+        exported = model.backend.model.export(format='onnx', imgsz=imgsz, opset=opset, dynamic=True, simplify=True)
+        Path(exported).replace(output)
+        print(f"Exported {output}")
+        return {'engine': 'auto', 'path': output}
+    
+    export_keras(model.backend.model, model.input_shape, output, opset)
+    config = {'engine': 'auto', 'path': output}
+    
+    if model_name == 'behavior_analyzer' and model.frame_encoder is not None:
+        stem = Path(output).with_suffix('')
+        encoder_path = f"{stem}_encoder.onnx"
+        head_path = f"{stem}_head.onnx"
+        
+        embedding_size = int(model.frame_encoder.model.output_shape[-1])
+        export_keras(model.frame_encoder.model, model.input_shape[1:], encoder_path, opset)
+        export_keras(model.temporal_head.model, (None, embedding_size), head_path, opset)
+        config.update({'encoder_path': encoder_path, 'head_path': head_path})
+    
+    return config
+
+
+# ============================================================================
+# Parity check
+# ============================================================================
+
+def compare_outputs(reference: np.ndarray, candidate: np.ndarray) -> Dict:
+    """Max absolute difference and top-1 agreement of two score arrays"""
+    reference = np.asarray(reference, dtype=np.float32).reshape(len(reference), -1)
+    candidate = np.asarray(candidate, dtype=np.float32).reshape(len(candidate), -1)
+    
+    return {
+        'max_abs_diff': float(np.abs(reference - candidate).max()),
+        'top1_agreement': float(np.mean(reference.argmax(axis=1) == candidate.argmax(axis=1)))
+    }
+
+
+def behavior_sequences(frames: List[np.ndarray], length: int) -> np.ndarray:
+    """Half-overlapping (N, length, 224, 224, 3) sequences over the sample frames"""
+    processed = np.stack([cv2.resize(frame, (224, 224)).astype(np.float32) / 255.0 for frame in frames])
+    while len(processed) < length:
+        processed = np.concatenate([processed, processed])
+    
+    return np.stack([processed[i:i + length] for i in range(0, len(processed) - length + 1, max(1, length // 2))])
+
+
+def box_iou(a, b) -> float:
+    """IoU of two (x, y, w, h) boxes"""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def check_people_counter(model, engine: str, config: Dict, frames: List[np.ndarray]) -> Dict:
+    """Compare detections of the ultralytics model and the exported model"""
+    reference_backend = model.backend
+    candidate = create_backend(engine, config['path'])
+    
+    count_diffs = []
+    ious = []
+    
+    for frame in frames:
+        letterboxed = model.preprocess_frame(frame)
+        
+        model.backend = reference_backend
+        reference = to_tuples(asyncio.run(model.detect_people(letterboxed)))
+        
+        model.backend = candidate
+        detections = to_tuples(asyncio.run(model.detect_people(letterboxed)))
+        
+        count_diffs.append(abs(len(reference) - len(detections)))
+        for box in reference:
+            ious.append(max((box_iou(box, other) for other in detections), default=0.0))
+    
+    model.backend = reference_backend
+    
+    return {
+        'max_count_diff': int(max(count_diffs)),
+        'mean_matched_iou': float(np.mean(ious)) if ious else None
+    }
+
+
+def check_keras_model(model_name: str, model, engine: str, config: Dict, frames: List[np.ndarray]) -> Dict:
+    """Compare scores of the Keras model and the exported model(s)"""
+    if model_name == 'emergency_detector':
+        inputs = np.concatenate([model.preprocess_frame(frame) for frame in frames])
+    else:
+        inputs = behavior_sequences(frames, model.sequence_length)
+    
+    reference = model.backend.model.predict(inputs, verbose=0)
+    candidate = create_backend(engine, config['path'])
+    report = {'full_model': compare_outputs(reference, candidate.predict(inputs))}
+    
+    if 'encoder_path' in config:
+        encoder = create_backend(resolve_engine(engine, config['encoder_path']), config['encoder_path'])
+        head = create_backend(resolve_engine(engine, config['head_path']), config['head_path'])
+        
+        embeddings = np.stack([encoder.predict(sequence) for sequence in inputs])
+        report['encoder_head'] = compare_outputs(reference, head.predict(embeddings))
+    
+    return report
+
+
+def parity_passed(model_name: str, report: Dict, tolerance: float) -> bool:
+    """Apply the pass criteria to a parity report"""
+    if model_name == 'people_counter':
+        return report['max_count_diff'] <= 1 and (report['mean_matched_iou'] is None or report['mean_matched_iou'] >= 0.9)
+    
+    return all(
+        result['max_abs_diff'] <= tolerance and result['top1_agreement'] == 1.0
+        for result in report.values()
+    )
+
+
+# ============================================================================
+# Main
+# ============================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export DSHIELD edge models to ONNX")
+    parser.add_argument('model', choices=sorted(DEFAULT_SOURCES), help="Model to export")
+    parser.add_argument('--source', help="Source model file (default: the configured model path)")
+    parser.add_argument('--output', help="Output .onnx path (default: source path with .onnx suffix)")
+    parser.add_argument('--opset', type=int, default=13, help="ONNX opset version")
+    parser.add_argument('--imgsz', type=int, default=640, help="YOLO export input size")
+    parser.add_argument('--check-parity', action='store_true', help="Compare the exported model with the original")
+    parser.add_argument('--engine', default='auto', help="Engine for the parity check (onnxruntime, opencv, auto)")
+    parser.add_argument('--frames', help="Video, image or directory of sample frames for the parity check")
+    parser.add_argument('--samples', type=int, default=16, help="Number of sample frames")
+    parser.add_argument('--tolerance', type=float, default=1e-3, help="Maximum absolute score difference")
+    args = parser.parse_args()
+    
+    source = args.source or DEFAULT_SOURCES[args.model]
+    output = args.output or str(Path(source).with_suffix('.onnx'))
+    
+    model = load_model(args.model, source)
+    config = export_model(args.model, model, output, args.opset, args.imgsz)
+    
+    report = {'model': args.model, 'source': source, 'backend_config': config}
+    
+    if args.check_parity:
+        engine = resolve_engine(args.engine, output)
+        frames = load_sample_frames(args.frames, args.samples)
+        
+        if args.model == 'people_counter':
+            parity = check_people_counter(model, engine, config, frames)
+        else:
+            parity = check_keras_model(args.model, model, engine, config, frames)
+        
+        report['parity'] = {'engine': engine, **parity, 'passed': parity_passed(args.model, parity, args.tolerance)}
+    
+    print(json.dumps(report, indent=2))
+    
+    return 1 if args.check_parity and not report['parity']['passed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
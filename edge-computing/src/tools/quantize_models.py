@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+INT8 post-training quantization of the exported edge models
+
+Usage (from edge-computing/src):
+    python -m tools.quantize_models
+    python -m tools.quantize_models people_counter --replay recordings/gate_a.mp4
+    python -m tools.quantize_models emergency_detector --source models/emergency_cnn.onnx
+
+Calibration frames come from data/video_buffer (critical frames saved by
+the edge processor) or a replay video. Each model is quantized statically
+with ONNX Runtime and written next to its float32 ONNX file as
+<name>_int8.onnx, which performance.use_quantization picks up. The people
+counter's output is first reduced to the crowd classes (person only by
+default), so decoding and NMS only see person scores.
+
+A JSON report with the latency and accuracy change of each model is
+printed and written to --report. Quantization speedups compare float32 and
+INT8 models with the same output head; the people counter's gain from the
+crowd-class head is reported separately as class_reduction. Models given as .pt/.h5 are exported to
+ONNX first (see tools/export_models.py).
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from models.backends import create_backend
+from tools.export_models import (DEFAULT_SOURCES, behavior_sequences, check_people_counter,
+                                 compare_outputs, export_model, load_model, load_sample_frames)
+
+
+MODEL_NAMES = ('people_counter', 'emergency_detector', 'behavior_analyzer')
+
+
+def int8_path(path: str) -> str:
+    """Path of the INT8 version of an ONNX model"""
+    return str(Path(path).with_suffix('')) + '_int8.onnx'
+
+
+# ============================================================================
+# Model preparation
+# ============================================================================
+
+def float_model_config(model_name: str, source: str, opset: int, imgsz: int) -> Dict:
+    """Backend config of the float32 ONNX model(s), exporting them if needed"""
+    if Path(source).suffix.lower() != '.onnx':
+        return export_model(model_name, load_model(model_name, source), str(Path(source).with_suffix('.onnx')), opset, imgsz)
+    
+    config = {'engine': 'onnxruntime', 'path': source}
+    
+    # Split behavior models exported alongside the full model
+    stem = Path(source).with_suffix('')
+    if model_name == 'behavior_analyzer' and Path(f"{stem}_encoder.onnx").exists():
+        config.update({'encoder_path': f"{stem}_encoder.onnx", 'head_path': f"{stem}_head.onnx"})
+    
+    return config
+
+
+def restrict_yolo_classes(source: str, output: str, classes: List[int]) -> str:
+    """
+    Reduce a YOLOv8 ONNX output from (1, 4 + 80, N) to (1, 4 + len(classes), N)
+    
+    A Gather on the class axis keeps the box rows and the given class rows,
+    so the output copy, transpose and score max run on the crowd classes only.
+    """
+    import onnx
+    from onnx import helper, numpy_helper
+    
+    model = onnx.load(source)
+    graph = model.graph
+    
+    output_info = graph.output[0]
+    full_name = f"{output_info.name}_all_classes"
+    
+    # Producer of the model output now writes the full tensor
+    for node in graph.node:
+        node.output[:] = [full_name if name == output_info.name else name for name in node.output]
+    
+    rows = np.array([0, 1, 2, 3] + [4 + c for c in classes], dtype=np.int64)
+    graph.initializer.append(numpy_helper.from_array(rows, name='crowd_class_rows'))
+    graph.node.append(helper.make_node('Gather', [full_name, 'crowd_class_rows'], [output_info.name], axis=1))
+    
+    dims = output_info.type.tensor_type.shape.dim
+    if len(dims) == 3:
+        dims[1].ClearField('dim_param')
+        dims[1].dim_value = len(rows)
+    
+    onnx.checker.check_model(model)
+    onnx.save(model, output)
+    print(f"Reduced YOLO output to classes {classes}: {output}")
+    return output
+
+
+# ============================================================================
+# Calibration
+# ============================================================================
+
+class CalibrationReader:
+    """Feeds calibration inputs one batch at a time to the ONNX Runtime quantizer"""
+    
+    def __init__(self, input_name: str, inputs: List[np.ndarray]):
+        self.input_name = input_name
+        self.inputs = iter(inputs)
+    
+    def get_next(self):
+        batch = next(self.inputs, None)
+        return None if batch is None else {self.input_name: batch}
+    
+    def rewind(self):
+        pass
+
+
+def quantize(source: str, output: str, inputs: List[np.ndarray], per_channel: bool = True) -> str:
+    """Static INT8 quantization of the convolution and matmul weights/activations (QDQ format)"""
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+    
+    # Shape inference and graph cleanup before quantization
+    prepared = str(Path(output).with_suffix('')) + '_prep.onnx'
+    try:
+        quant_pre_process(source, prepared, skip_symbolic_shape=True)
+    except Exception as e:
+        print(f"Pre-processing skipped for {source}: {e}")
+        prepared = source
+    
+    input_name = ort.InferenceSession(source, providers=['CPUExecutionProvider']).get_inputs()[0].name
+    
+    # Box decoding, softmax and recurrent cells stay in float32
+    quantize_static(
+        prepared, output, CalibrationReader(input_name, inputs),
+        quant_format=QuantFormat.QDQ,
+        op_types_to_quantize=['Conv', 'MatMul', 'Gemm'],
+        per_channel=per_channel,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        calibrate_method=CalibrationMethod.MinMax
+    )
+    
+    if prepared != source:
+        Path(prepared).unlink(missing_ok=True)
+    
+    print(f"Quantized {source} -> {output}")
+    return output
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+def measure_latency(path: str, inputs: np.ndarray, runs: int, threads: int = None) -> float:
+    """Median single-batch latency of an ONNX model in milliseconds"""
+    backend = create_backend('onnxruntime', path, threads=threads)
+    backend.predict(inputs)
+    
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        backend.predict(inputs)
+        times.append(time.perf_counter() - started)
+    
+    return round(float(np.median(times)) * 1000, 2)
+
+
+def file_size_mb(path: str) -> float:
+    return round(Path(path).stat().st_size / 1e6, 2)
+
+
+def latency_report(float_path: str, int8: str, sample: np.ndarray, runs: int, threads: int) -> Dict:
+    """Latency and size of the float32 and INT8 versions of one model"""
+    float_ms = measure_latency(float_path, sample, runs, threads)
+    int8_ms = measure_latency(int8, sample, runs, threads)
+    
+    return {
+        'float32_ms': float_ms,
+        'int8_ms': int8_ms,
+        'speedup': round(float_ms / int8_ms, 2) if int8_ms else None,
+        'float32_mb': file_size_mb(float_path),
+        'int8_mb': file_size_mb(int8)
+    }
+
+
+# ============================================================================
+# Per-model pipelines
+# ============================================================================
+
+def quantize_people_counter(config: Dict, calibration: List[np.ndarray], evaluation: List[np.ndarray],
+                            args) -> Dict:
+    """Crowd-class head, INT8 quantization and detection comparison for YOLO"""
+    from models.people_counter import PeopleCounter
+    
+    counter = PeopleCounter(backend_config=config)
+    blobs = [counter.make_input_blob(counter.preprocess_frame(frame)) for frame in calibration]
+    
+    # Reference detections come from the original float32 model with all classes
+    reference_backend = create_backend('onnxruntime', config['path'])
+    
+    # The float crowd-class model is only an intermediate; it is not deployed
+    with tempfile.TemporaryDirectory() as work_dir:
+        float_path = config['path']
+        if not args.all_classes:
+            float_path = restrict_yolo_classes(
+                config['path'], str(Path(work_dir) / (Path(config['path']).stem + '_crowd.onnx')),
+                counter.crowd_classes
+            )
+        
+        int8 = quantize(float_path, int8_path(config['path']), blobs)
+        
+        # Quantization speedup against the float model with the same head
+        latency = latency_report(float_path, int8, blobs[0], args.runs, args.threads)
+        
+        # Speedup from the crowd-only head alone, both float32
+        class_reduction = None
+        if not args.all_classes:
+            all_classes_ms = measure_latency(config['path'], blobs[0], args.runs, args.threads)
+            crowd_classes_ms = measure_latency(float_path, blobs[0], args.runs, args.threads)
+            class_reduction = {
+                'all_classes_ms': all_classes_ms,
+                'crowd_classes_ms': crowd_classes_ms,
+                'speedup': round(all_classes_ms / crowd_classes_ms, 2) if crowd_classes_ms else None
+            }
+    
+    counter.backend = reference_backend
+    accuracy = check_people_counter(counter, 'onnxruntime', {'path': int8}, evaluation)
+    
+    return {
+        'int8_path': int8,
+        'classes': 'all' if args.all_classes else counter.crowd_classes,
+        'latency': latency,
+        'class_reduction': class_reduction,
+        'accuracy': accuracy
+    }
+
+
+def quantize_emergency_detector(config: Dict, calibration: List[np.ndarray], evaluation: List[np.ndarray],
+                                args) -> Dict:
+    """INT8 quantization and score comparison for the emergency CNN"""
+    from models.emergency_detector import EmergencyDetector
+    
+    detector = EmergencyDetector(backend_config=config)
+    inputs = [detector.preprocess_frame(frame) for frame in calibration]
+    
+    int8 = quantize(config['path'], int8_path(config['path']), inputs)
+    
+    eval_inputs = np.concatenate([detector.preprocess_frame(frame) for frame in evaluation])
+    reference = create_backend('onnxruntime', config['path']).predict(eval_inputs)
+    candidate = create_backend('onnxruntime', int8).predict(eval_inputs)
+    
+    return {
+        'int8_path': int8,
+        'latency': latency_report(config['path'], int8, inputs[0], args.runs, args.threads),
+        'accuracy': compare_outputs(reference, candidate)
+    }
+
+
+def quantize_behavior_analyzer(config: Dict, calibration: List[np.ndarray], evaluation: List[np.ndarray],
+                               args) -> Dict:
+    """INT8 quantization of the behavior model, or its frame encoder and temporal head"""
+    from models.behavior_analyzer import BehaviorAnalyzer
+    
+    length = BehaviorAnalyzer().sequence_length
+    sequences = behavior_sequences(calibration, length)
+    eval_sequences = behavior_sequences(evaluation, length)
+    
+    reference = create_backend('onnxruntime', config['path']).predict(eval_sequences)
+    report = {}
+    
+    full_int8 = quantize(config['path'], int8_path(config['path']), [sequence[np.newaxis] for sequence in sequences])
+    report['full_model'] = {
+        'int8_path': full_int8,
+        'latency': latency_report(config['path'], full_int8, sequences[:1], args.runs, args.threads),
+        'accuracy': compare_outputs(reference, create_backend('onnxruntime', full_int8).predict(eval_sequences))
+    }
+    
+    if 'encoder_path' in config:
+        encoder = create_backend('onnxruntime', config['encoder_path'])
+        frames = sequences.reshape(-1, *sequences.shape[2:])
+        embeddings = [encoder.predict(sequence)[np.newaxis] for sequence in sequences]
+        
+        encoder_int8 = quantize(config['encoder_path'], int8_path(config['encoder_path']),
+                                [frames[i:i + 1] for i in range(len(frames))])
+        head_int8 = quantize(config['head_path'], int8_path(config['head_path']), embeddings)
+        
+        # Streaming path: INT8 encoder per frame, INT8 head per window
+        encoder_q = create_backend('onnxruntime', encoder_int8)
+        head_q = create_backend('onnxruntime', head_int8)
+        candidate = head_q.predict(np.stack([encoder_q.predict(sequence) for sequence in eval_sequences]))
+        
+        report['encoder_head'] = {
+            'int8_paths': [encoder_int8, head_int8],
+            'encoder_latency': latency_report(config['encoder_path'], encoder_int8, frames[:1], args.runs, args.threads),
+            'head_latency': latency_report(config['head_path'], head_int8, embeddings[0], args.runs, args.threads),
+            'accuracy': compare_outputs(reference, candidate)
+        }
+    
+    return report
+
+
+PIPELINES = {
+    'people_counter': quantize_people_counter,
+    'emergency_detector': quantize_emergency_detector,
+    'behavior_analyzer': quantize_behavior_analyzer
+}
+
+
+# ============================================================================
+# Main
+# ============================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="INT8 quantization of DSHIELD edge models")
+    parser.add_argument('models', nargs='*', help=f"Models to quantize: {', '.join(MODEL_NAMES)} (default: all)")
+    parser.add_argument('--source', help="Float32 model for a single model (.onnx, or .pt/.h5 to export first)")
+    parser.add_argument('--frames', default='data/video_buffer', help="Directory of saved frames for calibration")
+    parser.add_argument('--replay', help="Replay video to calibrate on instead of saved frames")
+    parser.add_argument('--samples', type=int, default=128, help="Number of calibration frames")
+    parser.add_argument('--eval-fraction', type=float, default=0.25, help="Frames held out for the accuracy check")
+    parser.add_argument('--all-classes', action='store_true', help="Keep all YOLO classes instead of the crowd classes")
+    parser.add_argument('--runs', type=int, default=20, help="Timed runs per latency measurement")
+    parser.add_argument('--threads', type=int, help="Intra-op threads for latency measurement")
+    parser.add_argument('--opset', type=int, default=13, help="ONNX opset for models exported first")
+    parser.add_argument('--imgsz', type=int, default=640, help="YOLO export input size")
+    parser.add_argument('--report', default='models/quantization_report.json', help="Report output path")
+    args = parser.parse_args()
+    
+    model_names = args.models or list(MODEL_NAMES)
+    unknown = [name for name in model_names if name not in MODEL_NAMES]
+    if unknown:
+        parser.error(f"Unknown model(s): {', '.join(unknown)}")
+    if args.source and len(model_names) != 1:
+        parser.error("--source needs exactly one model")
+    
+    # Calibration and held-out evaluation frames
+    frames = load_sample_frames(args.replay or args.frames, args.samples)
+    random.Random(0).shuffle(frames)
+    held_out = max(1, int(len(frames) * args.eval_fraction))
+    evaluation, calibration = frames[:held_out], frames[held_out:] or frames
+    
+    report = {'calibration_frames': len(calibration), 'evaluation_frames': len(evaluation), 'models': {}}
+    
+    for model_name in model_names:
+        source = args.source or str(Path(DEFAULT_SOURCES[model_name]).with_suffix('.onnx'))
+        if not Path(source).exists() and not args.source:
+            source = DEFAULT_SOURCES[model_name]
+        
+        config = float_model_config(model_name, source, args.opset, args.imgsz)
+        report['models'][model_name] = PIPELINES[model_name](config, calibration, evaluation, args)
+    
+    Path(args.report).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
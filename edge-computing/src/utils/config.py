@@ -139,7 +139,8 @@ class Config:
                     'section': 'North Stand',
                     'level': 1,
                     'position': {'x': -75, 'y': 5, 'z': -60}
-                }
+                },
+                'roi': []  # Polygons of normalized [x, y] points; empty = full frame
             },
             'density_thresholds': {
                 'normal': 60,
@@ -152,6 +153,7 @@ class Config:
                 'width': 1920,
                 'height': 1080,
                 'fps': 30,
+                'buffer_slots': 4,
                 'rotation': 0
             },
             'models': {
@@ -159,7 +161,30 @@ class Config:
                 'behavior_analyzer': 'models/behavior_lstm.h5',
                 'emergency_detector': 'models/emergency_cnn.h5',
                 'confidence_threshold': 0.5,
-                'sequence_length': 16
+                'sequence_length': 16,
+                'tracking': {
+                    'enabled': True,
+                    'detection_interval': 3
+                },
+                'tiling': {
+                    'enabled': False,
+                    'tile_size': 640,
+                    'max_tiles': 4
+                },
+                'density_counting': {
+                    'enabled': False,
+                    'model': 'models/csrnet_lite.onnx'
+                },
+                'shared_backbone': {
+                    'enabled': False
+                },
+                'result_cache': {
+                    'enabled': False,
+                    'method': 'dct',
+                    'max_distance': 3,
+                    'ttl_seconds': 2.0,
+                    'max_entries': 16
+                }
             },
             'mqtt': {
                 'host': 'localhost',
@@ -172,9 +197,33 @@ class Config:
             },
             'processing': {
                 'frame_skip': 0,
+                'execution_mode': 'thread',
                 'enable_people_counting': True,
                 'enable_behavior_analysis': True,
-                'enable_emergency_detection': True
+                'enable_emergency_detection': True,
+                'people_counting_interval': 1,
+                'behavior_analysis_interval': 16,
+                'behavior_temporal_stride': 1,
+                'behavior_smoothing_predictions': 4,
+                'emergency_detection_interval': 3,
+                'adaptive_scheduling': True,
+                'max_interval_multiplier': 4,
+                'motion_gate': {
+                    'enabled': False,
+                    'method': 'mog2',
+                    'max_staleness_seconds': 5.0
+                }
+            },
+            'performance': {
+                'inference_workers': 1,
+                'inference_queue_depth': 2,
+                'worker_request_timeout': 10.0,
+                'warmup_runs': 1,
+                'latency_histogram': {
+                    'windows_seconds': [60, 300],
+                    'slice_seconds': 10.0,
+                    'precision': 0.05
+                }
             },
             'storage': {
                 'video_buffer_path': 'data/video_buffer',
@@ -184,6 +233,12 @@ class Config:
             },
             'monitoring': {
                 'interval': 30,
+                'metrics': {
+                    'enabled': True,
+                    'host': '0.0.0.0',
+                    'port': 9090,
+                    'path': '/metrics'
+                },
                 'thresholds': {
                     'cpu_temp': 80.0,
                     'cpu_usage': 90.0,
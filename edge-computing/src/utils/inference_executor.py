@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Inference executor that keeps blocking model calls off the asyncio event loop
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class InferenceBusyError(RuntimeError):
+    """Raised when a model's inference queue is full"""
+
+
+class InferenceExecutor:
+    """
+    Runs synchronous model calls (predict, preprocessing) on worker threads.
+    
+    Each model gets its own bounded thread pool so a slow model cannot
+    starve the others. Calls beyond max_workers wait in a queue of at most
+    queue_depth entries; further calls are rejected with InferenceBusyError
+    so callers can fall back to their last result instead of piling up.
+    """
+    
+    def __init__(self, logger=None, max_workers: int = 1, queue_depth: int = 2):
+        self.logger = logger
+        self.default_workers = max(1, max_workers)
+        self.default_queue_depth = max(0, queue_depth)
+        
+        # Per-model pools and limits
+        self.pools = {}
+        self.limits = {}
+        self.semaphores = {}
+        self.pending = {}
+        
+        # Per-model statistics
+        self.stats = {}
+    
+    def register(self, model_name: str, max_workers: Optional[int] = None,
+                 queue_depth: Optional[int] = None):
+        """Create the thread pool for a model"""
+        if model_name in self.pools:
+            return
+        
+        workers = max(1, max_workers or self.default_workers)
+        depth = self.default_queue_depth if queue_depth is None else max(0, queue_depth)
+        
+        self.pools[model_name] = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix=f"infer-{model_name}"
+        )
+        self.limits[model_name] = (workers, workers + depth)
+        self.pending[model_name] = 0
+        self.stats[model_name] = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'last_queue_wait_ms': 0.0,
+            'last_service_time_ms': 0.0
+        }
+        
+        if self.logger:
+            self.logger.info(f"Inference pool for {model_name}: {workers} worker(s), queue depth {depth}")
+    
+    async def run(self, model_name: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the model's pool and await the result"""
+        if model_name not in self.pools:
+            self.register(model_name)
+        
+        stats = self.stats[model_name]
+        workers, limit = self.limits[model_name]
+        
+        # Back-pressure: refuse work once the queue is full
+        if self.pending[model_name] >= limit:
+            stats['rejected'] += 1
+            raise InferenceBusyError(f"Inference queue full for {model_name}")
+        
+        if model_name not in self.semaphores:
+            self.semaphores[model_name] = asyncio.Semaphore(workers)
+        
+        stats['submitted'] += 1
+        self.pending[model_name] += 1
+        queued_at = time.perf_counter()
+        
+        def _job():
+            started = time.perf_counter()
+            result = fn(*args, **kwargs)
+            return result, started, time.perf_counter()
+        
+        try:
+            async with self.semaphores[model_name]:
+                loop = asyncio.get_running_loop()
+                result, started, finished = await loop.run_in_executor(self.pools[model_name], _job)
+            
+            stats['completed'] += 1
+            stats['last_queue_wait_ms'] = round((started - queued_at) * 1000, 2)
+            stats['last_service_time_ms'] = round((finished - started) * 1000, 2)
+            return result
+        
+        except Exception:
+            stats['failed'] += 1
+            raise
+        
+        finally:
+            self.pending[model_name] -= 1
+    
+    def get_statistics(self) -> Dict:
+        """Get per-model executor statistics"""
+        return {
+            model_name: {**stats, 'pending': self.pending.get(model_name, 0)}
+            for model_name, stats in self.stats.items()
+        }
+    
+    def shutdown(self, wait: bool = False):
+        """Shut down all worker pools"""
+        for pool in self.pools.values():
+            pool.shutdown(wait=wait)
+        
+        self.pools.clear()
+        self.limits.clear()
+        self.semaphores.clear()
+        self.pending.clear()
\ No newline at end of file
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Log-bucketed streaming latency histograms
+"""
+
+import math
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def _percentile_key(percentile: float) -> str:
+    """'p50_ms', 'p90_ms', 'p99_ms', 'p999_ms'"""
+    return 'p' + f'{percentile:g}'.replace('.', '') + '_ms'
+
+
+class LatencyHistogram:
+    """
+    Fixed-size histogram of latencies with log-spaced buckets.
+    
+    Bucket i covers [min_value * growth**(i-1), min_value * growth**i), so
+    every recorded value is reported within `precision` relative error and
+    record() is O(1) regardless of how many samples were seen. Counts are
+    kept since start and per time slice; the slices of the last
+    max(windows) seconds are retained, and the primary (shortest) window
+    is maintained incrementally so its summary costs one pass over the
+    buckets.
+    
+    Not thread-safe: record and read from the event loop.
+    """
+    
+    def __init__(self, min_value: float = 1e-5, max_value: float = 60.0, precision: float = 0.05,
+                 windows: Sequence[float] = (60, 300), slice_seconds: float = 10.0):
+        self.min_value = min_value
+        self.max_value = max_value
+        self.growth = math.log1p(precision)
+        # Bucket 0 collects values below min_value, the last bucket values above max_value
+        self.num_buckets = int(math.ceil(math.log(max_value / min_value) / self.growth)) + 2
+        
+        self.windows = sorted(float(w) for w in windows) or [60.0]
+        self.slice_seconds = max(0.1, float(slice_seconds))
+        self._slices_per_window = [max(1, int(round(w / self.slice_seconds))) for w in self.windows]
+        
+        # Since start
+        self.total_counts = [0] * self.num_buckets
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.started_at = time.time()
+        
+        # Closed slices (newest last) and the slice being filled
+        self._slices = deque(maxlen=max(self._slices_per_window))
+        self._current = [0] * self.num_buckets
+        self._current_sum = 0.0
+        self._slice_started = time.monotonic()
+        
+        # Primary window = current slice + its newest closed slices
+        self._window_counts = [0] * self.num_buckets
+        self._window_sum = 0.0
+    
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> 'LatencyHistogram':
+        """Histogram from performance.latency_histogram"""
+        config = config or {}
+        return cls(
+            min_value=config.get('min_seconds', 1e-5),
+            max_value=config.get('max_seconds', 60.0),
+            precision=config.get('precision', 0.05),
+            windows=config.get('windows_seconds', (60, 300)),
+            slice_seconds=config.get('slice_seconds', 10.0)
+        )
+    
+    def _bucket(self, value: float) -> int:
+        if value < self.min_value:
+            return 0
+        return min(self.num_buckets - 1, 1 + int(math.log(value / self.min_value) / self.growth))
+    
+    def _bucket_value(self, index: int) -> float:
+        """Representative value (geometric midpoint) of a bucket"""
+        if index == 0:
+            return self.min_value
+        return self.min_value * math.exp((index - 0.5) * self.growth)
+    
+    def _rotate(self, now: float):
+        """Close elapsed slices and drop the oldest from the primary window"""
+        elapsed = int((now - self._slice_started) // self.slice_seconds)
+        if elapsed <= 0:
+            return
+        
+        primary_slices = self._slices_per_window[0]
+        for step in range(min(elapsed, self._slices.maxlen + 1)):
+            closed = (self._current, self._current_sum) if step == 0 else ([0] * self.num_buckets, 0.0)
+            self._slices.append(closed)
+            
+            # The slice that just left the primary window
+            if len(self._slices) >= primary_slices:
+                leaving_counts, leaving_sum = self._slices[-primary_slices]
+                for i, n in enumerate(leaving_counts):
+                    if n:
+                        self._window_counts[i] -= n
+                self._window_sum -= leaving_sum
+        
+        self._current = [0] * self.num_buckets
+        self._current_sum = 0.0
+        self._slice_started += elapsed * self.slice_seconds
+    
+    def record(self, seconds: float):
+        """Add one latency sample"""
+        self._rotate(time.monotonic())
+        
+        index = self._bucket(seconds)
+        self.total_counts[index] += 1
+        self._current[index] += 1
+        self._window_counts[index] += 1
+        
+        self.count += 1
+        self.sum += seconds
+        self._current_sum += seconds
+        self._window_sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+    
+    def _percentiles(self, counts: List[int], total: int) -> Dict:
+        """Percentile values (ms) from bucket counts, one cumulative pass"""
+        result = {}
+        targets = [(p, max(1, math.ceil(total * p / 100.0))) for p in PERCENTILES]
+        seen, t = 0, 0
+        for i, n in enumerate(counts):
+            if not n:
+                continue
+            seen += n
+            while t < len(targets) and seen >= targets[t][1]:
+                result[_percentile_key(targets[t][0])] = round(self._bucket_value(i) * 1000, 2)
+                t += 1
+            if t == len(targets):
+                break
+        return result
+    
+    def _summarize(self, counts: List[int], total_sum: float) -> Dict:
+        total = sum(counts)
+        if not total:
+            return {'count': 0, 'mean_ms': 0, **{_percentile_key(p): 0 for p in PERCENTILES}}
+        return {
+            'count': total,
+            'mean_ms': round(total_sum / total * 1000, 2),
+            **self._percentiles(counts, total)
+        }
+    
+    def _window(self, slices: int):
+        """Bucket counts and sum of the current slice and the newest closed slices"""
+        counts = list(self._current)
+        total_sum = self._current_sum
+        for slice_counts, slice_sum in list(self._slices)[-(slices - 1):] if slices > 1 else []:
+            for i, n in enumerate(slice_counts):
+                if n:
+                    counts[i] += n
+            total_sum += slice_sum
+        return counts, total_sum
+    
+    def summary(self) -> Dict:
+        """Cheap summary: primary window percentiles plus since-start count and max"""
+        self._rotate(time.monotonic())
+        return {
+            'window_seconds': self.windows[0],
+            **self._summarize(self._window_counts, self._window_sum),
+            'samples': self.count,
+            'max_ms': round(self.max * 1000, 2)
+        }
+    
+    def snapshot(self) -> Dict:
+        """Full histogram: percentiles for every window and since start, plus non-empty buckets"""
+        self._rotate(time.monotonic())
+        
+        windows = {}
+        for window, slices in zip(self.windows, self._slices_per_window):
+            windows[f'{window:g}s'] = self._summarize(*self._window(slices))
+        
+        return {
+            'since_start': {
+                **self._summarize(self.total_counts, self.sum),
+                'max_ms': round(self.max * 1000, 2),
+                'uptime_seconds': round(time.time() - self.started_at, 1)
+            },
+            'windows': windows,
+            'precision': round(math.expm1(self.growth), 4),
+            # [upper bound (ms), count]; the last bound is +inf for values above max_value
+            'buckets': [
+                [round(self.min_value * math.exp(i * self.growth) * 1000, 4)
+                 if i < self.num_buckets - 1 else None, n]
+                for i, n in enumerate(self.total_counts) if n
+            ]
+        }
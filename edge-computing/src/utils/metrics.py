@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+In-process Prometheus metrics registry and /metrics HTTP endpoint
+"""
+
+import asyncio
+import math
+from typing import Callable, Dict, List, Optional, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+class MetricFamily:
+    """One metric name with its help text, type and labelled samples"""
+    
+    def __init__(self, name: str, help_text: str, metric_type: str = 'gauge'):
+        self.name = name
+        self.help_text = help_text
+        self.metric_type = metric_type
+        
+        # (suffix, sorted label items) -> value
+        self.samples: Dict[Tuple[str, Tuple], float] = {}
+    
+    def set(self, value: Optional[float], suffix: str = '', **labels):
+        """Set a sample; None leaves it unset for this scrape"""
+        if value is None:
+            return
+        self.samples[(suffix, tuple(sorted(labels.items())))] = float(value)
+    
+    def clear(self):
+        self.samples.clear()
+    
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.metric_type}"
+        ]
+        for (suffix, labels), value in self.samples.items():
+            label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels)
+            lines.append(f"{self.name}{suffix}{{{label_text}}} {_format_value(value)}" if label_text
+                         else f"{self.name}{suffix} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Pull-based metric registry.
+    
+    Components declare metric families once and register a collector that
+    fills them from state they already keep. Collectors run only when the
+    endpoint is scraped, so serving metrics adds no work to the frame loop.
+    Samples are cleared before every scrape, so a label set a collector
+    stops reporting disappears.
+    """
+    
+    def __init__(self):
+        self.families: Dict[str, MetricFamily] = {}
+        self.collectors: List[Callable[['MetricsRegistry'], None]] = []
+        self.collector_errors = 0
+    
+    def _family(self, name: str, help_text: str, metric_type: str) -> MetricFamily:
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = MetricFamily(name, help_text, metric_type)
+        return family
+    
+    def gauge(self, name: str, help_text: str) -> MetricFamily:
+        """Declare (or look up) a gauge"""
+        return self._family(name, help_text, 'gauge')
+    
+    def counter(self, name: str, help_text: str) -> MetricFamily:
+        """Declare (or look up) a counter"""
+        return self._family(name, help_text, 'counter')
+    
+    def summary(self, name: str, help_text: str) -> MetricFamily:
+        """Declare (or look up) a summary (quantile samples plus _sum and _count)"""
+        return self._family(name, help_text, 'summary')
+    
+    def add_collector(self, collector: Callable[['MetricsRegistry'], None]):
+        """Register a callable that sets metric values at scrape time"""
+        self.collectors.append(collector)
+    
+    def collect(self) -> str:
+        """Run all collectors and render the text exposition format"""
+        for family in self.families.values():
+            family.clear()
+        
+        for collector in self.collectors:
+            try:
+                collector(self)
+            except Exception:
+                # One failing component must not break the whole scrape
+                self.collector_errors += 1
+        
+        self.counter('edge_metrics_collector_errors_total',
+                     'Collector failures since start').set(self.collector_errors)
+        
+        lines = []
+        for family in self.families.values():
+            if family.samples:
+                lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """Minimal asyncio HTTP server answering GET /metrics from a MetricsRegistry"""
+    
+    def __init__(self, registry: MetricsRegistry, logger, host: str = '0.0.0.0', port: int = 9090,
+                 path: str = '/metrics'):
+        self.registry = registry
+        self.logger = logger
+        self.host = host
+        self.port = port
+        self.path = path
+        self.server = None
+        
+        # Statistics
+        self.scrapes = 0
+    
+    @classmethod
+    def from_config(cls, config, registry: MetricsRegistry, logger) -> Optional['MetricsServer']:
+        """Server from monitoring.metrics, or None when disabled"""
+        metrics_config = config.get('monitoring.metrics', {}) or {}
+        if not metrics_config.get('enabled', True):
+            return None
+        
+        return cls(
+            registry,
+            logger,
+            host=metrics_config.get('host', '0.0.0.0'),
+            port=metrics_config.get('port', 9090),
+            path=metrics_config.get('path', '/metrics')
+        )
+    
+    async def start(self):
+        """Start listening"""
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.logger.info(f"Serving Prometheus metrics on http://{self.host}:{self.port}{self.path}")
+    
+    async def stop(self):
+        """Stop listening"""
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+            
+            # Drain the headers; the request body is never used
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+                if line in (b'\r\n', b'\n', b''):
+                    break
+            
+            parts = request_line.decode('latin-1').split()
+            method, target = (parts[0], parts[1]) if len(parts) >= 2 else ('', '')
+            
+            if method not in ('GET', 'HEAD'):
+                status, body, content_type = '405 Method Not Allowed', 'Method not allowed\n', 'text/plain'
+            elif target.split('?', 1)[0] != self.path:
+                status, body, content_type = '404 Not Found', 'Not found\n', 'text/plain'
+            else:
+                self.scrapes += 1
+                status, body, content_type = '200 OK', self.registry.collect(), CONTENT_TYPE
+            
+            payload = body.encode('utf-8')
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n".encode('latin-1')
+            )
+            if method != 'HEAD':
+                writer.write(payload)
+            await writer.drain()
+        
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception as e:
+            self.logger.warning(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
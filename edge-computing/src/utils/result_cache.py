@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Perceptual-hash result cache for near-duplicate model inputs
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+
+def perceptual_hash(image: np.ndarray, hash_size: int = 8, method: str = 'dct') -> int:
+    """
+    hash_size**2-bit perceptual hash of an image (uint8 or float, gray or colour)
+    
+    'average' thresholds a hash_size x hash_size thumbnail at its mean.
+    'dct' (pHash) thresholds the lowest DCT frequencies of a 4x larger
+    thumbnail at their median, which is more robust to brightness and
+    contrast changes. Both cost one INTER_AREA resize of the input.
+    """
+    side = hash_size if method == 'average' else hash_size * 4
+    small = cv2.resize(image, (side, side), interpolation=cv2.INTER_AREA).astype(np.float32)
+    if small.ndim == 3:
+        small = small.mean(axis=2)
+    
+    if method == 'average':
+        bits = small > small.mean()
+    else:
+        coeffs = cv2.dct(small)[:hash_size, :hash_size]
+        bits = coeffs > np.median(coeffs.ravel()[1:])  # DC term excluded
+    
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+class PerceptualHashCache:
+    """
+    Small LRU cache of model results keyed by a perceptual hash of the input.
+    
+    A lookup hits when a cached hash is within max_distance bits (Hamming
+    distance) of the query, so consecutive frames of a static view reuse one
+    result even though their pixels differ by sensor noise. Entries expire
+    after ttl_seconds so slow changes (lighting, a gathering crowd) are
+    picked up, and the least recently used entry is dropped beyond
+    max_entries.
+    """
+    
+    def __init__(self, max_entries: int = 16, max_distance: int = 3, ttl_seconds: float = 2.0,
+                 hash_size: int = 8, method: str = 'dct'):
+        self.max_entries = max(1, max_entries)
+        self.max_distance = max(0, max_distance)
+        self.ttl_seconds = ttl_seconds
+        self.hash_size = hash_size
+        self.method = method
+        
+        # hash -> (stored_at, value), least recently used first
+        self.entries = OrderedDict()
+        
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> Optional['PerceptualHashCache']:
+        """Cache from models.result_cache, or None when disabled"""
+        config = config or {}
+        if not config.get('enabled', False):
+            return None
+        
+        return cls(
+            max_entries=config.get('max_entries', 16),
+            max_distance=config.get('max_distance', 3),
+            ttl_seconds=config.get('ttl_seconds', 2.0),
+            hash_size=config.get('hash_size', 8),
+            method=config.get('method', 'dct')
+        )
+    
+    def key(self, image: np.ndarray) -> int:
+        """Perceptual hash of a model input"""
+        return perceptual_hash(image, self.hash_size, self.method)
+    
+    def _expire(self, now: float):
+        """Drop entries older than the TTL"""
+        expired = [key for key, (stored_at, _) in self.entries.items() if now - stored_at > self.ttl_seconds]
+        for key in expired:
+            del self.entries[key]
+        self.evictions += len(expired)
+    
+    def lookup(self, key: int) -> Optional[Any]:
+        """Cached value of the nearest hash within max_distance, or None"""
+        now = time.time()
+        self._expire(now)
+        
+        best_key, best_distance = None, self.max_distance + 1
+        for cached_key in self.entries:
+            distance = bin(cached_key ^ key).count('1')
+            if distance < best_distance:
+                best_key, best_distance = cached_key, distance
+                if distance == 0:
+                    break
+        
+        if best_key is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        self.entries.move_to_end(best_key)
+        return self.entries[best_key][1]
+    
+    def store(self, key: int, value: Any):
+        """Cache a result under the hash of its input"""
+        self.entries[key] = (time.time(), value)
+        self.entries.move_to_end(key)
+        
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self):
+        """Drop all entries"""
+        self.entries.clear()
+    
+    def get_statistics(self) -> Dict:
+        """Hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': len(self.entries),
+            'evictions': self.evictions
+        }
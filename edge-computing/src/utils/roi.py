@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Grid region of interest: polygons of the camera view that belong to the grid
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+class RegionOfInterest:
+    """
+    Crops frames to the bounding box of the grid polygons and zeroes the rest.
+    
+    Polygons are lists of [x, y] points normalized to the frame (0-1), so
+    one config works at any camera resolution. Masks are rasterized once
+    per frame size and cached; cropping a frame is a slice plus one masked
+    copy (cv2.copyTo).
+    """
+    
+    def __init__(self, polygons: Sequence[Sequence[Sequence[float]]]):
+        self.polygons = [np.clip(np.asarray(polygon, dtype=np.float64).reshape(-1, 2), 0.0, 1.0) for polygon in polygons]
+        if not self.polygons or any(len(polygon) < 3 for polygon in self.polygons):
+            raise ValueError("grid.roi needs polygons of at least 3 [x, y] points")
+        
+        # Normalized bounding box of all polygons
+        points = np.concatenate(self.polygons)
+        self.bounds = (*points.min(axis=0), *points.max(axis=0))
+        
+        self._frame_geometry = {}
+        self._crop_masks = {}
+        
+        # Crop box (x, y, w, h) of the last frame size used
+        self.box = None
+    
+    def _rasterize(self, size: Tuple[int, int], origin: Tuple[float, float], scale: Tuple[float, float]) -> np.ndarray:
+        """uint8 mask (255 inside) of the polygons mapped by (point - origin) * scale"""
+        mask = np.zeros((size[1], size[0]), dtype=np.uint8)
+        contours = [np.round((polygon - origin) * scale).astype(np.int32) for polygon in self.polygons]
+        cv2.fillPoly(mask, contours, 255)
+        return mask
+    
+    def geometry(self, width: int, height: int) -> Tuple[Tuple[int, int, int, int], np.ndarray]:
+        """Crop box (x, y, w, h) and uint8 crop mask for frames of the given size"""
+        geometry = self._frame_geometry.get((width, height))
+        if geometry is None:
+            x0, y0, x1, y1 = self.bounds
+            x, y = int(np.floor(x0 * width)), int(np.floor(y0 * height))
+            w = max(1, int(np.ceil(x1 * width)) - x)
+            h = max(1, int(np.ceil(y1 * height)) - y)
+            
+            mask = self._rasterize((w, h), (x / width, y / height), (width, height))
+            geometry = ((x, y, w, h), mask)
+            self._frame_geometry[(width, height)] = geometry
+        
+        self.box = geometry[0]
+        return geometry
+    
+    def crop(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """View of the frame's crop box and the matching mask"""
+        (x, y, w, h), mask = self.geometry(frame.shape[1], frame.shape[0])
+        return frame[y:y + h, x:x + w], mask
+    
+    def apply(self, frame: np.ndarray) -> np.ndarray:
+        """New frame cropped to the ROI with out-of-ROI pixels zeroed"""
+        cropped, mask = self.crop(frame)
+        return cv2.copyTo(cropped, mask, np.zeros_like(cropped))
+    
+    def crop_mask(self, size: Tuple[int, int]) -> np.ndarray:
+        """uint8 mask (255 inside) for a frame already cropped to the ROI and resized to size=(w, h)"""
+        mask = self._crop_masks.get(size)
+        if mask is None:
+            x0, y0, x1, y1 = self.bounds
+            scale = (size[0] / max(x1 - x0, 1e-6), size[1] / max(y1 - y0, 1e-6))
+            mask = self._rasterize(size, (x0, y0), scale)
+            self._crop_masks[size] = mask
+        return mask
+    
+    def to_frame(self, points: np.ndarray) -> np.ndarray:
+        """Shift (..., 2k) crop pixel coordinates back to the full frame (last box)"""
+        x, y = self.box[:2]
+        return points + np.tile(np.array([x, y], dtype=points.dtype), points.shape[-1] // 2)
+    
+    def describe(self) -> Dict:
+        """ROI summary for status reporting"""
+        return {
+            'polygons': len(self.polygons),
+            'crop_box': list(self.box) if self.box else None
+        }
+
+
+def load_roi(polygons: Optional[List]) -> Optional[RegionOfInterest]:
+    """RegionOfInterest from grid.roi, or None when no ROI is configured"""
+    return RegionOfInterest(polygons) if polygons else None
\ No newline at end of file
@@ -103,7 +103,9 @@ class DittoBridge {
                             peopleCount: data.people_count || 0,
                             crowdDensity: data.crowd_density || {},
                             densityLevel: data.crowd_density?.level || 'normal',
-                            peopleLocations: data.people_locations || []
+                            peopleLocations: data.people_locations || [],
+                            countingMode: data.counting_mode || 'detection',
+                            densityGrid: data.density_grid || null
                         }
                     },
                     behaviorAnalysis: {